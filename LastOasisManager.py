@@ -4,11 +4,13 @@ import subprocess
 import time
 import threading
 import os
+import sys
 import shutil
 import ctypes
 import psutil
 import re
 import logging
+import concurrent.futures
 from pathlib import Path
 
 # Third-party imports
@@ -16,11 +18,35 @@ import requests
 
 # Local imports
 import admin_writer
+import mod_deployer
+import steamcmd
 from mod_checker import add_new_mod_ids, read_json, update_mods_info
 from TileTracker import get_tracker
+from tile_supervisor import RestartPolicy, TileSupervisor, stop_process_tree
+from resource_sampler import ResourceSampler
+from readiness import ReadinessProbe
+from lo_server_query import query_server
+from control_api import ControlAPIServer
+from tile_placement import TilePlacement, plan_core_sets
+from resource_governor import ResourceGovernor, parse_size
+from launch_scheduler import LaunchScheduler
+from leak_detector import LeakDetector
+from hang_watchdog import HangWatchdog
+from tile_registry import TileRegistry
+from cluster_agent import format_tile_command
+from cluster_coordinator import ClusterCoordinator
+from server_update import BuildIdChecker, find_app_manifest
+from install_roots import InstallRoots
+from steamcmd_session import SteamCMDPool
 
 # Expose important functions at module level
-__all__ = ['start_processes', 'stop_processes', 'restart_all_tiles', 'update_config', 'get_tracker']
+__all__ = ['start_processes', 'stop_processes', 'start_single_process', 'stop_single_process',
+           'start_tile', 'stop_tile', 'restart_tile', 'redeploy_tile_mods',
+           'is_tile_running', 'get_tile_resources', 'get_crash_stats', 'release_tile_quarantine',
+           'get_boot_stats', 'get_limit_events', 'get_launch_stats',
+           'get_leak_predictions', 'get_hang_stats', 'get_cluster_status', 'get_server_update_status', 'request_validation',
+           'get_install_roots', 'rollback_install_root', 'get_steamcmd_pool', 'get_tile_player_counts', 'get_status', 'adopt_running_tiles', 'restart_all_tiles', 'rolling_restart', 'restart_for_mod_update',
+           'update_config', 'get_tracker']
 
 # Set up logging
 logging.basicConfig(
@@ -31,18 +57,59 @@ logging.basicConfig(
 )
 logger = logging.getLogger('LOManager')
 
-stop_events = []
-processes = []
+# Lifecycle state and operation lock of every tile (and its thread in legacy mode)
+tile_registry = TileRegistry()
 wait_restart_time = 0
 config = {}
 crash_total = 0
 last_server_check_time = 0  # Track when we last checked for server updates
+last_restart_report = {}  # Timing of the most recent restart, including per-tile downtime
+last_launch_report = {}  # Launch and ready times of the most recent cluster start
+last_stop_report = {}  # Seconds each tile took to stop the last time the cluster was stopped
+last_update_report = {}  # Mode, reason and per-phase SteamCMD times of the last server update
+validation_requested = False  # Set through request_validation(); the next update validates
+legacy_stop_times = {}  # Stop reports of the legacy thread-per-tile mode, by tile
 
 # Initialize tile tracker
 tile_tracker = None
 
+# Event-driven supervisor, created on first use when supervisor_mode is "event"
+supervisor = None
+# Per-tile CPU/memory/handle/IO history, started together with the supervisor
+resource_sampler = None
+# Enforces per-tile memory/CPU limits, started together with the sampler
+resource_governor = None
+# Predicts memory leaks from the samples and restarts tiles before they crash
+leak_detector = None
+# Restarts tiles that are alive but no longer answer, log or use CPU
+hang_watchdog = None
+# Detects when launched tiles are actually up (log line or A2S answer)
+readiness_probe = None
+# Loopback HTTP control API the GUI and scripts talk to
+control_api = None
+# Staggers cluster starts so only a few tiles boot at once
+launch_scheduler = None
+# CPU core sets and priorities applied to each tile's process tree
+tile_placement = None
+# Places tiles on host agents when cluster_role is "coordinator"
+cluster_coordinator = None
+# Compares the installed and remote server build IDs, created on first use
+update_checker = None
+# Live and spare server installs when install_roots is configured
+install_roots = None
+# Logged-in SteamCMD sessions shared by update checks, game updates and mod downloads
+steamcmd_pool = None
+# Held by whichever restart/update is running, so the update loop and API requests take turns
+orchestration_lock = threading.RLock()
+# Held while the staged mod set is prepared or swapped in
+mods_lock = threading.RLock()
+manager_started_at = None
+
 kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
 
+SERVER_EXECUTABLE = "MistServer-Win64-Shipping"
+PLACEMENT_REAPPLY_DELAY = 5  # seconds after launch until the server process exists under the shell
+
 
 def send_discord_message(webhook_url, message, server_id=None):
     """
@@ -85,16 +152,18 @@ def run_process(path, stop_event):
         check_for_log_updates()
         
         process = subprocess.Popen(path, stdout=subprocess.DEVNULL, text=True, universal_newlines=True,
-                                  shell=True)  #, creationflags=subprocess.CREATE_NEW_PROCESS_GROUP)
+                                  shell=True, creationflags=subprocess.CREATE_NEW_PROCESS_GROUP)
         
-        # Send message that tile is starting
+        # Announce the tile once it is actually up
         if server_id:
-            time.sleep(10)  # Give the process more time to start and fetch the correct tile name
-            tile_name = tile_tracker.get_tile_name(server_id, server_id)
-            send_discord_message(config["server_status_webhook"], f"{tile_name} is starting up")
+            tile_id = int(server_id[len(config["identifier"]):])
+            tile_registry.set_state(tile_id, "starting")
+            get_readiness_probe().expect(tile_id, server_id, config["start_query_port"] + tile_id)
 
         while process.poll() is None and not stop_event.is_set():
             time.sleep(1)  # Check every 500ms
+        if server_id:
+            readiness_probe.cancel(tile_id)
 
         logger.info("Process stopped or crashed {}".format(stop_event.is_set()))
         print("Process stopped or crashed {}".format(stop_event.is_set()))
@@ -107,17 +176,15 @@ def run_process(path, stop_event):
             logger.info(f"Stopping {path}")
             print(f"Stopping {path}")
 
-            kill_process = psutil.Process(process.pid)
-            for proc in kill_process.children(recursive=True):
-                proc.kill()
-            kill_process.kill()
-
-            #if not kernel32.GenerateConsoleCtrlEvent(ctypes.c_uint(1), process.pid):
-            #    print("Failed to send CTRL+C", ctypes.get_last_error())
-            #else:
-            #    print("CTRL+C sent successfully")
+            # CTRL+BREAK first so the tile can save, killed once tile_stop_grace runs out
+            stopped = stop_process_tree(process.pid, config.get("tile_stop_grace", 30))
+            if server_id:
+                legacy_stop_times[tile_id] = dict(stopped, time=time.time(), exit_code=process.poll())
+                tile_registry.set_state(tile_id, "stopped")
             break
         else:
+            if server_id:
+                tile_registry.set_state(tile_id, "crashed")
             send_discord_message(config["server_status_webhook"], "Tile Crashed: Restarting", server_id)
             logger.info(f"{path} has exited. It will be checked for restart conditions.")
             print(f"{path} has exited. It will be checked for restart conditions.")
@@ -126,84 +193,813 @@ def run_process(path, stop_event):
             time.sleep(1)
 
 
+def build_tile_command(index):
+    """Build the command line used to launch tile ``index``"""
+    # Host agents build the same command from their own config
+    return format_tile_command(dict(config, folder_path=server_folder_path()), index)
+
+
+def get_install_roots():
+    """Return the blue/green install roots, or None when install_roots is not configured"""
+    global install_roots
+    if install_roots is None and config.get("install_roots"):
+        install_roots = InstallRoots(config["install_roots"],
+                                     state_file=config.get("install_roots_state_file", "install_roots.json"),
+                                     binaries_path=config.get("install_binaries_path", "Mist/Binaries/Win64/"))
+    return install_roots
+
+
+def get_steamcmd_pool():
+    """Return the SteamCMD session pool, or None when steamcmd_persistent_sessions is off"""
+    global steamcmd_pool
+    if steamcmd_pool is None and config.get("steamcmd_persistent_sessions", True):
+        steamcmd_pool = SteamCMDPool(config["steam_cmd_path"],
+                                     size=config.get("steamcmd_max_sessions", steamcmd.DEFAULT_MAX_SESSIONS),
+                                     hang_timeout=config.get("steamcmd_hang_timeout", 300),
+                                     max_idle=config.get("steamcmd_session_idle", 600))
+    return steamcmd_pool
+
+
+def server_folder_path():
+    """Return the folder of the server executable in the live install"""
+    roots = get_install_roots()
+    return roots.folder_path() if roots is not None else config["folder_path"]
+
+
+def tile_server_id(tile_id):
+    """Return the -identifier value of a tile"""
+    return f"{config['identifier']}{tile_id}"
+
+
+def use_cluster():
+    """True when the tiles run on host agents placed by this manager instead of locally"""
+    return config.get("cluster_role", "standalone") == "coordinator"
+
+
+def get_cluster_coordinator():
+    """Return the cluster coordinator, starting it on first use"""
+    global cluster_coordinator
+    if cluster_coordinator is None:
+        cluster_coordinator = ClusterCoordinator(
+            all_tile_ids(), token=config.get("cluster_token"),
+            agent_timeout=config.get("cluster_agent_timeout", 20),
+            check_interval=config.get("cluster_check_interval", 2),
+            settle=config.get("cluster_settle", 10))
+        cluster_coordinator.start(config.get("cluster_host", "127.0.0.1"), config.get("cluster_port", 8766))
+    return cluster_coordinator
+
+
+def get_cluster_status():
+    """Return the agents, tile assignments and placement events, or None outside cluster mode"""
+    return cluster_coordinator.status() if cluster_coordinator is not None else None
+
+
+def use_event_supervisor():
+    """True when tiles are supervised by the single event loop instead of one thread each"""
+    return config.get("supervisor_mode", "event") == "event"
+
+
+def get_supervisor():
+    """Return the shared TileSupervisor, starting it on first use"""
+    global supervisor
+    if supervisor is None:
+        policy = RestartPolicy(base_delay=config.get("crash_restart_delay", 1),
+                               max_delay=config.get("crash_backoff_max", 300),
+                               window=config.get("crash_window", 600),
+                               fast_failure=config.get("crash_fast_failure", 60),
+                               quarantine_after=config.get("crash_quarantine_after", 5),
+                               history_file=config.get("crash_history_file", "crash_history.json"))
+        supervisor = TileSupervisor(on_launch=on_tile_launch, on_exit=on_tile_exit,
+                                    on_quarantine=on_tile_quarantine,
+                                    restart_delay=config.get("crash_restart_delay", 1),
+                                    restart_policy=policy,
+                                    stop_grace=config.get("tile_stop_grace", 30))
+        supervisor.start()
+        start_resource_sampler()
+        start_resource_governor()
+        start_leak_detector()
+        start_hang_watchdog()
+    return supervisor
+
+
+def start_resource_sampler():
+    """Start sampling each tile's process tree, unless resource_sample_interval is 0"""
+    global resource_sampler
+    interval = config.get("resource_sample_interval", 1)
+    if resource_sampler is not None or not interval or supervisor is None:
+        return resource_sampler
+    resource_sampler = ResourceSampler(supervisor.pids, interval=interval,
+                                       capacity=config.get("resource_sample_capacity", 3600))
+    resource_sampler.start()
+    return resource_sampler
+
+
+def start_resource_governor():
+    """Start enforcing tile_memory_limit/tile_cpu_limit, unless neither is configured"""
+    global resource_governor
+    memory_limit = parse_size(config.get("tile_memory_limit"))
+    cpu_limit = config.get("tile_cpu_limit") or None
+    if resource_governor is not None or supervisor is None or not (memory_limit or cpu_limit):
+        return resource_governor
+    resource_governor = ResourceGovernor(resource_sampler, supervisor.pids,
+                                         memory_limit=memory_limit, cpu_limit=cpu_limit,
+                                         memory_action=config.get("tile_memory_action", "restart"),
+                                         cpu_action=config.get("tile_cpu_action", "throttle"),
+                                         on_restart=on_tile_over_limit, on_event=on_limit_event,
+                                         interval=config.get("tile_limit_check_interval", 5),
+                                         cpu_window=config.get("tile_cpu_limit_window", 60),
+                                         use_cgroups=config.get("tile_limit_cgroups", True))
+    resource_governor.start()
+    return resource_governor
+
+
+def on_limit_event(event):
+    """Governor callback: a tile crossed its memory or CPU limit"""
+    if event["action"] in ("restart", "released"):
+        return  # restart_over_limit_tile and the log report these
+    value = event["value"]
+    if event["kind"] == "memory":
+        detail = f"{value / 1024 ** 3:.1f} GB" if value is not None else event["action"]
+        limit = f"{event['limit'] / 1024 ** 3:.1f} GB" if event["limit"] else "none"
+    else:
+        detail = f"{value:.0f}% CPU" if value is not None else event["action"]
+        limit = f"{event['limit']:.0f}%"
+    send_discord_message(config["server_status_webhook"],
+                         f"Tile over its {event['kind']} limit ({detail}, limit {limit}): {event['action']}",
+                         tile_server_id(event["tile_id"]))
+
+
+def on_tile_over_limit(tile_id, event):
+    """Governor callback: restart a tile that went over its memory limit, off the governor thread"""
+    threading.Thread(target=restart_over_limit_tile, args=(tile_id, event),
+                     name=f'limit-restart-{tile_id}', daemon=True).start()
+
+
+def restart_over_limit_tile(tile_id, event):
+    """Warn the tile's players, then restart just that tile"""
+    used = event["value"] / 1024 ** 3
+    try:
+        controlled_restart_tile(tile_id, f"Tile is using {used:.1f} GB of memory "
+                                         f"(limit {event['limit'] / 1024 ** 3:.1f} GB)",
+                                config.get("tile_limit_restart_countdown", 60))
+    finally:
+        resource_governor.restart_done(tile_id)
+
+
+def controlled_restart_tile(tile_id, reason, countdown):
+    """Announce why a single tile restarts, give its players ``countdown`` seconds, then restart it"""
+    send_discord_message(config["server_status_webhook"], f"{reason}: restarting in {countdown}s",
+                         tile_server_id(tile_id))
+    restart_tile(tile_id, countdown)
+
+
+def start_leak_detector():
+    """
+    Start predicting memory leaks against tile_leak_threshold (or
+    tile_memory_limit), unless neither is set or sampling is off
+    """
+    global leak_detector
+    threshold = parse_size(config.get("tile_leak_threshold")) or parse_size(config.get("tile_memory_limit"))
+    if leak_detector is not None or resource_sampler is None or not threshold:
+        return leak_detector
+    leak_detector = LeakDetector(resource_sampler, supervisor.pids, threshold, on_tile_leaking,
+                                 get_players=lambda tile_id: get_tile_player_counts([tile_id])[tile_id],
+                                 interval=config.get("leak_check_interval", 60),
+                                 min_history=config.get("leak_min_history", 1800),
+                                 horizon=config.get("leak_horizon", 4 * 3600),
+                                 urgent=config.get("leak_urgent", 1800),
+                                 off_peak_players=config.get("leak_off_peak_players", 0),
+                                 min_r2=config.get("leak_min_r2", 0.8),
+                                 min_growth=parse_size(config.get("leak_min_growth_per_hour", "50M")),
+                                 log_file=config.get("leak_log_file", "leak_predictions.jsonl"),
+                                 log_all=config.get("leak_log_all", False))
+    leak_detector.start()
+    return leak_detector
+
+
+def on_tile_leaking(tile_id, prediction):
+    """Leak detector callback: restart a tile before its memory reaches the threshold, off the detector thread"""
+    threading.Thread(target=restart_leaking_tile, args=(tile_id, prediction),
+                     name=f'leak-restart-{tile_id}', daemon=True).start()
+
+
+def restart_leaking_tile(tile_id, prediction):
+    """Restart a leaking tile; players get the usual countdown unless it is empty"""
+    minutes = prediction["eta"] / 60
+    countdown = 0 if prediction["players"] == 0 else config.get("tile_limit_restart_countdown", 60)
+    try:
+        controlled_restart_tile(tile_id, f"Tile memory is growing {prediction['growth_per_hour'] / 1024 ** 2:.0f} MB/h "
+                                         f"and will run out in about {minutes:.0f} minutes", countdown)
+    finally:
+        leak_detector.restart_done(tile_id)
+
+
+def get_leak_predictions(seconds=None):
+    """
+    Return the newest memory trend prediction of every tile and the history
+    of predictions that led to an action, optionally only the last ``seconds``
+    """
+    if leak_detector is None:
+        return {"latest": {}, "actions": []}
+    return {
+        "latest": leak_detector.latest(),
+        "actions": [prediction for prediction in leak_detector.recent_predictions(seconds)
+                    if prediction["action"] != "none"],
+    }
+
+
+def get_limit_events(seconds=None):
+    """Return the governor's limit breach events, oldest first, optionally only the last ``seconds``"""
+    if resource_governor is None:
+        return []
+    return resource_governor.recent_events(seconds)
+
+
+def start_hang_watchdog():
+    """Start watching ready tiles for hangs, unless hang_window is 0"""
+    global hang_watchdog
+    window = config.get("hang_window", 180)
+    if hang_watchdog is not None or supervisor is None or not window:
+        return hang_watchdog
+    tile_ids = range(config["tile_num"])
+    hang_watchdog = HangWatchdog(supervisor.pids, is_tile_ready, on_tile_hung,
+                                 server_ids={i: tile_server_id(i) for i in tile_ids},
+                                 query_ports={i: config["start_query_port"] + i for i in tile_ids},
+                                 log_folder=tile_tracker.log_folder if tile_tracker else server_log_folder(),
+                                 sampler=resource_sampler,
+                                 query_host=config.get("readiness_query_host", "127.0.0.1"),
+                                 interval=config.get("hang_check_interval", 10), window=window,
+                                 min_signals=config.get("hang_min_signals", 2),
+                                 cpu_idle=config.get("hang_cpu_idle", 1.0))
+    hang_watchdog.start()
+    return hang_watchdog
+
+
+def is_tile_ready(tile_id):
+    """True once the tile's latest launch has reported ready"""
+    return readiness_probe is not None and readiness_probe.wait(tile_id, 0) is not None
+
+
+def on_tile_hung(tile_id, event):
+    """Watchdog callback: the tile is alive but silent, restart it like a crash"""
+    silent = ", ".join(f"{signal} {seconds:.0f}s" for signal, seconds in event["silent"].items())
+    send_discord_message(config["server_status_webhook"], f"Tile Hung: no sign of life ({silent}), restarting",
+                         tile_server_id(tile_id))
+    supervisor.kill_tile(tile_id)
+
+
+def get_hang_stats():
+    """Return hang detections, false positives, recoveries and detection times"""
+    if hang_watchdog is None:
+        return {}
+    return hang_watchdog.stats()
+
+
+def get_tile_resources(tile_id, seconds=None):
+    """
+    Return recent resource samples for a tile, oldest first. Each sample has
+    time, cpu_percent, rss, threads, handles, read_bytes and write_bytes.
+    """
+    if resource_sampler is None:
+        return []
+    return resource_sampler.window(tile_id, seconds)
+
+
+def server_log_folder():
+    """Return the folder the tiles write their logs to"""
+    roots = get_install_roots()
+    if roots is not None:
+        return os.path.join(roots.active, "Mist", "Saved", "Logs")
+    return os.path.join(config["folder_path"].replace("Binaries\\Win64\\", ""), "Saved\\Logs")
+
+
+def get_readiness_probe():
+    """Return the shared ReadinessProbe, starting it on first use"""
+    global readiness_probe
+    if readiness_probe is None:
+        readiness_probe = ReadinessProbe(tile_tracker.log_folder if tile_tracker else server_log_folder(),
+                                         query_host=config.get("readiness_query_host", "127.0.0.1"),
+                                         on_ready=on_tile_ready,
+                                         history_file=config.get("boot_history_file", "boot_history.json"))
+        readiness_probe.start()
+    return readiness_probe
+
+
+def on_tile_launch(tile_id, pid, launched_at):
+    """Supervisor callback: a tile process has just been started"""
+    if supervisor.pid(tile_id) == pid:
+        tile_registry.set_state(tile_id, "starting")
+    check_for_log_updates()
+    get_readiness_probe().expect(tile_id, tile_server_id(tile_id), config["start_query_port"] + tile_id,
+                                 launched_at)
+    supervisor.call_later(config.get("readiness_timeout", 600), warn_tile_not_ready, tile_id)
+
+    if resource_governor is not None:
+        resource_governor.attach(tile_id, pid)
+        # Processes the shell starts later do not inherit the cgroup until they are moved
+        supervisor.call_later(PLACEMENT_REAPPLY_DELAY, govern_tile, tile_id, pid)
+
+    if get_tile_placement() is not None:
+        place_tile(tile_id, booting=True)
+        # The shell wrapper starts the server a moment later; place the whole tree again
+        supervisor.call_later(PLACEMENT_REAPPLY_DELAY, place_tile, tile_id, True, pid)
+        if tile_placement.boot_priority:
+            supervisor.call_later(config.get("tile_boot_boost_seconds", 300), place_tile, tile_id, False, pid)
+
+
+def get_tile_placement():
+    """Return the shared TilePlacement, or None when no placement is configured"""
+    global tile_placement
+    policy = config.get("placement_policy", "none")
+    priority = config.get("tile_priority", "normal")
+    boot_priority = config.get("tile_boot_priority")
+    if tile_placement is None and (policy != "none" or priority != "normal" or boot_priority):
+        core_sets = plan_core_sets(config["tile_num"], policy,
+                                   cores_per_tile=config.get("placement_cores_per_tile", 1),
+                                   core_map=config.get("placement_core_map"),
+                                   reserved_cpus=config.get("placement_reserved_cpus"))
+        tile_placement = TilePlacement(core_sets, priority=priority, boot_priority=boot_priority)
+    return tile_placement
+
+
+def place_tile(tile_id, booting=False, pid=None):
+    """
+    Apply the tile's core set and priority to its current process tree.
+    With ``pid``, only if the tile is still running that same process.
+    """
+    if tile_placement is None or supervisor is None:
+        return
+    current = supervisor.pid(tile_id)
+    if current is None or (pid is not None and current != pid):
+        return
+    tile_placement.apply(tile_id, current, booting)
+
+
+def govern_tile(tile_id, pid=None):
+    """Put the tile's current process tree under its cgroup limits, if it still runs ``pid``"""
+    if resource_governor is None or supervisor is None:
+        return
+    current = supervisor.pid(tile_id)
+    if current is None or (pid is not None and current != pid):
+        return
+    resource_governor.attach(tile_id, current)
+
+
+def on_tile_ready(tile_id, seconds, signal, tile_name):
+    """Readiness callback: a tile logged its tile name or answered a query"""
+    tile_registry.set_state(tile_id, "ready", only_from=("starting",))
+    if tile_placement is not None and tile_placement.boot_priority:
+        place_tile(tile_id, booting=False)
+    server_id = tile_server_id(tile_id)
+    if tile_name and tile_tracker:
+        tile_tracker.update_tile_name(server_id, tile_name)
+    if tile_name is None:
+        tile_name = tile_tracker.get_tile_name(server_id, server_id) if tile_tracker else server_id
+    send_discord_message(config["server_status_webhook"], f"{tile_name} is up ({seconds:.0f}s to ready)")
+
+
+def warn_tile_not_ready(tile_id):
+    """Report a tile that is running but has not become ready within readiness_timeout"""
+    timeout = config.get("readiness_timeout", 600)
+    uptime = supervisor.uptime(tile_id)
+    if uptime is None or uptime < timeout or not readiness_probe.is_pending(tile_id):
+        return
+    send_discord_message(config["server_status_webhook"],
+                         f"Tile is running but not ready after {uptime:.0f}s", tile_server_id(tile_id))
+
+
+def get_boot_stats():
+    """Return time-to-ready statistics per tile (last, mean, best and worst boot in seconds)"""
+    if readiness_probe is None:
+        return {}
+    stats = readiness_probe.boot_stats()
+    for tile_id, tile_stats in stats.items():
+        tile_stats["history"] = readiness_probe.boot_history(tile_id)
+    return stats
+
+
+def on_tile_exit(tile_id, returncode, uptime, stopped):
+    """Supervisor callback: a tile process has exited, either stopped or crashed"""
+    global crash_total
+    server_id = tile_server_id(tile_id)
+    print("Process stopped or crashed {}".format(stopped))
+
+    # Update tile tracker in case logs have new information
+    check_for_log_updates()
+    if readiness_probe is not None:
+        readiness_probe.cancel(tile_id)
+
+    if stopped:
+        send_discord_message(config["server_status_webhook"], "Tile is being restarted for mod update", server_id)
+        return
+
+    crash_total += 1
+    if not supervisor.is_running(tile_id):
+        tile_registry.set_state(tile_id, "crashed")
+    if supervisor.restart_policy is not None and supervisor.restart_policy.is_quarantined(tile_id):
+        return  # on_tile_quarantine reports it
+    # The delay the supervisor scheduled; None when it does not restart the tile (e.g. during shutdown)
+    delay = supervisor.scheduled_restart_delay(tile_id)
+    action = f"Restarting in {delay:.0f}s" if delay is not None else "Not restarting"
+    send_discord_message(config["server_status_webhook"], f"Tile Crashed: {action}", server_id)
+    logger.info(f"Tile {tile_id} exited with code {returncode} after {uptime:.0f}s. {action}.")
+
+
+def on_tile_quarantine(tile_id, history):
+    """Supervisor callback: a tile kept crashing at boot and will not be restarted automatically"""
+    server_id = tile_server_id(tile_id)
+    exit_codes = ", ".join(str(crash["exit_code"]) for crash in history[-5:])
+    send_discord_message(config["server_status_webhook"],
+                         f"Tile Crash Loop: not restarting after {len(history)} crashes "
+                         f"(last exit codes: {exit_codes}). Start it manually once fixed.", server_id)
+    logger.error(f"Tile {tile_id} quarantined after repeated crashes, last exit codes: {exit_codes}")
+
+
+def get_crash_stats():
+    """
+    Return crash statistics per tile: total crashes, crashes in the last hour,
+    consecutive boot failures, quarantine state and the next restart delay.
+    """
+    if supervisor is None or supervisor.restart_policy is None:
+        return {}
+    stats = supervisor.restart_policy.stats()
+    for tile_id, tile_stats in stats.items():
+        tile_stats["history"] = supervisor.restart_policy.history(tile_id)
+    return stats
+
+
+def release_tile_quarantine(tile_id):
+    """Lift a crash-loop quarantine and start the tile again"""
+    if supervisor is None:
+        return
+    supervisor.restart_policy.release(tile_id)
+    if not supervisor.is_running(tile_id):
+        supervisor.launch(tile_id, build_tile_command(tile_id))
+
+
+def discover_running_tiles():
+    """
+    Find tile server processes that are already running, e.g. left behind by
+    a previous manager instance, and map them to tiles by their -identifier=
+    argument. Returns {tile_id: pid}; when a tile has several processes the
+    oldest one wins.
+    """
+    identifiers = {tile_server_id(i): i for i in range(config["tile_num"])}
+    found = {}
+    for proc in psutil.process_iter(['name', 'cmdline', 'create_time']):
+        try:
+            if not (proc.info['name'] or "").startswith(SERVER_EXECUTABLE):
+                continue
+            server_id = extract_server_id(" ".join(proc.info['cmdline'] or []))
+        except psutil.Error:
+            continue
+        tile_id = identifiers.get(server_id)
+        if tile_id is None:
+            continue
+        if tile_id in found:
+            logger.warning(f"Tile {tile_id} has more than one running process ({found[tile_id][0]}, {proc.pid})")
+            if found[tile_id][1] <= proc.info['create_time']:
+                continue
+        found[tile_id] = (proc.pid, proc.info['create_time'])
+    return {tile_id: pid for tile_id, (pid, _) in found.items()}
+
+
+def adopt_running_tiles():
+    """
+    Attach supervision to tiles that are already running, so restarting the
+    manager does not restart them. Returns the adopted tile IDs.
+    """
+    if not use_event_supervisor() or not config.get("adopt_running_tiles", True):
+        return []
+    sup = get_supervisor()
+    adopted = []
+    for tile_id, pid in sorted(discover_running_tiles().items()):
+        if sup.is_running(tile_id):
+            continue
+        try:
+            sup.adopt(tile_id, pid, build_tile_command(tile_id)).result()
+            adopted.append(tile_id)
+            if get_tile_placement() is not None:
+                place_tile(tile_id)
+            govern_tile(tile_id)
+        except Exception as e:
+            logger.error(f"Could not adopt tile {tile_id} (pid {pid}): {e}")
+    if adopted:
+        logger.info(f"Adopted running tiles {adopted}")
+        print(f"Adopted running tiles {adopted}")
+    return adopted
+
+
+def all_tile_ids():
+    """Return the ids of every configured tile"""
+    return list(range(config["tile_num"]))
+
+
 def start_processes():
     """Start all server processes"""
-    global processes, stop_events
-    processes = []
-    stop_events = []
-    
-    for i in range(config["tile_num"]):
-        exe_string = ('"{folder_path}MistServer-Win64-Shipping.exe" -log -noeac -messaging -NoLiveServer -noupnp'
-                      ' -EnableCheats -backendapiurloverride="{backend}" -CustomerKey={customer_key}'
-                      ' -ProviderKey={provider_key}'
-                      ' -slots={slots} -OverrideConnectionAddress={connection_ip} -identifier={identifier}{index}'
-                      ' -port={start_port} -QueryPort={start_query_port}').format(
-            folder_path=config["folder_path"],
-            backend=config["backend"],
-            customer_key=config["customer_key"],
-            provider_key=config["provider_key"],
-            connection_ip=config["connection_ip"],
-            slots=config["slots"],
-            identifier=config["identifier"],
-            index=i,
-            start_port=config["start_port"] + i,
-            start_query_port=config["start_query_port"] + i)
-
-        stop_event = threading.Event()
-        stop_events.append(stop_event)
-        process = threading.Thread(target=run_process, args=(exe_string, stop_event))
-        process.start()
-        processes.append(process)
+    with tile_registry.exclusive(all_tile_ids(), "start all"):
+        if use_cluster():
+            get_cluster_coordinator().start_all()
+            return
+        if use_event_supervisor():
+            sup = get_supervisor()
+            launch_tiles([i for i in all_tile_ids() if not sup.is_running(i)])
+            return
+
+        for i in all_tile_ids():
+            if not is_tile_running(i):
+                start_tile_thread(i)
+
+
+def start_tile_thread(tile_id):
+    """Legacy mode: run a tile in its own polling thread"""
+    entry = tile_registry.entry(tile_id)
+    entry.stop_event = threading.Event()
+    entry.thread = threading.Thread(target=run_process, args=(build_tile_command(tile_id), entry.stop_event))
+    entry.thread.start()
+
+
+def get_launch_scheduler():
+    """Return the shared LaunchScheduler, created on first use"""
+    global launch_scheduler
+    if launch_scheduler is None:
+        launch_scheduler = LaunchScheduler(
+            lambda tile_id: supervisor.launch(tile_id, build_tile_command(tile_id)).result(),
+            wait_for_tile_up,
+            max_concurrent=config.get("launch_max_concurrent", 0),
+            first=config.get("launch_first_tiles"),
+            gate=config.get("launch_gate", "ready"),
+            load_threshold=config.get("launch_load_threshold", 85),
+            boot_timeout=config.get("readiness_timeout", 600),
+            history_file=config.get("launch_history_file", "launch_history.json"))
+    return launch_scheduler
+
+
+def launch_tiles(tile_ids):
+    """
+    Launch tiles through the launch scheduler: at most launch_max_concurrent
+    boot at once and launch_first_tiles are up before the rest start.
+    Returns once the last tile has been launched.
+    """
+    global last_launch_report
+    if not tile_ids:
+        return None
+    get_supervisor()
+    last_launch_report = get_launch_scheduler().run(tile_ids)
+    return last_launch_report
+
+
+def record_cold_start(up_at):
+    """Record how long the last cluster start took until every tile was ready"""
+    if not last_launch_report or launch_scheduler is None or not up_at:
+        return
+    last_launch_report["cold_start"] = max(up_at.values()) - last_launch_report["started"]
+    launch_scheduler.record(last_launch_report)
+
+
+def get_launch_stats():
+    """Return the last cluster start and cold start times per launch strategy"""
+    return {
+        "last": last_launch_report,
+        "strategies": launch_scheduler.stats() if launch_scheduler is not None else {},
+    }
 
 
 def start_single_process(tile_id):
-    """Start a single server process"""
-    global processes, stop_events
-    
-    # Ensure arrays are large enough
-    while len(processes) <= tile_id:
-        processes.append(None)
-    while len(stop_events) <= tile_id:
-        stop_events.append(None)
-    
-    # If there's already a process at this index, stop it
-    if processes[tile_id] is not None:
-        if stop_events[tile_id] is not None:
-            stop_events[tile_id].set()
-        processes[tile_id].join()
-    
-    exe_string = ('"{folder_path}MistServer-Win64-Shipping.exe" -log -noeac -messaging -NoLiveServer -noupnp'
-                  ' -EnableCheats -backendapiurloverride="{backend}" -CustomerKey={customer_key}'
-                  ' -ProviderKey={provider_key}'
-                  ' -slots={slots} -OverrideConnectionAddress={connection_ip} -identifier={identifier}{index}'
-                  ' -port={start_port} -QueryPort={start_query_port}').format(
-        folder_path=config["folder_path"],
-        backend=config["backend"],
-        customer_key=config["customer_key"],
-        provider_key=config["provider_key"],
-        connection_ip=config["connection_ip"],
-        slots=config["slots"],
-        identifier=config["identifier"],
-        index=tile_id,
-        start_port=config["start_port"] + tile_id,
-        start_query_port=config["start_query_port"] + tile_id)
-
-    stop_event = threading.Event()
-    stop_events[tile_id] = stop_event
-    process = threading.Thread(target=run_process, args=(exe_string, stop_event))
-    process.start()
-    processes[tile_id] = process
+    """Start a single server process, restarting it if it is already running"""
+    with tile_registry.operation(tile_id, "start"):
+        if use_cluster():
+            get_cluster_coordinator().restart_tile(tile_id)
+            return
+        if is_tile_running(tile_id):
+            stop_single_process(tile_id)
+
+        if use_event_supervisor():
+            get_supervisor().launch(tile_id, build_tile_command(tile_id)).result()
+            tile_registry.set_state(tile_id, "starting")
+            return
+        start_tile_thread(tile_id)
+
+
+def stop_single_process(tile_id):
+    """Stop a single server process and wait for it to exit"""
+    with tile_registry.operation(tile_id, "stop"):
+        if is_tile_running(tile_id):
+            tile_registry.set_state(tile_id, "stopping")
+
+        if cluster_coordinator is not None:
+            cluster_coordinator.stop_tile(tile_id)
+        if supervisor is not None:
+            supervisor.stop_tile(tile_id)
+            stopped = supervisor.stop_report([tile_id]).get(tile_id)
+            if stopped:
+                logger.info(f"Tile {tile_id} stopped in {stopped['seconds']:.1f}s"
+                            f"{' (killed)' if stopped['forced'] else ''}")
+
+        entry = tile_registry.entry(tile_id)
+        if entry.stop_event is not None:
+            entry.stop_event.set()
+        if entry.thread is not None:
+            entry.thread.join()
+        entry.stop_event = None
+        entry.thread = None
+        tile_registry.set_state(tile_id, "stopped")
+
+
+def start_tile(tile_id):
+    """Start a tile that is not running; a running tile is left alone"""
+    with tile_registry.operation(tile_id, "start"):
+        if not is_tile_running(tile_id):
+            start_single_process(tile_id)
+    return tile_registry.describe(tile_id)
+
+
+def stop_tile(tile_id, countdown=0):
+    """Warn the tile's players for ``countdown`` seconds, then stop just that tile"""
+    if countdown and is_tile_running(tile_id):
+        tile_registry.set_state(tile_id, "draining")
+        player_countdown([tile_id], countdown, "Server stopping in {} seconds.")
+    stop_single_process(tile_id)
+    return tile_registry.describe(tile_id)
+
+
+def restart_tile(tile_id, countdown=0):
+    """
+    Restart a single tile, after warning its players for ``countdown``
+    seconds. Other tiles are not touched and can be restarted at the same
+    time. A tile that is not running (stopped, crashed, or stopped during
+    the countdown) is started.
+    """
+    if countdown and is_tile_running(tile_id):
+        tile_registry.set_state(tile_id, "draining")
+        player_countdown([tile_id], countdown, "Restarting in {} seconds.")
+    with tile_registry.operation(tile_id, "restart"):
+        if not is_tile_running(tile_id):
+            logger.info(f"Tile {tile_id} is not running, starting it")
+        start_single_process(tile_id)
+    return tile_registry.describe(tile_id)
 
 
-def stop_processes():
-    """ Stop all processes gracefully """
-    for event in stop_events:
-        if event is not None:
-            event.set()
+def other_running_tiles(tile_id):
+    return [other for other in all_tile_ids() if other != tile_id and is_tile_running(other)]
+
+
+def redeploy_tile_mods(tile_id, countdown=0):
+    """
+    Bring a single tile onto the current mod set: download and stage
+    updated mods while it keeps running, then restart it with the staged
+    mods swapped in.
+
+    Every tile loads from the same Mods folder, which can only be swapped
+    while none of them has it open, so changed mods are refused with a
+    RuntimeError while other tiles run (use a full restart instead). A swap
+    that fails also raises, after the tile was restarted on the old mods.
+    """
+    out_of_date, updated_mods_info, staged = prepare_mod_update()
+    swap = staged and bool(out_of_date)
+    if swap and other_running_tiles(tile_id):
+        raise RuntimeError(f"Mods {out_of_date} changed, but tiles {other_running_tiles(tile_id)} still load from "
+                           f"the shared Mods folder; apply them with a full restart")
+    if not swap and updated_mods_info is not None:
+        save_mods_info(updated_mods_info)
+    if countdown and is_tile_running(tile_id):
+        tile_registry.set_state(tile_id, "draining")
+        player_countdown([tile_id], countdown, "Restarting for a mod update in {} seconds.")
+    # A swap keeps every other tile from starting until it is done
+    lock = (tile_registry.exclusive(all_tile_ids(), "redeploy mods") if swap
+            else tile_registry.operation(tile_id, "redeploy mods"))
+    activated = False
+    with lock:
+        was_running = is_tile_running(tile_id)
+        stop_single_process(tile_id)
+        if swap:
+            others = other_running_tiles(tile_id)
+            if others:
+                logger.warning(f"Tiles {others} started during the countdown, not swapping the Mods folder")
+            else:
+                activated = activate_staged_mods(updated_mods_info)
+        if was_running:
+            start_single_process(tile_id)
+    if swap and not activated:
+        raise RuntimeError(f"Mods {out_of_date} could not be activated; tile {tile_id} runs the previous mods")
+    logger.info(f"Tile {tile_id} redeployed with mods {out_of_date if swap else 'unchanged'}")
+    return tile_registry.describe(tile_id)
+
+
+def is_tile_running(tile_id):
+    """Return True if the tile currently has a supervised process"""
+    if cluster_coordinator is not None and cluster_coordinator.is_running(tile_id):
+        return True
+    if supervisor is not None and supervisor.is_running(tile_id):
+        return True
+    thread = tile_registry.entry(tile_id).thread
+    return thread is not None and thread.is_alive()
 
-    for process in processes:
-        if process is not None:
-            process.join()
+
+def stop_processes():
+    """
+    Stop all processes gracefully: every tile is asked to shut down at the
+    same time and killed only if it is still running after tile_stop_grace
+    seconds. Returns the stop report with the seconds each tile took.
+    """
+    global last_stop_report
+    started = time.time()
+    tile_ids = set(all_tile_ids()) | {entry.tile_id for entry in tile_registry.entries()}
+    with tile_registry.exclusive(tile_ids, "stop all"):
+        running = [tile_id for tile_id in sorted(tile_ids) if is_tile_running(tile_id)]
+        for tile_id in running:
+            tile_registry.set_state(tile_id, "stopping")
+        legacy_stop_times.clear()
+
+        if cluster_coordinator is not None:
+            cluster_coordinator.stop_all()
+        if supervisor is not None:
+            supervisor.stop_all()
+
+        entries = [tile_registry.entry(tile_id) for tile_id in running]
+        for entry in entries:
+            if entry.stop_event is not None:
+                entry.stop_event.set()
+        for entry in entries:
+            if entry.thread is not None:
+                entry.thread.join()
+            entry.stop_event = None
+            entry.thread = None
+        for tile_id in running:
+            tile_registry.set_state(tile_id, "stopped")
+
+    tiles = dict(legacy_stop_times)
+    if supervisor is not None:
+        tiles.update(supervisor.stop_report(running))
+    if not tiles:
+        return last_stop_report
+    last_stop_report = {
+        "started": started,
+        "duration": time.time() - started,
+        "tiles": tiles,
+        "forced": sorted(tile_id for tile_id, tile in tiles.items() if tile["forced"]),
+    }
+    report_stop(last_stop_report)
+    return last_stop_report
+
+
+def report_stop(report):
+    """Log how long each tile took to stop and which ones had to be killed"""
+    summary = ", ".join(f"{tile_server_id(tile_id)} {tile['seconds']:.1f}s"
+                        for tile_id, tile in sorted(report["tiles"].items()))
+    logger.info(f"Stopped {len(report['tiles'])} tiles in {report['duration']:.1f}s: {summary}")
+    print(f"Stopped {len(report['tiles'])} tiles in {report['duration']:.1f}s: {summary}")
+    if report["forced"]:
+        logger.warning(f"Tiles {report['forced']} did not exit within tile_stop_grace and were killed")
+
+
+def get_status():
+    """
+    Return the manager status served to clients: uptime, crash total, the
+    last restart report, the live install root, the SteamCMD sessions and, per tile, whether it is running, its pid,
+    uptime, tile name, quarantine state and latest resource sample.
+    """
+    crash_stats = get_crash_stats()
+    tiles = {}
+    for tile_id in range(config.get("tile_num", 0)):
+        server_id = tile_server_id(tile_id)
+        tiles[tile_id] = {
+            "server_id": server_id,
+            "name": tile_tracker.get_tile_name(server_id, server_id) if tile_tracker else server_id,
+            "running": is_tile_running(tile_id),
+            "pid": supervisor.pid(tile_id) if supervisor else None,
+            "uptime": supervisor.uptime(tile_id) if supervisor else None,
+            "ready": is_tile_ready(tile_id),
+            "lifecycle": tile_registry.describe(tile_id),
+            "quarantined": crash_stats.get(tile_id, {}).get("quarantined", False),
+            "resources": resource_sampler.latest(tile_id) if resource_sampler else None,
+            "placement": tile_placement.describe(tile_id) if tile_placement else None,
+            "throttled": resource_governor.is_throttled(tile_id) if resource_governor else False,
+        }
+    return {
+        "started_at": manager_started_at,
+        "crash_total": crash_total,
+        "last_restart_report": last_restart_report,
+        "last_launch_report": last_launch_report,
+        "last_stop_report": last_stop_report,
+        "last_update_report": last_update_report,
+        "cluster": get_cluster_status(),
+        "install_roots": get_install_roots().describe() if get_install_roots() is not None else None,
+        "steamcmd_sessions": steamcmd_pool.describe() if steamcmd_pool is not None else None,
+        "tiles": tiles,
+    }
+
+
+def start_control_api():
+    """Start the control API unless control_api_port is 0"""
+    global control_api
+    port = config.get("control_api_port", 8765)
+    if control_api is not None or not port:
+        return control_api
+    control_api = ControlAPIServer(sys.modules[__name__], host=config.get("control_api_host", "127.0.0.1"),
+                                   port=port, token=config.get("control_api_token"), lock=orchestration_lock)
+    control_api.start()
+    return control_api
 
 
 def update_config():
@@ -219,7 +1015,9 @@ def check_mod_updates():
 
         print("Added new mod ids")
 
-        out_of_date, updated_mods_info = update_mods_info(mods_info, config["mods"].split(","))
+        # The workshop manifest and one Web API request replace scraping each mod's page
+        steam_cmd_path = None if config.get("mod_check_mode") == "scrape" else config["steam_cmd_path"]
+        out_of_date, updated_mods_info = update_mods_info(mods_info, config["mods"].split(","), steam_cmd_path)
 
         print("Out-of-date mods:", out_of_date)
         return out_of_date, updated_mods_info
@@ -228,147 +1026,620 @@ def check_mod_updates():
         return [], None
 
 
-def download_mods(workshop_ids, updated_mods_info):
+def mods_folder_path():
+    """Return the game's Mods folder"""
+    return server_folder_path() + "Mist/Content/Mods"
+
+
+def download_workshop_items(workshop_ids):
+    """
+    Download workshop items into the SteamCMD cache. Safe while tiles are running.
+    Items are batched into as few SteamCMD sessions as possible.
+    Returns a {workshop_id: result} dictionary.
+    """
+    if not workshop_ids:
+        return {}
+    results = steamcmd.download_workshop_items(
+        config["steam_cmd_path"], workshop_ids,
+        batch_size=config.get("steamcmd_batch_size", steamcmd.DEFAULT_BATCH_SIZE),
+        max_sessions=config.get("steamcmd_max_sessions", steamcmd.DEFAULT_MAX_SESSIONS),
+        timeout=config.get("steamcmd_timeout"), pool=get_steamcmd_pool(),
+        hang_timeout=config.get("steamcmd_download_hang_timeout"))
+    for workshop_id, result in results.items():
+        if result["success"]:
+            print(f"Downloaded mod {workshop_id} ({result['bytes']} bytes)")
+        else:
+            print(f"Failed to download mod {workshop_id}: {result['error']}")
+    return results
+
+
+def keep_failed_mods_out_of_date(results, updated_mods_info):
+    """
+    Restore the recorded version of mods that failed to download so the next
+    check retries them; mods that had no record lose the one the check added
+    """
+    failed = [workshop_id for workshop_id, result in results.items() if not result["success"]]
+    if not failed or updated_mods_info is None:
+        return
+    previous_info = read_json('mods_info.json')
+    for workshop_id in failed:
+        if workshop_id in previous_info:
+            updated_mods_info[workshop_id] = previous_info[workshop_id]
+        else:
+            updated_mods_info.pop(workshop_id, None)
+
+
+def save_mods_info(updated_mods_info):
+    """Record the deployed mod versions in mods_info.json"""
     try:
-        mods_folder = config["folder_path"] + "Mist/Content/Mods"
-        if not os.path.exists(mods_folder):
-            # Create the folder if it does not exist
-            os.makedirs(mods_folder)
+        with open('mods_info.json', 'w') as file:
+            json.dump(updated_mods_info, file, indent=4)
+    except IOError as e:
+        print(f"Failed to write updated mods_info.json: {e}")
 
-        for item in os.listdir(mods_folder):
-            item_path = os.path.join(mods_folder, item)
-            try:
-                if os.path.isfile(item_path) or os.path.islink(item_path):
-                    os.unlink(item_path)  # Removes files and symbolic links
-                elif os.path.isdir(item_path):
-                    shutil.rmtree(item_path)  # Removes directories
-            except Exception as e:
-                print(f"Failed to delete {item_path}. Reason: {e}")
-
-        for workshop_id in workshop_ids:
-            cmd = f'"{config["steam_cmd_path"]}steamcmd.exe" +login anonymous +workshop_download_item 903950 {workshop_id} +quit'
-            process = subprocess.run(cmd, shell=True, text=True, capture_output=True)
-            output = process.stdout
-            print(output)
-            #if "Success" in output:  # Check the appropriate keyword based on your steamcmd output
-            #    updated = True
-
-        # Copy active mods over
-        for workshop_id in config["mods"].split(","):
-            src_item = os.path.join(config["steam_cmd_path"] + "steamapps/workshop/content/903950/", workshop_id)
-            dest_item = os.path.join(mods_folder, workshop_id)
-            try:
-                if os.path.isdir(src_item):
-                    shutil.copytree(src_item, dest_item)  # Copy directory
-                else:
-                    shutil.copy2(src_item, dest_item)
-                    modinfo_path = os.path.join(dest_item, 'modinfo.json')
-                    try:
-                        with open(modinfo_path, 'r') as file:
-                            mod_data = json.load(file)
-                        
-                        mod_data["active"] = True
-                        
-                        with open(modinfo_path, 'w') as file:
-                            json.dump(mod_data, file)
-                    except FileNotFoundError:
-                        print(f"Warning: modinfo.json not found at {modinfo_path}")
-                    except json.JSONDecodeError as e:
-                        print(f"Error parsing modinfo.json at {modinfo_path}: {e}")
-                    except IOError as e:
-                        print(f"I/O error when handling modinfo.json at {modinfo_path}: {e}")
-                  # Copy files
-            except Exception as e:
-                print(f"Failed to copy {src_item} to {dest_item}. Reason: {e}")
 
-        # Write updated data back to the JSON file
+def stage_mods():
+    """Prepare the active mod set in a side directory. Safe while tiles are running."""
+    return mod_deployer.stage_mods(mod_deployer.workshop_content_path(config["steam_cmd_path"]),
+                                   mods_folder_path(), config["mods"].split(","),
+                                   config.get("mod_deploy_mode", "copy"))
+
+
+def prepare_mod_update():
+    """
+    Download and stage updated mods while the tiles keep running.
+    Returns (out_of_date, updated_mods_info, staged).
+    """
+    with mods_lock:
+        out_of_date, updated_mods_info = check_mod_updates()
         try:
-            with open('mods_info.json', 'w') as file:
-                json.dump(updated_mods_info, file, indent=4)
-        except IOError as e:
-            print(f"Failed to write updated mods_info.json: {e}")
+            results = download_workshop_items(out_of_date)
+            keep_failed_mods_out_of_date(results, updated_mods_info)
+        except Exception as E:
+            print(E)
+        staged = stage_mods() is not None
+    return out_of_date, updated_mods_info, staged
+
+
+def activate_staged_mods(updated_mods_info):
+    """Switch the staged mod set live. Tiles must be stopped."""
+    with mods_lock:
+        if mod_deployer.swap_staged_mods(mods_folder_path()):
+            if updated_mods_info is not None:
+                save_mods_info(updated_mods_info)
+            return True
+    print("Staged mods could not be activated, keeping the current Mods folder")
+    return False
+
+
+def deploy_mods(updated_mods_info):
+    """Stage the active mods and switch them live. Tiles must be stopped."""
+    if not os.path.exists(mods_folder_path()):
+        # Create the folder if it does not exist
+        os.makedirs(mods_folder_path())
+    if stage_mods() is not None:
+        activate_staged_mods(updated_mods_info)
 
+
+def download_mods(workshop_ids, updated_mods_info):
+    try:
+        results = download_workshop_items(workshop_ids)
+        keep_failed_mods_out_of_date(results, updated_mods_info)
     except Exception as E:
         print(E)
+    deploy_mods(updated_mods_info)
+
+
+def get_tile_player_counts(tile_ids=None):
+    """
+    Query every tile's player count over A2S on its query port, in parallel.
+    Tiles that do not answer are reported as None.
+    """
+    if tile_ids is None:
+        tile_ids = list(range(config["tile_num"]))
+    host = config.get("readiness_query_host", "127.0.0.1")
+    timeout = config.get("player_query_timeout", 2)
+
+    def count(tile_id):
+        info = query_server((host, config["start_query_port"] + tile_id), timeout)
+        return info["player_count"] if info else None
+
+    if not tile_ids:
+        return {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(tile_ids)) as executor:
+        return dict(zip(tile_ids, executor.map(count, tile_ids)))
+
+
+def warn_tiles(tile_ids, message):
+    """Show an admin message on several tiles at once (each write holds the message for 11 seconds)"""
+    if not tile_ids:
+        return
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(tile_ids)) as executor:
+        for future in [executor.submit(admin_writer.write, message, server_folder_path(), i) for i in tile_ids]:
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Error warning tile: {e}")
+
+
+def split_by_players(counts):
+    """
+    Split tiles into those that can restart right away (no players) and busy
+    tiles ordered by fewest players first. Tiles that did not answer the
+    query are treated as busy.
+    """
+    empty = sorted(tile_id for tile_id, players in counts.items() if players == 0)
+    busy = sorted((tile_id for tile_id, players in counts.items() if players != 0),
+                  key=lambda tile_id: (counts[tile_id] is None, counts[tile_id] or 0, tile_id))
+    return empty, busy
+
+
+def player_countdown(tile_ids, countdown, message):
+    """
+    Warn the players on ``tile_ids`` and wait out the countdown. Returns the
+    player counts queried right before the tiles go down.
+    """
+    if not tile_ids:
+        return {}
+    if countdown > 0:
+        started = time.time()
+        warn_tiles(tile_ids, message.format(countdown))
+        time.sleep(max(0, countdown - (time.time() - started)))
+    return get_tile_player_counts(tile_ids)
 
-    return
 
+def player_minutes_lost(players, downtime):
+    """Sum of players on each tile when it went down times its downtime in minutes"""
+    return sum((players.get(tile_id) or 0) * seconds / 60 for tile_id, seconds in downtime.items())
 
-def restart_all_tiles(wait):
-    global wait_restart_time
+
+def restart_all_tiles(wait, countdown=0, prepared=None):
+    """
+    Stop every tile, update the game and mods, and start them again.
+
+    With a ``countdown`` the players get that many seconds of warning, unless
+    every tile is empty, in which case the restart happens immediately.
+    ``prepared`` is the result of a prepare_mod_update() the caller already
+    ran.
+    """
+    global wait_restart_time, last_restart_report
     wait_restart_time = 0
-    stop_processes()
-    time.sleep(5)
-    update_game()
-    out_of_date, updated_mods_info = check_mod_updates()
-    download_mods(out_of_date, updated_mods_info)
-    time.sleep(wait)
-    start_processes()
+    restart_started = time.time()
+
+    # Mods are downloaded and staged before any tile goes down
+    out_of_date, updated_mods_info, staged = prepared or prepare_mod_update()
+    # With two install roots the game is patched in the spare one while the tiles keep running
+    new_root, update = prepare_spare_root() if get_install_roots() is not None else (None, None)
 
+    players = get_tile_player_counts() if countdown else {}
+    empty, busy = split_by_players(players)
+    if busy:
+        players.update(player_countdown(busy, countdown, "Server restarting in {} seconds."))
 
-def check_for_server_update():
+    # No single-tile operation may start a tile while the install is being updated
+    with tile_registry.exclusive(all_tile_ids(), "restart all"):
+        stop_processes()
+        stopped_at = time.time()
+        if not use_event_supervisor():
+            time.sleep(5)  # The polling threads notice the exit up to a second late
+        if new_root is not None:
+            switch_install_root(new_root)
+            # The mods were synced into the new root along with the patch
+            if updated_mods_info is not None:
+                save_mods_info(updated_mods_info)
+        else:
+            if update is None:
+                update = update_game()
+            if staged:
+                activate_staged_mods(updated_mods_info)
+        time.sleep(wait)
+        start_processes()
+
+    # Downtime lasts until each tile is ready again, not just launched
+    timeout = config.get("readiness_timeout", 600)
+    deadline = time.time() + timeout
+    downtime = {}
+    ready = {}
+    for i in range(config["tile_num"]):
+        up_at = wait_for_tile_up(i, max(0, deadline - time.time()))
+        if up_at is None:
+            logger.warning(f"Tile {i} did not report ready within {timeout}s of the restart")
+            up_at = time.time()
+        else:
+            ready[i] = up_at
+        downtime[i] = up_at - stopped_at
+    if use_event_supervisor() and len(ready) == config["tile_num"]:
+        record_cold_start(ready)
+    last_restart_report = {
+        "mode": "full",
+        "started": restart_started,
+        "duration": time.time() - restart_started,
+        "downtime": downtime,
+        # How much of the downtime went to SteamCMD, by phase
+        "update": {"mode": update["mode"], "seconds": update["seconds"], "phases": update["phases"]},
+        "players": players,
+        "player_minutes_lost": player_minutes_lost(players, downtime),
+    }
+    if countdown:
+        report_restart(last_restart_report)
+
+
+def wait_for_tile_up(tile_id, timeout):
     """
-    Check if server files need to be updated by querying Steam for the latest app info.
-    Returns True if an update is available, False otherwise.
+    Block until the latest launch of a tile reports ready (tile name logged or
+    A2S query answered). Returns the time the tile became ready, or None on
+    timeout.
     """
-    try:
-        logger.info("Checking for Last Oasis server updates...")
-        print("Checking for Last Oasis server updates...")
+    deadline = time.time() + timeout
+    if use_cluster():
+        # Agents report whether a tile's process runs, not whether it is ready
+        while time.time() < deadline:
+            if get_cluster_coordinator().is_running(tile_id):
+                return time.time()
+            time.sleep(1)
+        return None
+    while time.time() < deadline:
+        remaining = deadline - time.time()
+        # A crashed launch is cancelled; keep waiting for the relaunch
+        seconds = get_readiness_probe().wait(tile_id, min(1, remaining))
+        if seconds is not None:
+            boots = readiness_probe.boot_history(tile_id)
+            return boots[-1]["launched_at"] + seconds if boots else time.time()
+        if not readiness_probe.is_pending(tile_id):
+            time.sleep(min(1, max(0, remaining)))
+    return None
 
-        # First, update app info to get the latest version information
-        info_cmd = f'{config["steam_cmd_path"]}steamcmd +login anonymous +app_info_update 1 +app_info_print 920720 +quit'
-        process = subprocess.run(info_cmd, shell=True, text=True, capture_output=True)
-        output = process.stdout
 
-        # We can look for update information in the output
-        # For simplicity, we'll compare local and remote build IDs if available
-        # or just check if Steam reports a required update
-        
-        # Look for indications of updates needed
-        if "Update Required" in output or "Update required" in output:
-            logger.info("Server update available - update required by Steam")
-            print("Server update available - update required by Steam")
-            return True
-            
-        # If there's no clear update indicator, we can assume no update is needed
-        logger.info("No server updates detected")
-        print("No server updates detected")
-        return False
-            
+def restart_tile_batches(tile_ids, batch_size):
+    """
+    Restart ``tile_ids`` in order, ``batch_size`` at a time, waiting for each
+    batch to report ready. Returns the downtime per tile.
+    """
+    timeout = config.get("rolling_restart_timeout", 600)
+    downtime = {}
+
+    for index in range(0, len(tile_ids), max(1, batch_size)):
+        batch = tile_ids[index:index + max(1, batch_size)]
+        logger.info(f"Rolling restart: restarting tiles {batch}")
+        print(f"Rolling restart: restarting tiles {batch}")
+
+        stopped_at = {}
+        for tile_id in batch:
+            stopped_at[tile_id] = time.time()
+            stop_single_process(tile_id)
+
+        for tile_id in batch:
+            start_single_process(tile_id)
+
+        for tile_id in batch:
+            up_at = wait_for_tile_up(tile_id, timeout)
+            if up_at is None:
+                logger.warning(f"Tile {tile_id} did not come back up within {timeout}s, continuing")
+                up_at = time.time()
+            downtime[tile_id] = up_at - stopped_at[tile_id]
+
+    return downtime
+
+
+def rolling_restart(batch_size=1, countdown=0):
+    """
+    Restart tiles a batch at a time so the rest of the cluster keeps serving players.
+
+    Each batch has to come back up before the next one is stopped. Updated
+    mods are downloaded and staged while every tile is still running, but all
+    tiles load them from one Mods folder, which can only be swapped while no
+    tile has it open; like a pending server update, that falls back to
+    restart_all_tiles() with the mods already staged.
+
+    With a ``countdown``, tiles are ranked by their current player count:
+    empty tiles restart straight away, while the busy ones are warned and
+    restarted after the countdown, fewest players first.
+
+    Returns the restart report, including how long each tile was down and
+    the player-minutes lost.
+    """
+    global wait_restart_time, last_restart_report
+    wait_restart_time = 0
+    restart_started = time.time()
+
+    if check_for_server_update():
+        logger.info("Server update pending - falling back to a full restart")
+        restart_all_tiles(1, countdown)
+        return last_restart_report
+
+    # Fetch and stage new content while the tiles keep serving players
+    out_of_date, updated_mods_info, staged = prepare_mod_update()
+    if staged and out_of_date:
+        logger.info(f"Mods {out_of_date} changed - falling back to a full restart to swap the shared Mods folder")
+        restart_all_tiles(1, countdown, prepared=(out_of_date, updated_mods_info, staged))
+        return last_restart_report
+    if updated_mods_info is not None:
+        save_mods_info(updated_mods_info)
+
+    tile_ids = list(range(config["tile_num"]))
+    if countdown:
+        players = get_tile_player_counts(tile_ids)
+        empty, busy = split_by_players(players)
+    else:
+        players, empty, busy = {}, tile_ids, []
+
+    # The countdown for busy tiles runs while the empty ones restart
+    countdown_done = concurrent.futures.Future()
+    if busy:
+        logger.info(f"Restarting empty tiles {empty} now, busy tiles {busy} after {countdown}s")
+        threading.Thread(target=lambda: countdown_done.set_result(
+            player_countdown(busy, countdown, "Restarting in {} seconds.")), daemon=True).start()
+    else:
+        countdown_done.set_result({})
+
+    # Nobody is on the empty tiles, so they restart together unless this is a plain rolling restart
+    downtime = restart_tile_batches(empty, batch_size if not countdown else len(empty))
+    if busy:
+        players.update(countdown_done.result())
+        busy.sort(key=lambda tile_id: (players[tile_id] is None, players[tile_id] or 0, tile_id))
+        busy_downtime = restart_tile_batches(busy, batch_size)
+        downtime.update(busy_downtime)
+
+    last_restart_report = {
+        "mode": "rolling",
+        "started": restart_started,
+        "duration": time.time() - restart_started,
+        "downtime": downtime,
+        "players": players,
+        "player_minutes_lost": player_minutes_lost(players, downtime),
+    }
+    report_restart(last_restart_report)
+    return last_restart_report
+
+
+def report_restart(report):
+    """Log and post the per-tile downtime and player-minutes lost of a restart"""
+    summary = ", ".join("{} {:.0f}s".format(
+        tile_tracker.get_tile_name(tile_server_id(i), tile_server_id(i)) if tile_tracker else tile_server_id(i),
+        seconds) for i, seconds in sorted(report["downtime"].items()))
+    title = "Rolling restart" if report["mode"] == "rolling" else "Restart"
+    logger.info(f"{title} complete in {report['duration']:.0f}s. Downtime: {summary}. "
+                f"Player-minutes lost: {report['player_minutes_lost']:.1f}")
+    update = report.get("update")
+    if update and update["phases"]:
+        logger.info(f"Server update ({update['mode']}) took {update['seconds']:.0f}s of the downtime: "
+                    + ", ".join(f"{phase} {seconds:.0f}s" for phase, seconds in update["phases"].items()))
+    send_discord_message(config["server_status_webhook"],
+                         f"{title} complete. Downtime per tile: {summary}. "
+                         f"Player-minutes lost: {report['player_minutes_lost']:.1f}")
+
+
+def restart_for_mod_update(countdown=0):
+    """
+    Apply pending updates using the configured restart_mode ("full" or "rolling").
+    ``countdown`` is the warning busy tiles get; empty tiles do not wait for it.
+    """
+    if config.get("restart_mode", "full") == "rolling":
+        return rolling_restart(config.get("rolling_batch_size", 1), countdown)
+    restart_all_tiles(1, countdown)
+    return last_restart_report
+
+
+def get_update_checker():
+    """Return the build ID checker for the server install, creating it on first use"""
+    global update_checker
+    if update_checker is None:
+        manifest = config.get("server_manifest_path") or find_app_manifest(server_folder_path(),
+                                                                           config["steam_cmd_path"])
+        branch = config.get("server_branch", "public")
+
+        def fetch_remote():
+            timeout = config.get("steamcmd_timeout") or steamcmd.DEFAULT_APP_INFO_TIMEOUT
+            info = steamcmd.fetch_app_info(config["steam_cmd_path"], timeout=timeout, pool=get_steamcmd_pool())
+            return steamcmd.branch_build_id(info, branch) if info else None
+
+        update_checker = BuildIdChecker(manifest, fetch_remote, ttl=config.get("server_build_cache_ttl", 600))
+    return update_checker
+
+
+def check_for_server_update(force=False):
+    """
+    Check if server files need to be updated by comparing the installed
+    build ID with the one Steam publishes for the branch; the remote answer
+    is cached for server_build_cache_ttl seconds.
+    Returns True if an update is available, False otherwise.
+    """
+    try:
+        result = get_update_checker().check(force)
     except Exception as e:
         logger.error(f"Error checking for server updates: {e}")
         print(f"Error checking for server updates: {e}")
         return False
+    message = f"Server update check ({result['seconds'] * 1000:.0f} ms): {result['reason']}"
+    logger.info(message)
+    print(message)
+    return result["update_available"]
+
 
+def get_server_update_status(force=False):
+    """
+    Return the last build ID check (running one if ``force`` or none ran
+    yet), the last update report and when the install was last validated
+    """
+    checker = get_update_checker()
+    if force or checker.last_check is None:
+        checker.check(force)
+    return dict(checker.last_check, last_update=last_update_report,
+                last_validated=load_update_state().get("last_validated"),
+                validation_requested=validation_requested)
 
-def update_game():
-    # Define the SteamCMD command
+
+def load_update_state():
+    """Return the persisted server update state (time of the last validation)"""
+    try:
+        with open(config.get("server_update_state_file", "server_update_state.json"), 'r') as file:
+            return json.load(file)
+    except (IOError, ValueError):
+        return {}
+
+
+def save_update_state(state):
+    path = config.get("server_update_state_file", "server_update_state.json")
     try:
-        logger.info("Starting Last Oasis server update via Steam")
-        print("Starting Last Oasis server update via Steam")
-        steamcmd_command = "{}steamcmd +login anonymous +app_update 920720 validate +quit".format(
-            config["steam_cmd_path"])
+        with open(path, 'w') as file:
+            json.dump(state, file, indent=2)
+    except IOError as e:
+        logger.error(f"Error saving server update state to {path}: {e}")
+
 
-        print(steamcmd_command)
+def recent_crash_count(since):
+    """Return how many tile crashes were recorded after ``since`` across all tiles"""
+    if supervisor is None or supervisor.restart_policy is None:
+        return 0
+    return sum(1 for tile_id in all_tile_ids()
+               for crash in supervisor.restart_policy.history(tile_id) if crash["time"] > since)
 
-        process = subprocess.Popen(steamcmd_command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
 
-        # Read and print the output line by line
-        while True:
-            output = process.stdout.readline()
-            if output == '' and process.poll() is not None:
-                break
-            if output:
-                print(output.strip())
+def request_validation():
+    """Validate every server file at the next update"""
+    global validation_requested
+    validation_requested = True
+    logger.info("Server validation requested for the next update")
 
-        # Capture any remaining output
-        stdout, stderr = process.communicate()
-        print(stdout)
-        if stderr:
-            print(stderr)
 
+def choose_update_mode():
+    """
+    Decide how the next update_game() runs. Returns (mode, reason) where
+    mode is "validate" (re-hash every file), "update" (download changes
+    only) or "skip" (nothing to do).
+
+    A validation runs when requested, every server_validate_interval
+    seconds, or after validate_after_crashes crashes within
+    validate_crash_window seconds (a crash storm may mean damaged files).
+    Otherwise the update is skipped while the installed build ID matches the
+    remote one. server_update_mode "always" never skips, "validate" always
+    validates and "never" always skips.
+    """
+    mode = config.get("server_update_mode", "auto")
+    if mode == "never":
+        return "skip", "server_update_mode is never"
+    if mode == "validate":
+        return "validate", "server_update_mode is validate"
+    if validation_requested:
+        return "validate", "validation requested"
+
+    now = time.time()
+    last_validated = load_update_state().get("last_validated")
+    interval = config.get("server_validate_interval", 7 * 86400)
+    if interval and (last_validated is None or now - last_validated >= interval):
+        return "validate", "scheduled validation" if last_validated else "never validated"
+    threshold = config.get("validate_after_crashes", 10)
+    window = config.get("validate_crash_window", 1800)
+    crashes = recent_crash_count(max(now - window, last_validated or 0))
+    if threshold and crashes >= threshold:
+        return "validate", f"{crashes} crashes within {window}s"
+
+    if mode == "always":
+        return "update", "server_update_mode is always"
+    check = get_update_checker().check()
+    if check["remote"] is None:
+        # SteamCMD only downloads what changed, so updating blind is cheap
+        return "update", check["reason"]
+    return ("update" if check["update_available"] else "skip"), check["reason"]
+
+
+def update_game(mode=None, install_dir=None):
+    """
+    Update the server install (or the one in ``install_dir``) with SteamCMD
+    in ``mode`` (see choose_update_mode(), which decides when ``mode`` is
+    None) and time each SteamCMD phase. Returns the update report.
+    """
+    global last_update_report, validation_requested
+    mode, reason = (mode, "requested") if mode else choose_update_mode()
+    started = time.time()
+    if mode == "skip":
+        logger.info(f"Skipping the server update: {reason}")
+        print(f"Skipping the server update: {reason}")
+        last_update_report = {"time": started, "mode": mode, "reason": reason, "success": True,
+                              "seconds": 0.0, "phases": {}}
+        return last_update_report
+
+    logger.info(f"Starting Last Oasis server update via Steam ({mode}: {reason})")
+    print(f"Starting Last Oasis server update via Steam ({mode}: {reason})")
+    try:
+        result = steamcmd.run_app_update(config["steam_cmd_path"], validate=mode == "validate",
+                                         install_dir=install_dir, timeout=config.get("server_update_timeout"),
+                                         on_line=print, pool=get_steamcmd_pool(),
+                                         hang_timeout=config.get("steamcmd_download_hang_timeout"))
     except Exception as E:
         print(E)
+        result = {"success": False, "validate": mode == "validate", "seconds": round(time.time() - started, 2),
+                  "phases": {}, "result": None, "error": str(E)}
+
+    if result["success"] and mode == "validate":
+        state = load_update_state()
+        state["last_validated"] = time.time()
+        save_update_state(state)
+        validation_requested = False
+    last_update_report = dict(result, time=started, mode=mode, reason=reason, install_dir=install_dir)
+    if result["phases"]:
+        print("Server update phases: " + ", ".join(f"{phase} {seconds}s"
+                                                  for phase, seconds in result["phases"].items()))
+    return last_update_report
+
+
+def prepare_spare_root():
+    """
+    Update the spare install root and sync the active mods into it while the
+    tiles keep running on the live one. Returns (root to switch to, update
+    report); the root is None when nothing changed or the update failed, in
+    which case the tiles stay on the live root.
+
+    Only a new build goes into the spare root. While the live build is
+    current (or the remote one unknown) this returns (None, None) and the
+    caller updates or validates the live root with the tiles stopped, so a
+    scheduled validation does not switch roots at every restart.
+    """
+    roots = get_install_roots()
+    if config.get("server_update_mode", "auto") == "never" or not get_update_checker().check()["update_available"]:
+        return None, None
+    spare = roots.inactive
+    update = update_game(install_dir=spare)
+    if update["mode"] == "skip":
+        return None, update
+    if not update["success"]:
+        logger.error(f"Updating the spare install {spare} failed, staying on {roots.active}: {update['error']}")
+        return None, update
+    with mods_lock:
+        mod_deployer.sync_mods(mod_deployer.workshop_content_path(config["steam_cmd_path"]),
+                               roots.folder_path(spare) + "Mist/Content/Mods", config["mods"].split(","),
+                               config.get("mod_deploy_mode", "copy"))
+    return spare, update
+
+
+def switch_install_root(root):
+    """Make ``root`` the live install. Tiles must be stopped."""
+    global update_checker
+    get_install_roots().switch(root)
+    # Everything that reads the live install follows it
+    update_checker = None
+    log_folder = server_log_folder()
+    for component in (tile_tracker, readiness_probe, hang_watchdog):
+        if component is not None:
+            component.log_folder = log_folder
+    send_discord_message(config["server_status_webhook"], f"Tiles now run from {root}")
+
+
+def rollback_install_root(countdown=0):
+    """Restart every tile on the install root that was live before the last switch"""
+    roots = get_install_roots()
+    target = roots.rollback_target() if roots is not None else None
+    if target is None:
+        logger.warning("No previous install root to roll back to")
+        return False
+    if countdown:
+        player_countdown(all_tile_ids(), countdown, "Server restarting in {} seconds.")
+    with tile_registry.exclusive(all_tile_ids(), "rollback"):
+        stop_processes()
+        switch_install_root(target)
+        start_processes()
+    logger.info(f"Rolled back to install root {target}")
+    return True
 
 
 def monitor_tile_names():
@@ -381,19 +1652,31 @@ def monitor_tile_names():
             logger.error(f"Error in tile name monitoring: {e}")
 
 def main():
-    global tile_tracker
+    global tile_tracker, manager_started_at
     update_config()
+    manager_started_at = time.time()
     
     # Initialize tile tracker with config
     tile_tracker = get_tracker(
-        log_folder=os.path.join(config["folder_path"].replace("Binaries\\Win64\\", ""), "Saved\\Logs"),
+        log_folder=server_log_folder(),
         config_path="config.json"
     )
     
     # Start background thread for tile name monitoring
     threading.Thread(target=monitor_tile_names, daemon=True).start()
-    
-    restart_all_tiles(1)
+
+    # Clients attach to the daemon through the control API
+    start_control_api()
+
+    with orchestration_lock:
+        # Tiles still running from a previous manager instance keep running
+        if use_cluster():
+            # Tiles the agents already run are adopted, the rest are placed
+            start_processes()
+        elif adopt_running_tiles():
+            start_processes()
+        else:
+            restart_all_tiles(1)
 
     # Set default server check interval if not in config
     if "server_check_interval" not in config:
@@ -415,15 +1698,10 @@ def main():
                 logger.info("Server update detected - preparing to restart all tiles")
                 send_discord_message(config["server_status_webhook"], 
                                    "Last Oasis server update detected! Restarting tiles in {} seconds.".format(config["restart_time"]))
-                
-                # Notify players in-game about the restart
-                for i in range(config["tile_num"]):
-                    admin_writer.write("Server update available. Restarting in {} seconds.".format(config["restart_time"]), 
-                                    config["folder_path"], i)
-                    
-                # Wait before restarting
-                time.sleep(config["restart_time"])
-                restart_all_tiles(1)
+
+                # Players get the countdown unless every tile is empty
+                with orchestration_lock:
+                    restart_all_tiles(1, config["restart_time"])
                 continue  # Skip mod check after server update
 
         # Check for mod updates
@@ -437,11 +1715,9 @@ def main():
                                  .format(config["restart_time"], workshop))
             send_discord_message(config["server_status_webhook"], "Out-of-date mods restarting tiles in {} seconds: {}"
                                  .format(config["restart_time"], workshop))
-            # Send restart message to each tile
-            for i in range(config["tile_num"]):
-                admin_writer.write("Restart", config["folder_path"], i)
-            time.sleep(config["restart_time"])
-            restart_all_tiles(1)
+            # Empty tiles restart right away; busy tiles are warned and get the countdown
+            with orchestration_lock:
+                restart_for_mod_update(config["restart_time"])
 # Entry point for starting the server management explicitly
 def start_server_management():
     """
@@ -454,10 +1730,14 @@ def start_server_management():
     except KeyboardInterrupt:
         # Send restart message to each tile
         for i in range(config["tile_num"]):
-            admin_writer.write("Restart", config["folder_path"], i)
+            admin_writer.write("Restart", server_folder_path(), i)
         # time.sleep(config["restart_time"])
         stop_processes()
         print("Server manager stopped by user")
+    finally:
+        # Logged-in SteamCMD sessions must not outlive the daemon
+        if steamcmd_pool is not None:
+            steamcmd_pool.close()
 
 
 # Only run the main function if this script is executed directly (not imported)
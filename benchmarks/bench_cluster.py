@@ -0,0 +1,101 @@
+"""
+Failover benchmark for the multi-host cluster.
+
+Runs a coordinator and several host agents on this machine, each agent on
+its own port with fake tiles, places the tiles, then takes one agent down
+without warning (it stops reporting and its tiles die) and measures how long
+it takes until every tile runs on the remaining agents again.
+
+Usage:
+    python benchmarks/bench_cluster.py --agents 3 --tiles 6 --agent-timeout 3
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cluster_agent import HostAgent  # noqa: E402
+from cluster_coordinator import ClusterCoordinator  # noqa: E402
+
+FAKE_TILE = [sys.executable, '-c', 'import time; time.sleep(3600)']
+
+
+def wait_until(condition, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def all_running(coordinator, agents, tiles):
+    """Every tile is assigned to a live agent that really runs it"""
+    assignments = coordinator.assignments()
+    by_name = {agent.name: agent for agent in agents}
+    return len(assignments) == tiles and all(
+        name in by_name and by_name[name].supervisor.is_running(tile_id) for tile_id, name in assignments.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--agents', type=int, default=3)
+    parser.add_argument('--tiles', type=int, default=6)
+    parser.add_argument('--capacity', type=int, default=None, help="tiles per agent (default: enough for failover)")
+    parser.add_argument('--agent-timeout', type=float, default=3.0)
+    parser.add_argument('--report-interval', type=float, default=0.5)
+    parser.add_argument('--check-interval', type=float, default=0.5)
+    args = parser.parse_args()
+    capacity = args.capacity or -(-args.tiles // max(1, args.agents - 1))
+
+    coordinator = ClusterCoordinator(range(args.tiles), agent_timeout=args.agent_timeout,
+                                     check_interval=args.check_interval, settle=0)
+    port = coordinator.start(port=0)
+    agents = [HostAgent(f"agent-{i}", lambda tile_id: FAKE_TILE, capacity=capacity, port=0,
+                        coordinator_url=f"http://127.0.0.1:{port}", report_interval=args.report_interval,
+                        stop_grace=0)
+              for i in range(args.agents)]
+    for agent in agents:
+        agent.supervisor.popen_kwargs = {'stdout': subprocess.DEVNULL}
+        agent.start()
+
+    try:
+        wait_until(lambda: len(coordinator.status()["agents"]) == args.agents, 10)
+        started = time.time()
+        coordinator.start_all()
+        if not wait_until(lambda: all_running(coordinator, agents, args.tiles), 30):
+            print("Tiles were not placed:", coordinator.status())
+            return
+        placement = time.time() - started
+        by_agent = {}
+        for tile_id, name in coordinator.assignments().items():
+            by_agent.setdefault(name, []).append(tile_id)
+        print(f"{args.tiles} tiles placed on {args.agents} agents in {placement:.2f}s: {by_agent}")
+
+        victim = max(agents, key=lambda agent: len(by_agent.get(agent.name, [])))
+        moved = by_agent.get(victim.name, [])
+        failed_at = time.time()
+        victim.stop(stop_tiles=True)
+        survivors = [agent for agent in agents if agent is not victim]
+        if not wait_until(lambda: all_running(coordinator, survivors, args.tiles), args.agent_timeout + 30):
+            print("Tiles were not moved:", coordinator.status())
+            return
+        failover = time.time() - failed_at
+        print(f"{victim.name} failed with tiles {moved}; all tiles running again after {failover:.2f}s "
+              f"(agent timeout {args.agent_timeout:.1f}s)")
+        for event in coordinator.status()["events"]:
+            if event["kind"] in ("agent-down", "tile-moved"):
+                print(f"  {event['time'] - failed_at:+6.2f}s {event['kind']}: "
+                      + ", ".join(f"{key}={value}" for key, value in event.items() if key not in ("time", "kind")))
+    finally:
+        for agent in agents:
+            agent.stop(stop_tiles=True)
+        coordinator.stop()
+
+
+if __name__ == "__main__":
+    main()
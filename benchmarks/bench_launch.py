@@ -0,0 +1,111 @@
+"""
+Cold cluster start benchmark for the launch scheduler.
+
+Starts N simulated tiles with different launch strategies and reports the
+time until every tile is ready. Each simulated tile has to read its paks and
+mods from a shared disk before it becomes ready. The disk bandwidth is split
+between the tiles loading at the same time, and every extra concurrent
+reader costs a share of it in seeks (``--thrash``), which is what makes
+all-at-once starts slow on real hosts. Only the disk is simulated; the
+scheduler is the one the manager uses.
+
+Usage:
+    python benchmarks/bench_launch.py --tiles 12 --strategies 0 1 2 4
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from launch_scheduler import LaunchScheduler  # noqa: E402
+
+TICK = 0.01  # seconds between simulation steps
+
+
+class SimulatedDisk:
+    """Shared disk serving every loading tile, advanced by a background thread"""
+
+    def __init__(self, bandwidth, thrash):
+        self.bandwidth = bandwidth
+        self.thrash = thrash
+        self._remaining = {}
+        self._ready = {}
+        self._lock = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def load(self, tile_id, megabytes):
+        with self._lock:
+            self._remaining[tile_id] = megabytes
+            self._ready.pop(tile_id, None)
+
+    def wait_ready(self, tile_id, timeout):
+        deadline = time.time() + timeout
+        with self._lock:
+            while tile_id not in self._ready:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                self._lock.wait(remaining)
+            return self._ready[tile_id]
+
+    def stop(self):
+        self._running = False
+        self._thread.join()
+
+    def _run(self):
+        last = time.time()
+        while self._running:
+            time.sleep(TICK)
+            now = time.time()
+            with self._lock:
+                readers = len(self._remaining)
+                if readers:
+                    share = (now - last) * self.bandwidth / (readers * (1 + self.thrash * (readers - 1)))
+                    for tile_id in list(self._remaining):
+                        self._remaining[tile_id] -= share
+                        if self._remaining[tile_id] <= 0:
+                            del self._remaining[tile_id]
+                            self._ready[tile_id] = now
+                            self._lock.notify_all()
+            last = now
+
+
+def run_strategy(tiles, max_concurrent, first, megabytes, bandwidth, thrash):
+    disk = SimulatedDisk(bandwidth, thrash)
+    scheduler = LaunchScheduler(lambda tile_id: disk.load(tile_id, megabytes), disk.wait_ready,
+                                max_concurrent=max_concurrent, first=first, boot_timeout=600)
+    report = scheduler.run(list(range(tiles)), wait_all=True)
+    disk.stop()
+    return scheduler.strategy, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Launch scheduler cold start benchmark')
+    parser.add_argument('--tiles', type=int, default=12, help='Number of simulated tiles (default: 12)')
+    parser.add_argument('--strategies', type=int, nargs='+', default=[0, 1, 2, 4],
+                        help='launch_max_concurrent values to compare, 0 = all at once (default: 0 1 2 4)')
+    parser.add_argument('--hub-first', action='store_true', help='Start tile 0 on its own first')
+    parser.add_argument('--megabytes', type=float, default=200.0, help='Data each tile loads (default: 200)')
+    parser.add_argument('--bandwidth', type=float, default=400.0, help='Disk MB/s with one reader (default: 400)')
+    parser.add_argument('--thrash', type=float, default=0.15,
+                        help='Bandwidth lost per extra concurrent reader (default: 0.15)')
+    args = parser.parse_args()
+
+    print(f"{args.tiles} tiles, {args.megabytes:.0f} MB each, {args.bandwidth:.0f} MB/s, thrash {args.thrash}")
+    for max_concurrent in args.strategies:
+        strategy, report = run_strategy(args.tiles, max_concurrent, [0] if args.hub_first else None,
+                                        args.megabytes, args.bandwidth, args.thrash)
+        ready = sorted(report["ready_at"].values())
+        first_ready = ready[0] if ready else float('nan')
+        print(f"{strategy:>24}: cold start={report['cold_start']:6.2f}s  first ready={first_ready:6.2f}s  "
+              f"last launch={report['launch_duration']:6.2f}s  timed out={len(report['timed_out'])}")
+
+
+if __name__ == '__main__':
+    main()
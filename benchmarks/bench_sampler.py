@@ -0,0 +1,61 @@
+"""
+Overhead benchmark for the per-tile resource sampler.
+
+Starts N fake tiles (each an idle process behind a shell wrapper, like
+cmd.exe wrapping MistServer) and samples all of them at the given interval,
+then reports how much CPU the sampler thread used.
+
+Usage:
+    python benchmarks/bench_sampler.py --tiles 50 --duration 30
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resource_sampler import ResourceSampler  # noqa: E402
+from tile_supervisor import kill_process_tree  # noqa: E402
+
+# Fake tile: an idle server process; the trailing "; exit" keeps the shell around as its parent
+FAKE_TILE = '"{}" -c "import time; time.sleep(3600)"; exit'.format(sys.executable)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Resource sampler overhead benchmark')
+    parser.add_argument('--tiles', type=int, default=50, help='Number of fake tiles (default: 50)')
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds to sample (default: 20)')
+    parser.add_argument('--interval', type=float, default=1.0, help='Sampling interval in seconds (default: 1)')
+    args = parser.parse_args()
+
+    tiles = {i: subprocess.Popen(FAKE_TILE, shell=True, stderr=subprocess.DEVNULL) for i in range(args.tiles)}
+    time.sleep(1)  # Let every fake tile spawn its child
+    try:
+        sampler = ResourceSampler(lambda: {i: p.pid for i, p in tiles.items()}, interval=args.interval)
+        process_cpu = time.process_time()
+        started = time.monotonic()
+        sampler.start()
+        time.sleep(args.duration)
+        sampler.stop()
+        elapsed = time.monotonic() - started
+        process_cpu = time.process_time() - process_cpu
+
+        samples = sum(len(series) for series in sampler.series.values())
+        print(f"{args.tiles} tiles, {args.interval}s interval, {elapsed:.0f}s: {samples} samples")
+        print(f"sampler thread CPU: {sampler.overhead_percent():.3f}% of one core")
+        print(f"whole process CPU:  {100.0 * process_cpu / elapsed:.3f}% of one core")
+        latest = sampler.latest(0)
+        if latest:
+            print(f"tile 0 latest: rss={latest['rss'] / 1e6:.1f}MB threads={latest['threads']:.0f} "
+                  f"handles={latest['handles']:.0f}")
+    finally:
+        for process in tiles.values():
+            kill_process_tree(process.pid)
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+SteamCMD session pool benchmark.
+
+Runs the manager's SteamCMD work (update checks, a game update and mod
+downloads) against benchmarks/fake_steamcmd.py, once with a new SteamCMD
+process per action and once through a SteamCMDPool, and reports the time
+each took. Finally one download is made to hang to show that the session is
+recycled and the next request gets a fresh one.
+
+The fake SteamCMD is started through a small shell wrapper named
+steamcmd.exe, so this runs on POSIX systems only.
+
+Usage:
+    python benchmarks/bench_steamcmd.py --checks 5 --mods 20 --startup 1.0 --login 1.5
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import steamcmd  # noqa: E402
+from steamcmd_session import SteamCMDPool  # noqa: E402
+
+FAKE_STEAMCMD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_steamcmd.py")
+
+
+def install_fake(folder):
+    """Write a steamcmd.exe wrapper that runs the fake SteamCMD"""
+    path = os.path.join(folder, "steamcmd.exe")
+    with open(path, "w") as file:
+        file.write(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_STEAMCMD}" "$@"\n')
+    os.chmod(path, 0o755)
+    return os.path.join(folder, "")
+
+
+def workload(steam_cmd_path, checks, mods, batch_size, pool=None):
+    """Return seconds per step of a typical update cycle"""
+    timings = {}
+    started = time.perf_counter()
+    for _ in range(checks):
+        info = steamcmd.fetch_app_info(steam_cmd_path, timeout=30, pool=pool)
+        assert steamcmd.branch_build_id(info) is not None
+    timings["checks"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    report = steamcmd.run_app_update(steam_cmd_path, timeout=30, pool=pool)
+    assert report["success"], report
+    timings["update"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    results = steamcmd.download_workshop_items(steam_cmd_path, [str(100000 + i) for i in range(mods)],
+                                               batch_size=batch_size, timeout=60, pool=pool)
+    assert all(result["success"] for result in results.values()), results
+    timings["mods"] = time.perf_counter() - started
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--checks', type=int, default=5, help="update checks (app_info_print)")
+    parser.add_argument('--mods', type=int, default=20)
+    parser.add_argument('--batch-size', type=int, default=5, help="mods per download batch")
+    parser.add_argument('--startup', type=float, default=1.0, help="fake SteamCMD start-up seconds")
+    parser.add_argument('--login', type=float, default=1.5, help="fake SteamCMD login seconds")
+    parser.add_argument('--hang-timeout', type=float, default=2.0)
+    args = parser.parse_args()
+    os.environ.update(FAKE_STEAMCMD_STARTUP=str(args.startup), FAKE_STEAMCMD_LOGIN=str(args.login),
+                      FAKE_STEAMCMD_DOWNLOAD="0.05", FAKE_STEAMCMD_HANG="999")
+
+    folder = tempfile.mkdtemp(prefix="fake-steamcmd-")
+    steam_cmd_path = install_fake(folder)
+    try:
+        one_shot = workload(steam_cmd_path, args.checks, args.mods, args.batch_size)
+        pool = SteamCMDPool(steam_cmd_path, hang_timeout=args.hang_timeout)
+        try:
+            pooled = workload(steam_cmd_path, args.checks, args.mods, args.batch_size, pool)
+            print(f"{'step':<8} {'process per action':>19} {'session pool':>13}")
+            for step in one_shot:
+                print(f"{step:<8} {one_shot[step]:>18.2f}s {pooled[step]:>12.2f}s")
+            print(f"{'total':<8} {sum(one_shot.values()):>18.2f}s {sum(pooled.values()):>12.2f}s")
+            print(f"pool: {pool.describe()}")
+
+            started = time.perf_counter()
+            results = steamcmd.download_workshop_items(steam_cmd_path, ["999", "100000"], retries=0,
+                                                       timeout=60, pool=pool, hang_timeout=args.hang_timeout)
+            print(f"hung download gave up after {time.perf_counter() - started:.2f}s: "
+                  + ", ".join(f"{item} {'ok' if result['success'] else result['error']}"
+                              for item, result in results.items()))
+            started = time.perf_counter()
+            steamcmd.fetch_app_info(steam_cmd_path, timeout=30, pool=pool)
+            print(f"next check on a fresh session took {time.perf_counter() - started:.2f}s; pool: {pool.describe()}")
+        finally:
+            pool.close()
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
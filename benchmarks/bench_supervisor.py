@@ -0,0 +1,135 @@
+"""
+Exit-to-restart latency benchmark for tile supervision.
+
+Runs N fake tiles that exit after a random short uptime and measures the time
+between each exit and the relaunch of the same tile, for both the legacy
+thread-per-tile polling loop and the event-driven TileSupervisor.
+
+Usage:
+    python benchmarks/bench_supervisor.py --tiles 50 --duration 20
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+import statistics
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tile_supervisor import TileSupervisor  # noqa: E402
+
+# Fake tile: sleep for the given uptime, record the exit time, exit
+FAKE_TILE = ("import sys, time; time.sleep(float(sys.argv[1])); "
+             "open(sys.argv[2], 'a').write(repr(time.time()) + '\\n')")
+
+
+def fake_tile_command(tile_id, workdir, min_uptime, max_uptime):
+    uptime = random.uniform(min_uptime, max_uptime)
+    stamp_file = os.path.join(workdir, f"tile{tile_id}.exits")
+    return [sys.executable, '-c', FAKE_TILE, f"{uptime:.3f}", stamp_file]
+
+
+def collect_latencies(workdir, launches):
+    """Pair every recorded exit with the next launch of the same tile"""
+    latencies = []
+    for tile_id, launch_times in launches.items():
+        stamp_file = os.path.join(workdir, f"tile{tile_id}.exits")
+        if not os.path.exists(stamp_file):
+            continue
+        with open(stamp_file) as f:
+            exits = [float(line) for line in f if line.strip()]
+        for exit_time in exits:
+            later = [t for t in launch_times if t >= exit_time]
+            if later:
+                latencies.append(min(later) - exit_time)
+    return latencies
+
+
+def run_legacy(tiles, duration, workdir, min_uptime, max_uptime):
+    """Thread per tile, each polling its process once a second (the old run_process loop)"""
+    launches = {i: [] for i in range(tiles)}
+    stop_event = threading.Event()
+
+    def run_tile(tile_id):
+        while not stop_event.is_set():
+            process = subprocess.Popen(fake_tile_command(tile_id, workdir, min_uptime, max_uptime),
+                                       stdout=subprocess.DEVNULL)
+            launches[tile_id].append(time.time())
+            while process.poll() is None and not stop_event.is_set():
+                time.sleep(1)
+            if stop_event.is_set():
+                process.kill()
+                process.wait()
+                break
+
+    threads = [threading.Thread(target=run_tile, args=(i,)) for i in range(tiles)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    peak_threads = threading.active_count()
+    stop_event.set()
+    for thread in threads:
+        thread.join()
+    return collect_latencies(workdir, launches), peak_threads
+
+
+def run_event(tiles, duration, workdir, min_uptime, max_uptime):
+    """One TileSupervisor loop for every tile"""
+    launches = {i: [] for i in range(tiles)}
+    supervisor = None
+
+    def on_launch(tile_id, pid, launched_at):
+        launches[tile_id].append(launched_at)
+
+    def on_exit(tile_id, returncode, uptime, stopped):
+        # Re-roll the uptime for the next launch, like a tile crashing at a random time
+        if not stopped:
+            supervisor.set_command(tile_id, fake_tile_command(tile_id, workdir, min_uptime, max_uptime))
+
+    supervisor = TileSupervisor(on_launch=on_launch, on_exit=on_exit, restart_delay=0,
+                                popen_kwargs={'stdout': subprocess.DEVNULL})
+    supervisor.start()
+    for i in range(tiles):
+        supervisor.launch(i, fake_tile_command(i, workdir, min_uptime, max_uptime)).result()
+    time.sleep(duration)
+    peak_threads = threading.active_count()
+    supervisor.shutdown(stop_tiles=True, timeout=30)
+    return collect_latencies(workdir, launches), peak_threads
+
+
+def report(name, latencies, peak_threads):
+    if not latencies:
+        print(f"{name:>8}: no restarts observed")
+        return
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{name:>8}: restarts={len(latencies):5d}  mean={statistics.mean(latencies) * 1000:8.1f}ms  "
+          f"p50={statistics.median(latencies) * 1000:8.1f}ms  p95={p95 * 1000:8.1f}ms  "
+          f"max={latencies[-1] * 1000:8.1f}ms  threads={peak_threads}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tile supervisor exit-to-restart latency benchmark')
+    parser.add_argument('--tiles', type=int, default=50, help='Number of fake tiles (default: 50)')
+    parser.add_argument('--duration', type=float, default=15.0, help='Seconds to run each mode (default: 15)')
+    parser.add_argument('--min-uptime', type=float, default=0.5, help='Minimum fake tile uptime in seconds')
+    parser.add_argument('--max-uptime', type=float, default=3.0, help='Maximum fake tile uptime in seconds')
+    parser.add_argument('--mode', choices=['legacy', 'event', 'both'], default='both')
+    args = parser.parse_args()
+
+    print(f"{args.tiles} tiles, {args.duration:.0f}s per mode, uptime {args.min_uptime}-{args.max_uptime}s")
+    if args.mode in ('legacy', 'both'):
+        with tempfile.TemporaryDirectory() as workdir:
+            report('legacy', *run_legacy(args.tiles, args.duration, workdir, args.min_uptime, args.max_uptime))
+    if args.mode in ('event', 'both'):
+        with tempfile.TemporaryDirectory() as workdir:
+            report('event', *run_event(args.tiles, args.duration, workdir, args.min_uptime, args.max_uptime))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Stand-in for SteamCMD, for benchmarks and manual tests without Steam.
+
+Answers the commands the manager uses, either from ``+command`` arguments
+(one-shot, like ``steamcmd.exe +login anonymous ... +quit``) or, without
+arguments, interactively from stdin after a ``Steam>`` prompt:
+
+ - ``login anonymous``
+ - ``app_info_update 1`` / ``app_info_print <app>``
+ - ``app_update <app> [validate]``
+ - ``workshop_download_item <app> <id>``
+ - ``quit``
+
+Delays and failures come from environment variables:
+ - FAKE_STEAMCMD_STARTUP   seconds before the first prompt (default 1.0)
+ - FAKE_STEAMCMD_LOGIN     seconds a login takes (default 1.5)
+ - FAKE_STEAMCMD_DOWNLOAD  seconds per workshop item (default 0.1)
+ - FAKE_STEAMCMD_HANG      workshop IDs whose download never finishes
+ - FAKE_STEAMCMD_BUILDID   public build ID printed by app_info_print (default 15000000)
+"""
+
+import os
+import sys
+import time
+
+STARTUP = float(os.environ.get("FAKE_STEAMCMD_STARTUP", 1.0))
+LOGIN = float(os.environ.get("FAKE_STEAMCMD_LOGIN", 1.5))
+DOWNLOAD = float(os.environ.get("FAKE_STEAMCMD_DOWNLOAD", 0.1))
+HANG = set(filter(None, os.environ.get("FAKE_STEAMCMD_HANG", "").split(",")))
+BUILD_ID = os.environ.get("FAKE_STEAMCMD_BUILDID", "15000000")
+
+
+def say(text=""):
+    sys.stdout.write(text + "\n")
+    sys.stdout.flush()
+
+
+def handle(args, state):
+    """Run one command; returns False on quit"""
+    command = args[0].lower() if args else ""
+    if command == "quit":
+        return False
+    if command == "login":
+        time.sleep(LOGIN)
+        say("Connecting anonymously to Steam Public...OK")
+        say("Waiting for client config...OK")
+        say("Waiting for user info...OK")
+        state["logged_in"] = True
+    elif not state["logged_in"] and command in ("app_info_print", "app_update", "workshop_download_item"):
+        say("ERROR! Not logged on.")
+    elif command == "app_info_update":
+        say("AppInfo update requested")
+    elif command == "app_info_print":
+        app_id = args[1]
+        say(f"AppID : {app_id}, change number : 24000000/0, last change : Mon Oct 12 2026")
+        say(f'"{app_id}"\n{{\n\t"depots"\n\t{{\n\t\t"branches"\n\t\t{{\n\t\t\t"public"\n\t\t\t{{\n'
+            f'\t\t\t\t"buildid"\t\t"{BUILD_ID}"\n\t\t\t}}\n\t\t}}\n\t}}\n}}')
+    elif command == "app_update":
+        app_id = args[1]
+        if "validate" in args[2:]:
+            say(" Update state (0x5) verifying install, progress: 50.00 (1 / 2)")
+            time.sleep(0.2)
+        say(f"Success! App '{app_id}' already up to date.")
+    elif command == "workshop_download_item":
+        item = args[2]
+        say(f"Downloading item {item} ...")
+        if item in HANG:
+            while True:
+                time.sleep(60)
+        time.sleep(DOWNLOAD)
+        say(f'Success. Downloaded item {item} to "/fake/steamapps/workshop/content/{args[1]}/{item}" (1024 bytes)')
+    else:
+        say(f'Command "{command}" not found.')
+    return True
+
+
+def main():
+    state = {"logged_in": False}
+    say("Redirecting stderr to 'logs/stderr.txt'")
+    time.sleep(STARTUP)
+    say("Loading Steam API...OK")
+    if len(sys.argv) > 1:
+        commands = " ".join(sys.argv[1:]).split("+")[1:]
+        for command in commands:
+            if not handle(command.split(), state):
+                break
+        return
+    while True:
+        sys.stdout.write("\nSteam>")
+        sys.stdout.flush()
+        line = sys.stdin.readline()
+        if not line or not handle(line.split(), state):
+            break
+
+
+if __name__ == "__main__":
+    main()
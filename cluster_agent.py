@@ -0,0 +1,329 @@
+"""
+Cluster Agent Module
+
+Host agent for running tiles on several machines. Each host runs one agent,
+which launches and supervises its tiles locally with a TileSupervisor
+(crashed tiles are restarted on the spot, with the usual backoff and
+quarantine) and answers the cluster coordinator over a small HTTP API:
+
+ - GET  /state                 the agent's state (same body as its reports)
+ - POST /tiles/<id>/launch     launch a tile (a running tile is left alone)
+ - POST /tiles/<id>/stop       stop a tile and forget it
+ - POST /tiles/<id>/restart    stop and launch a tile again
+
+Every ``report_interval`` seconds the agent POSTs its state to the
+coordinator's /agents/report: its name and URL, how many tiles it can take,
+CPU and memory load, and every tile it supervises with pid, uptime, crash
+count and quarantine. A coordinator that stops hearing from an agent treats
+the host as failed and moves its tiles elsewhere.
+
+Several agents can run on one machine with different names and ports:
+
+    python cluster_agent.py --name host-a --port 8801 --coordinator http://127.0.0.1:8766
+    python cluster_agent.py --name host-b --port 8802 --coordinator http://127.0.0.1:8766
+
+Requests in both directions carry the ``X-LOMan-Token`` header when a token
+is configured. Without a token the agent and the coordinator only listen on
+a loopback address.
+"""
+
+import sys
+import json
+import socket
+import time
+import logging
+import argparse
+import ipaddress
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from urllib.parse import urlparse
+
+import psutil
+
+from tile_supervisor import TileSupervisor, RestartPolicy
+
+logger = logging.getLogger('LOManager.ClusterAgent')
+
+# Constants
+DEFAULT_AGENT_PORT = 8767
+DEFAULT_REPORT_INTERVAL = 5.0  # seconds between state reports to the coordinator
+DEFAULT_TILE_MEMORY = 8 * 1024 ** 3  # memory one tile needs, used to derive the capacity
+REQUEST_TIMEOUT = 10.0
+TOKEN_HEADER = "X-LOMan-Token"
+TILE_COMMAND = ('"{folder_path}MistServer-Win64-Shipping.exe" -log -noeac -messaging -NoLiveServer -noupnp'
+                ' -EnableCheats -backendapiurloverride="{backend}" -CustomerKey={customer_key}'
+                ' -ProviderKey={provider_key}'
+                ' -slots={slots} -OverrideConnectionAddress={connection_ip} -identifier={identifier}{tile_id}'
+                ' -port={port} -QueryPort={query_port}')
+
+
+def format_tile_command(config: dict, tile_id: int, template: str = TILE_COMMAND) -> str:
+    """Fill in the tile command for ``tile_id`` from a manager or agent config"""
+    return template.format(**dict(config, tile_id=tile_id,
+                                  port=config.get("start_port", 0) + tile_id,
+                                  query_port=config.get("start_query_port", 0) + tile_id))
+
+
+def default_capacity(tile_memory: int = DEFAULT_TILE_MEMORY) -> int:
+    """Tiles this host can run: one per ``tile_memory`` bytes of RAM, at least one"""
+    return max(1, psutil.virtual_memory().total // tile_memory)
+
+
+def http_json(method: str, url: str, body=None, token: Optional[str] = None,
+              timeout: float = REQUEST_TIMEOUT):
+    """Send a JSON request and return the decoded answer; raises OSError when it fails"""
+    data = json.dumps(body).encode('utf-8') if body is not None else (b"" if method == "POST" else None)
+    request = urllib.request.Request(url, method=method, data=data)
+    request.add_header("Content-Type", "application/json")
+    if token:
+        request.add_header(TOKEN_HEADER, token)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read() or b"null")
+    except urllib.error.HTTPError as e:
+        raise OSError(f"{method} {url} failed with HTTP {e.code}") from None
+
+
+class JSONRequestHandler(BaseHTTPRequestHandler):
+    """
+    Token check, JSON bodies and error handling shared by the agent and the
+    coordinator. Subclasses set ``token`` and implement route(method, parts, body).
+    """
+    token: Optional[str] = None
+    server_version = "LOManager"
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def route(self, method, parts, body):
+        raise NotImplementedError
+
+    def _dispatch(self, method):
+        if self.token and self.headers.get(TOKEN_HEADER) != self.token:
+            self._send_json(401, {"error": "missing or invalid token"})
+            return
+        parts = [part for part in urlparse(self.path).path.split('/') if part]
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length)) if length else None
+            status, answer = self.route(method, parts, body)
+        except ValueError as e:
+            status, answer = 400, {"error": str(e)}
+        except Exception as e:
+            logger.error(f"Error handling {method} {self.path}: {e}")
+            status, answer = 500, {"error": str(e)}
+        self._send_json(status, answer)
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def serve(handler_class, host: str, port: int, name: str):
+    """
+    Start a threading HTTP server for ``handler_class`` on a daemon thread.
+    Raises ValueError for a non-loopback ``host`` when no token is set, as
+    anyone reaching the server could then launch and stop tiles.
+    """
+    if not handler_class.token and not is_loopback(host):
+        raise ValueError(f"Refusing to listen on {host} without a cluster_token")
+    server = ThreadingHTTPServer((host, port), handler_class)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name=name, daemon=True).start()
+    return server
+
+
+class HostAgent:
+    """
+    Launch and supervise tiles on this host on behalf of the coordinator.
+
+    ``build_command(tile_id)`` returns the command line of a tile on this
+    host. ``url`` is how the coordinator reaches the agent; it defaults to
+    http://<host>:<port>.
+    """
+
+    def __init__(self, name: str, build_command: Callable[[int], object], capacity: Optional[int] = None,
+                 host: str = "127.0.0.1", port: int = DEFAULT_AGENT_PORT, url: Optional[str] = None,
+                 coordinator_url: Optional[str] = None, token: Optional[str] = None,
+                 report_interval: float = DEFAULT_REPORT_INTERVAL, supervisor: Optional[TileSupervisor] = None,
+                 stop_grace: float = 30.0):
+        self.name = name
+        self.build_command = build_command
+        self.capacity = capacity if capacity is not None else default_capacity()
+        self.host = host
+        self.port = port
+        self.url = url or f"http://{host}:{port}"
+        self.coordinator_url = coordinator_url.rstrip('/') if coordinator_url else None
+        self.token = token
+        self.report_interval = report_interval
+        self.supervisor = supervisor or TileSupervisor(restart_policy=RestartPolicy(), stop_grace=stop_grace)
+        self.reports_sent = 0
+        self.last_report_error = None
+        self._server = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start supervising, serving the agent API and reporting to the coordinator"""
+        self.supervisor.start()
+        handler = type('AgentHandler', (_AgentHandler,), {'agent': self, 'token': self.token})
+        self._server = serve(handler, self.host, self.port, f'agent-{self.name}')
+        self.port = self._server.server_address[1]
+        if self.url.endswith(":0"):
+            self.url = f"http://{self.host}:{self.port}"
+        self._stop_event.clear()
+        if self.coordinator_url:
+            self._thread = threading.Thread(target=self._report_loop, name=f'agent-report-{self.name}',
+                                            daemon=True)
+            self._thread.start()
+        logger.info(f"Agent {self.name} listening on {self.url} (capacity {self.capacity})")
+
+    def stop(self, stop_tiles: bool = True):
+        """Stop reporting and serving; with ``stop_tiles`` every tile is stopped too"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        self.supervisor.shutdown(stop_tiles=stop_tiles)
+
+    def launch(self, tile_id: int) -> dict:
+        if not self.supervisor.is_running(tile_id):
+            self.supervisor.launch(tile_id, self.build_command(tile_id)).result()
+        return self.tile_state(tile_id)
+
+    def stop_tile(self, tile_id: int) -> dict:
+        self.supervisor.stop_tile(tile_id)
+        state = self.tile_state(tile_id)
+        state["stop"] = self.supervisor.stop_report([tile_id]).get(tile_id)
+        self.supervisor.forget(tile_id)
+        return state
+
+    def restart(self, tile_id: int) -> dict:
+        self.supervisor.stop_tile(tile_id)
+        return self.launch(tile_id)
+
+    def tile_state(self, tile_id: int) -> dict:
+        policy = self.supervisor.restart_policy
+        return {
+            "tile_id": tile_id,
+            "running": self.supervisor.is_running(tile_id),
+            "pid": self.supervisor.pid(tile_id),
+            "uptime": self.supervisor.uptime(tile_id),
+            "crashes": len(policy.history(tile_id)) if policy else 0,
+            "quarantined": policy.is_quarantined(tile_id) if policy else False,
+        }
+
+    def state(self) -> dict:
+        """Return the state sent to the coordinator"""
+        return {
+            "name": self.name,
+            "url": self.url,
+            "capacity": self.capacity,
+            "cpu_percent": psutil.cpu_percent(),
+            "memory_percent": psutil.virtual_memory().percent,
+            "time": time.time(),
+            "tiles": {str(tile_id): self.tile_state(tile_id) for tile_id in self.supervisor.tile_ids()},
+        }
+
+    def report(self) -> bool:
+        """Send one state report to the coordinator"""
+        try:
+            http_json("POST", self.coordinator_url + "/agents/report", self.state(), self.token)
+        except OSError as e:
+            if self.last_report_error is None:
+                logger.warning(f"Agent {self.name} cannot reach the coordinator: {e}")
+            self.last_report_error = str(e)
+            return False
+        if self.last_report_error is not None:
+            logger.info(f"Agent {self.name} reaches the coordinator again")
+        self.last_report_error = None
+        self.reports_sent += 1
+        return True
+
+    def _report_loop(self):
+        while True:
+            self.report()
+            if self._stop_event.wait(self.report_interval):
+                return
+
+
+class _AgentHandler(JSONRequestHandler):
+    """Agent API; ``agent`` is set on the per-server subclass"""
+    agent: HostAgent = None
+
+    def route(self, method, parts, body):
+        if method == "GET" and parts == ["state"]:
+            return 200, self.agent.state()
+        if method == "POST" and len(parts) == 3 and parts[0] == "tiles":
+            tile_id = int(parts[1])
+            if parts[2] == "launch":
+                return 200, self.agent.launch(tile_id)
+            if parts[2] == "stop":
+                return 200, self.agent.stop_tile(tile_id)
+            if parts[2] == "restart":
+                return 200, self.agent.restart(tile_id)
+        return 404, {"error": f"unknown endpoint {method} /{'/'.join(parts)}"}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run tiles on this host for a cluster coordinator")
+    parser.add_argument('--config', default="config.json", help="config with this host's install and tile settings")
+    parser.add_argument('--name', help="agent name (agent_name, default: the host name)")
+    parser.add_argument('--host', help="address to listen on (agent_host)")
+    parser.add_argument('--port', type=int, help="port to listen on (agent_port)")
+    parser.add_argument('--url', help="URL the coordinator uses to reach this agent (agent_url)")
+    parser.add_argument('--coordinator', help="coordinator URL (coordinator_url)")
+    parser.add_argument('--capacity', type=int, help="tiles this host may run (agent_capacity)")
+    parser.add_argument('--command', help="tile command template, e.g. for fake tiles (tile_command)")
+    args = parser.parse_args(argv)
+
+    with open(args.config, 'r') as file:
+        config = json.load(file)
+    template = args.command or config.get("tile_command", TILE_COMMAND)
+    host = args.host or config.get("agent_host", "127.0.0.1")
+    port = args.port if args.port is not None else config.get("agent_port", DEFAULT_AGENT_PORT)
+    agent = HostAgent(
+        name=args.name or config.get("agent_name") or socket.gethostname(),
+        build_command=lambda tile_id: format_tile_command(config, tile_id, template),
+        capacity=args.capacity or config.get("agent_capacity"),
+        host=host, port=port, url=args.url or config.get("agent_url"),
+        coordinator_url=args.coordinator or config.get("coordinator_url"),
+        token=config.get("cluster_token"),
+        report_interval=config.get("agent_report_interval", DEFAULT_REPORT_INTERVAL),
+        stop_grace=config.get("tile_stop_grace", 30))
+    agent.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        agent.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                        stream=sys.stdout)
+    main()
@@ -0,0 +1,384 @@
+"""
+Cluster Coordinator Module
+
+Places tiles across host agents (cluster_agent.py) and keeps them placed.
+
+Agents report their state to the coordinator's HTTP endpoint every few
+seconds. From those reports the coordinator knows which hosts are alive,
+how many tiles each can take and which tiles each one is running. Every
+``check_interval`` seconds it reconciles:
+
+ - an agent not heard from for ``agent_timeout`` seconds is marked down and
+   its tiles are unassigned
+ - an unassigned tile that an agent already runs (e.g. after the
+   coordinator itself restarted) is adopted where it is
+ - every other unassigned tile is launched on the live agent with the most
+   free slots (ties go to the least loaded CPU), once the coordinator has
+   been up for ``settle`` seconds so running agents had time to report
+ - a tile quarantined on its agent, or missing from its agent's reports
+   long after the launch, is moved to another agent
+ - a tile an agent runs while it is assigned to another agent (an agent
+   that comes back after its tiles were moved, or a drained agent), or
+   after it was stopped through the coordinator, is stopped there
+
+Endpoints:
+ - POST /agents/report                 agent state report (JSON body)
+ - GET  /cluster                       agents, assignments and recent events
+
+A host that only lost its network keeps running its tiles until it can
+report again and is told to stop them, so for a short while a moved tile
+can run twice.
+"""
+
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+import collections
+import concurrent.futures
+from typing import Dict, Iterable, List, Optional
+
+from cluster_agent import JSONRequestHandler, http_json, serve
+
+logger = logging.getLogger('LOManager.ClusterCoordinator')
+
+# Constants
+DEFAULT_COORDINATOR_PORT = 8766
+DEFAULT_AGENT_TIMEOUT = 20.0  # seconds without a report before an agent counts as down
+DEFAULT_CHECK_INTERVAL = 2.0  # seconds between reconciliations
+DEFAULT_SETTLE = 10.0  # seconds after start before tiles are placed, so agents can report running tiles
+LAUNCH_GRACE = 30.0  # seconds a launched tile may be missing from its agent's reports
+EVENT_HISTORY_SIZE = 200
+
+
+class AgentInfo:
+    """What the coordinator knows about one agent"""
+    __slots__ = ('name', 'url', 'capacity', 'cpu_percent', 'memory_percent', 'tiles', 'last_seen', 'alive',
+                 'draining')
+
+    def __init__(self, name):
+        self.name = name
+        self.url = None
+        self.capacity = 0
+        self.cpu_percent = 0.0
+        self.memory_percent = 0.0
+        self.tiles: Dict[int, dict] = {}
+        self.last_seen = 0.0
+        self.alive = False
+        self.draining = False
+
+    def describe(self, assigned: List[int]) -> dict:
+        return {"url": self.url, "alive": self.alive, "draining": self.draining, "capacity": self.capacity,
+                "assigned": assigned, "cpu_percent": self.cpu_percent, "memory_percent": self.memory_percent,
+                "last_seen": self.last_seen, "tiles": self.tiles}
+
+
+class ClusterCoordinator:
+    """
+    Keep tiles ``tile_ids`` running across the agents that report in.
+
+    Tiles are only placed after start_all() (or start_tile()), so a
+    coordinator can be brought up and wait for its agents first.
+    """
+
+    def __init__(self, tile_ids: Iterable[int], token: Optional[str] = None,
+                 agent_timeout: float = DEFAULT_AGENT_TIMEOUT, check_interval: float = DEFAULT_CHECK_INTERVAL,
+                 launch_grace: float = LAUNCH_GRACE, settle: float = DEFAULT_SETTLE):
+        self.tile_ids = sorted(tile_ids)
+        self.token = token
+        self.agent_timeout = agent_timeout
+        self.check_interval = check_interval
+        self.launch_grace = launch_grace
+        self.settle = settle
+        self.events = collections.deque(maxlen=EVENT_HISTORY_SIZE)
+        self._agents: Dict[str, AgentInfo] = {}
+        self._assignments: Dict[int, str] = {}
+        self._launched_at: Dict[int, float] = {}
+        self._excluded: Dict[int, set] = {}  # agents a tile was moved away from
+        self._wanted = set()
+        self._stopped = set()  # tiles stopped through the coordinator, stopped wherever they still run
+        self._started_at = time.time()
+        self._lock = threading.Lock()
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix='cluster-request')
+        self._server = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self, host: str = "127.0.0.1", port: int = DEFAULT_COORDINATOR_PORT):
+        """Serve the report endpoint and start reconciling in a background thread"""
+        handler = type('CoordinatorHandler', (_CoordinatorHandler,), {'coordinator': self, 'token': self.token})
+        self._server = serve(handler, host, port, 'cluster-coordinator')
+        self._started_at = time.time()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='cluster-reconcile', daemon=True)
+        self._thread.start()
+        logger.info(f"Cluster coordinator listening on http://{host}:{self._server.server_address[1]} "
+                    f"for {len(self.tile_ids)} tiles")
+        return self._server.server_address[1]
+
+    def stop(self):
+        """Stop serving and reconciling; tiles keep running on their agents"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        self._pool.shutdown(wait=False)
+
+    # ------------------------------------------------------------------
+    # Agent reports
+    # ------------------------------------------------------------------
+    def report(self, state: dict):
+        """Record an agent's state report"""
+        name = state["name"]
+        with self._lock:
+            agent = self._agents.get(name)
+            if agent is None:
+                agent = self._agents[name] = AgentInfo(name)
+            agent.url = state["url"].rstrip('/')
+            agent.capacity = int(state.get("capacity", 0))
+            agent.cpu_percent = state.get("cpu_percent", 0.0)
+            agent.memory_percent = state.get("memory_percent", 0.0)
+            agent.tiles = {int(tile_id): tile for tile_id, tile in state.get("tiles", {}).items()}
+            agent.last_seen = time.time()
+            if not agent.alive:
+                agent.alive = True
+                self._event("agent-up", agent=name, capacity=agent.capacity)
+
+    # ------------------------------------------------------------------
+    # Operations
+    # ------------------------------------------------------------------
+    def start_all(self):
+        """Place every tile"""
+        with self._lock:
+            self._wanted.update(self.tile_ids)
+            self._stopped.clear()
+        self.check_once()
+
+    def stop_all(self):
+        """Stop every tile on its agent and wait for the agents to confirm"""
+        with self._lock:
+            self._wanted.clear()
+            self._stopped.update(self.tile_ids)
+            stops = list(self._assignments.items())
+            self._assignments.clear()
+        self._wait(self._pool.submit(self._agent_call, name, tile_id, "stop") for tile_id, name in stops)
+
+    def start_tile(self, tile_id: int):
+        with self._lock:
+            self._wanted.add(tile_id)
+            self._stopped.discard(tile_id)
+        self.check_once()
+
+    def stop_tile(self, tile_id: int):
+        with self._lock:
+            self._wanted.discard(tile_id)
+            self._stopped.add(tile_id)
+            name = self._assignments.pop(tile_id, None)
+        if name is not None:
+            self._agent_call(name, tile_id, "stop")
+
+    def restart_tile(self, tile_id: int):
+        """Restart a tile on the agent it is assigned to"""
+        with self._lock:
+            name = self._assignments.get(tile_id)
+        if name is None:
+            self.start_tile(tile_id)
+        else:
+            self._agent_call(name, tile_id, "restart")
+
+    def restart_all(self):
+        """Restart every assigned tile on its agent, all at the same time"""
+        with self._lock:
+            restarts = list(self._assignments.items())
+        self._wait(self._pool.submit(self._agent_call, name, tile_id, "restart") for tile_id, name in restarts)
+
+    def drain(self, name: str, draining: bool = True):
+        """Move every tile off an agent (e.g. for maintenance) and place nothing new on it"""
+        with self._lock:
+            agent = self._agents[name]
+            agent.draining = draining
+            if draining:
+                for tile_id in self._tiles_of(name):
+                    self._unassign(tile_id, "drain")
+        self.check_once()
+
+    def is_running(self, tile_id: int) -> bool:
+        """True if the tile's agent last reported it running"""
+        with self._lock:
+            agent = self._agents.get(self._assignments.get(tile_id))
+            return bool(agent and agent.alive and agent.tiles.get(tile_id, {}).get("running"))
+
+    def assignments(self) -> Dict[int, str]:
+        with self._lock:
+            return dict(self._assignments)
+
+    def status(self) -> dict:
+        """Return every agent, the tile assignments and recent events"""
+        with self._lock:
+            return {
+                "agents": {name: agent.describe(self._tiles_of(name)) for name, agent in self._agents.items()},
+                "assignments": dict(self._assignments),
+                "unplaced": sorted(self._wanted - set(self._assignments)),
+                "events": list(self.events),
+            }
+
+    # ------------------------------------------------------------------
+    # Reconciliation
+    # ------------------------------------------------------------------
+    def _run(self):
+        while not self._stop_event.wait(self.check_interval):
+            try:
+                self.check_once()
+            except Exception as e:
+                logger.error(f"Error reconciling the cluster: {e}")
+
+    def check_once(self):
+        """Mark silent agents down, place unassigned tiles and stop tiles running in the wrong place"""
+        now = time.time()
+        launches, stops = [], []
+        with self._lock:
+            for agent in self._agents.values():
+                if agent.alive and now - agent.last_seen > self.agent_timeout:
+                    agent.alive = False
+                    self._event("agent-down", agent=agent.name, silent=round(now - agent.last_seen, 1))
+                    for tile_id in self._tiles_of(agent.name):
+                        self._unassign(tile_id, f"agent {agent.name} down")
+
+            for tile_id, name in list(self._assignments.items()):
+                reported = self._agents[name].tiles.get(tile_id)
+                if reported and reported.get("quarantined"):
+                    self._unassign(tile_id, f"quarantined on {name}")
+                elif reported is None and now - self._launched_at.get(tile_id, now) > self.launch_grace:
+                    self._unassign(tile_id, f"missing on {name}")
+
+            live = [agent for agent in self._agents.values() if agent.alive and not agent.draining]
+            for tile_id in sorted(self._wanted - set(self._assignments)):
+                running = [agent for agent in live if agent.tiles.get(tile_id, {}).get("running")]
+                if running:
+                    self._assignments[tile_id] = running[0].name
+                    self._event("tile-adopted", tile_id=tile_id, agent=running[0].name)
+
+            settled = now - self._started_at >= self.settle
+            for tile_id in sorted(self._wanted - set(self._assignments)) if settled else ():
+                agent = self._place(tile_id)
+                if agent is None:
+                    continue
+                self._assignments[tile_id] = agent.name
+                self._launched_at[tile_id] = now
+                self._event("tile-placed", tile_id=tile_id, agent=agent.name)
+                launches.append((agent.name, tile_id))
+
+            for agent in self._agents.values():
+                if not agent.alive:
+                    continue
+                for tile_id, tile in agent.tiles.items():
+                    if not tile.get("running"):
+                        continue
+                    assigned = self._assignments.get(tile_id)
+                    if (assigned is not None and assigned != agent.name) or tile_id in self._stopped:
+                        stops.append((agent.name, tile_id))
+
+        # Stray copies go down before the new ones come up
+        self._wait(self._pool.submit(self._agent_call, name, tile_id, "stop") for name, tile_id in stops)
+        self._wait(self._pool.submit(self._launch, name, tile_id) for name, tile_id in launches)
+
+    def _place(self, tile_id):
+        """Return the live agent with the most free slots, or None when the cluster is full"""
+        excluded = self._excluded.get(tile_id, set())
+        candidates = [agent for agent in self._agents.values()
+                      if agent.alive and not agent.draining and agent.name not in excluded
+                      and agent.capacity > len(self._tiles_of(agent.name))]
+        if not candidates and excluded:
+            # Rather back on a host it was moved away from than not at all
+            self._excluded.pop(tile_id)
+            return self._place(tile_id)
+        if not candidates:
+            return None
+        return max(candidates, key=lambda agent: (agent.capacity - len(self._tiles_of(agent.name)),
+                                                 -agent.cpu_percent, agent.name))
+
+    def _tiles_of(self, name):
+        return sorted(tile_id for tile_id, assigned in self._assignments.items() if assigned == name)
+
+    def _unassign(self, tile_id, reason):
+        name = self._assignments.pop(tile_id)
+        self._launched_at.pop(tile_id, None)
+        self._excluded.setdefault(tile_id, set()).add(name)
+        self._event("tile-moved", tile_id=tile_id, agent=name, reason=reason)
+
+    def _launch(self, name, tile_id):
+        if self._agent_call(name, tile_id, "launch") is None:
+            with self._lock:
+                if self._assignments.get(tile_id) == name:
+                    self._unassign(tile_id, f"launch on {name} failed")
+
+    def _agent_call(self, name, tile_id, action):
+        with self._lock:
+            agent = self._agents.get(name)
+            url = agent.url if agent else None
+        if url is None:
+            return None
+        try:
+            return http_json("POST", f"{url}/tiles/{tile_id}/{action}", token=self.token,
+                             timeout=max(60.0, self.agent_timeout))
+        except OSError as e:
+            logger.error(f"Could not {action} tile {tile_id} on agent {name}: {e}")
+            return None
+
+    @staticmethod
+    def _wait(futures):
+        concurrent.futures.wait(list(futures))
+
+    def _event(self, kind, **details):
+        event = dict(details, time=time.time(), kind=kind)
+        self.events.append(event)
+        logger.info(f"Cluster {kind}: " + ", ".join(f"{key}={value}" for key, value in details.items()))
+
+
+class _CoordinatorHandler(JSONRequestHandler):
+    """Coordinator API; ``coordinator`` is set on the per-server subclass"""
+    coordinator: ClusterCoordinator = None
+
+    def route(self, method, parts, body):
+        if method == "POST" and parts == ["agents", "report"]:
+            if not isinstance(body, dict) or "name" not in body or "url" not in body:
+                raise ValueError("report needs a JSON body with name and url")
+            self.coordinator.report(body)
+            return 200, {"ok": True}
+        if method == "GET" and parts == ["cluster"]:
+            return 200, self.coordinator.status()
+        return 404, {"error": f"unknown endpoint {method} /{'/'.join(parts)}"}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Place tiles across cluster agents")
+    parser.add_argument('--config', default="config.json")
+    parser.add_argument('--host', help="address to listen on (cluster_host)")
+    parser.add_argument('--port', type=int, help="port to listen on (cluster_port)")
+    parser.add_argument('--tiles', type=int, help="number of tiles (tile_num)")
+    args = parser.parse_args(argv)
+
+    with open(args.config, 'r') as file:
+        config = json.load(file)
+    coordinator = ClusterCoordinator(range(args.tiles or config["tile_num"]), token=config.get("cluster_token"),
+                                     agent_timeout=config.get("cluster_agent_timeout", DEFAULT_AGENT_TIMEOUT),
+                                     check_interval=config.get("cluster_check_interval", DEFAULT_CHECK_INTERVAL),
+                                     settle=config.get("cluster_settle", DEFAULT_SETTLE))
+    coordinator.start(args.host or config.get("cluster_host", "127.0.0.1"),
+                      args.port if args.port is not None else config.get("cluster_port", DEFAULT_COORDINATOR_PORT))
+    coordinator.start_all()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        coordinator.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                        stream=sys.stdout)
+    main()
@@ -0,0 +1,296 @@
+"""
+Control API Module
+
+Loopback HTTP control API for the manager daemon. The GUI and any scripts
+talk to the running manager through it instead of supervising tiles
+in-process, so several clients can attach at once and closing a client
+never affects the tiles.
+
+Endpoints (JSON unless noted):
+ - GET  /status                      manager and per-tile status
+ - GET  /crashes, /boots             crash and time-to-ready statistics
+ - GET  /launches                    last cluster start and cold start times per launch strategy
+ - GET  /limits                      memory/CPU limit breach events (?seconds=N)
+ - GET  /hangs                       hang detections, false positives and detection times
+ - GET  /leaks                       memory trend predictions and leak restarts (?seconds=N)
+ - GET  /cluster                     host agents, tile assignments and placement events (cluster mode)
+ - GET  /server-update               installed vs. remote server build ID (?force=1 skips the cache)
+ - GET  /tiles/<id>/resources        resource samples (?seconds=N)
+ - GET  /logs                        plain text log tail (?name=manager|<log file>&lines=N&follow=1)
+ - POST /tiles/<id>/start|stop|restart|release   one tile (stop/restart take ?countdown=N)
+ - POST /tiles/<id>/redeploy         restart one tile with the current mod set (202, runs in the background)
+ - POST /start, /stop, /restart      all tiles (/restart?mode=full|rolling)
+ - POST /update-mods                 apply mod updates with the configured restart mode
+ - POST /check-updates               list out-of-date mods
+ - POST /validate-server             validate every server file at the next update
+ - POST /rollback-install            restart all tiles on the previously live install root (install_roots)
+ - POST /reload-config               re-read config.json
+
+Orchestration requests (everything that touches all tiles) are queued on a
+single worker and answered with 202 straight away; their progress shows up
+in /status. Single-tile requests run right away, in parallel with those
+for other tiles; each tile's lifecycle state is in /status. Requests need
+the ``X-LOMan-Token`` header when a token is configured.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+import concurrent.futures
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import urlparse, parse_qs
+
+logger = logging.getLogger('LOManager.ControlAPI')
+
+# Constants
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+TOKEN_HEADER = "X-LOMan-Token"
+MANAGER_LOG = "loman.log"
+DEFAULT_LOG_LINES = 200
+FOLLOW_POLL_INTERVAL = 0.5
+TAIL_READ_BYTES = 1024 * 1024
+
+
+class ControlAPIServer:
+    """
+    Serve the control API for ``manager`` (the LastOasisManager module) on a
+    background thread.
+    """
+
+    def __init__(self, manager, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, token: Optional[str] = None,
+                 lock: Optional[threading.RLock] = None):
+        self.manager = manager
+        self.host = host
+        self.port = port
+        self.token = token
+        self._operations = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='operation')
+        self._operation_lock = threading.Lock()
+        # Held while an operation runs, shared with the manager's own update loop
+        self._orchestration_lock = lock or threading.RLock()
+        self._queued = []
+        self.current_operation = None
+        self.last_operation = None
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """Bind the socket and start serving"""
+        handler = type('ControlAPIHandler', (_Handler,), {'api': self})
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name='control-api', daemon=True)
+        self._thread.start()
+        logger.info(f"Control API listening on http://{self.host}:{self.port}")
+
+    def stop(self):
+        """Stop serving; queued operations are dropped"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        self._operations.shutdown(wait=False)
+
+    def submit(self, name: str, func, *args) -> dict:
+        """Queue an orchestration operation behind any that are already running"""
+        with self._operation_lock:
+            self._queued.append(name)
+        self._operations.submit(self._run_operation, name, func, *args)
+        return {"accepted": True, "operation": name, "queued": list(self._queued)}
+
+    def operation_status(self) -> dict:
+        """Return the running, queued and last finished operations"""
+        with self._operation_lock:
+            return {"current": self.current_operation, "queued": list(self._queued), "last": self.last_operation}
+
+    def _run_operation(self, name, func, *args):
+        with self._orchestration_lock:
+            started = time.time()
+            with self._operation_lock:
+                self._queued.remove(name)
+                self.current_operation = {"name": name, "started": started}
+            error = None
+            try:
+                func(*args)
+            except Exception as e:
+                logger.error(f"Operation {name} failed: {e}")
+                error = str(e)
+            with self._operation_lock:
+                self.current_operation = None
+                self.last_operation = {"name": name, "started": started, "finished": time.time(), "error": error}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Route requests to the manager; ``api`` is set on the per-server subclass"""
+    api: ControlAPIServer = None
+    server_version = "LOManager"
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method):
+        if self.api.token and self.headers.get(TOKEN_HEADER) != self.api.token:
+            self._send_json(401, {"error": "missing or invalid token"})
+            return
+
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split('/') if part]
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            if parts[:1] == ["tiles"] and len(parts) == 3:
+                status, body = self._tile_route(method, int(parts[1]), parts[2], query)
+            elif method == "GET" and parts == ["logs"]:
+                self._stream_log(query)
+                return
+            else:
+                status, body = self._route(method, "/".join(parts), query)
+        except ValueError as e:
+            status, body = 400, {"error": str(e)}
+        except Exception as e:
+            logger.error(f"Error handling {method} {self.path}: {e}")
+            status, body = 500, {"error": str(e)}
+        self._send_json(status, body)
+
+    def _route(self, method, path, query):
+        manager = self.api.manager
+        if method == "GET" and path == "status":
+            status = manager.get_status()
+            status["operation"] = self.api.operation_status()
+            return 200, status
+        if method == "GET" and path == "crashes":
+            return 200, manager.get_crash_stats()
+        if method == "GET" and path == "boots":
+            return 200, manager.get_boot_stats()
+        if method == "GET" and path == "launches":
+            return 200, manager.get_launch_stats()
+        if method == "GET" and path == "hangs":
+            return 200, manager.get_hang_stats()
+        if method == "GET" and path == "cluster":
+            return 200, manager.get_cluster_status()
+        if method == "GET" and path == "server-update":
+            return 200, manager.get_server_update_status(query.get("force") in ("1", "true", "yes"))
+        if method == "GET" and path == "leaks":
+            seconds = float(query["seconds"]) if "seconds" in query else None
+            return 200, manager.get_leak_predictions(seconds)
+        if method == "GET" and path == "limits":
+            seconds = float(query["seconds"]) if "seconds" in query else None
+            return 200, manager.get_limit_events(seconds)
+        if method != "POST":
+            return 404, {"error": f"unknown endpoint {method} /{path}"}
+
+        if path == "start":
+            return 202, self.api.submit("start all", manager.start_processes)
+        if path == "stop":
+            return 202, self.api.submit("stop all", manager.stop_processes)
+        if path == "restart":
+            mode = query.get("mode", "full")
+            if mode == "rolling":
+                return 202, self.api.submit("rolling restart", manager.rolling_restart,
+                                            manager.config.get("rolling_batch_size", 1))
+            return 202, self.api.submit("restart all", manager.restart_all_tiles, 1)
+        if path == "update-mods":
+            return 202, self.api.submit("mod update", manager.restart_for_mod_update)
+        if path == "check-updates":
+            out_of_date, _ = manager.check_mod_updates()
+            return 200, {"out_of_date": out_of_date}
+        if path == "validate-server":
+            manager.request_validation()
+            return 200, {"validation_requested": True}
+        if path == "rollback-install":
+            return 202, self.api.submit("install rollback", manager.rollback_install_root, 1)
+        if path == "reload-config":
+            manager.update_config()
+            return 200, {"reloaded": True}
+        return 404, {"error": f"unknown endpoint {method} /{path}"}
+
+    def _tile_route(self, method, tile_id, action, query):
+        manager = self.api.manager
+        if not 0 <= tile_id < manager.config["tile_num"]:
+            return 404, {"error": f"no tile {tile_id}"}
+        if method == "GET" and action == "resources":
+            seconds = float(query["seconds"]) if "seconds" in query else None
+            return 200, manager.get_tile_resources(tile_id, seconds)
+        if method != "POST":
+            return 404, {"error": f"unknown endpoint {method} /tiles/{tile_id}/{action}"}
+        countdown = int(query.get("countdown", 0))
+        if action == "start":
+            manager.start_tile(tile_id)
+        elif action == "restart":
+            manager.restart_tile(tile_id, countdown)
+        elif action == "stop":
+            manager.stop_tile(tile_id, countdown)
+        elif action == "release":
+            manager.release_tile_quarantine(tile_id)
+        elif action == "redeploy":
+            threading.Thread(target=self._run_tile_operation, args=(manager.redeploy_tile_mods, tile_id, countdown),
+                             name=f'redeploy-{tile_id}', daemon=True).start()
+            return 202, {"tile_id": tile_id, "accepted": True}
+        else:
+            return 404, {"error": f"unknown tile action {action}"}
+        return 200, {"tile_id": tile_id, "running": manager.is_tile_running(tile_id),
+                     **manager.tile_registry.describe(tile_id)}
+
+    def _run_tile_operation(self, func, tile_id, *args):
+        registry = self.api.manager.tile_registry
+        try:
+            func(tile_id, *args)
+            registry.set_error(tile_id, None)
+        except Exception as e:
+            logger.error(f"Operation {func.__name__} on tile {tile_id} failed: {e}")
+            registry.set_error(tile_id, str(e))
+
+    def _log_path(self, name):
+        if name in (None, "", "manager"):
+            return MANAGER_LOG
+        # Only plain file names inside the server log folder
+        if os.path.basename(name) != name or not name.endswith('.log'):
+            raise ValueError(f"invalid log name {name!r}")
+        return os.path.join(self.api.manager.server_log_folder(), name)
+
+    def _stream_log(self, query):
+        path = self._log_path(query.get("name"))
+        if not os.path.exists(path):
+            self._send_json(404, {"error": f"log {query.get('name', 'manager')} not found"})
+            return
+        lines = int(query.get("lines", DEFAULT_LOG_LINES))
+        follow = query.get("follow") in ("1", "true", "yes")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.close_connection = True
+
+        with open(path, 'r', errors='replace') as file:
+            # Only the end of the file is needed for the tail
+            size = file.seek(0, os.SEEK_END)
+            file.seek(max(0, size - TAIL_READ_BYTES))
+            tail = file.read().splitlines(keepends=True)[-lines:] if lines > 0 else []
+            try:
+                self.wfile.write("".join(tail).encode('utf-8'))
+                self.wfile.flush()
+                while follow:
+                    chunk = file.read()
+                    if chunk:
+                        self.wfile.write(chunk.encode('utf-8'))
+                        self.wfile.flush()
+                    else:
+                        time.sleep(FOLLOW_POLL_INTERVAL)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # Client went away
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
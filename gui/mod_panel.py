@@ -13,8 +13,9 @@ from PyQt5.QtCore import Qt, QTimer, pyqtSignal, pyqtSlot
 from PyQt5.QtGui import QColor, QBrush
 
 # Import existing mod_checker functionality
-from mod_checker import add_new_mod_ids, read_json, update_mods_info
-import LastOasisManager
+from mod_checker import add_new_mod_ids, format_mod_record, read_json, update_mods_info
+from manager_client import get_client
+from gui.server_panel import ManagerCalls
 
 logger = logging.getLogger('LOManagerGUI.ModPanel')
 
@@ -29,6 +30,7 @@ class ModPanel(QWidget):
         super().__init__(parent)
         self.config = {}
         self.mods_info = {}
+        self.calls = ManagerCalls(self)
         self.initUI()
     
     def initUI(self):
@@ -97,7 +99,8 @@ class ModPanel(QWidget):
     def parse_mod_info(self, mod_info_str):
         """
         Parse the mod info string into component parts
-        Expected format: "size\ncreation date\nupdate date"
+        Expected format: "size\ncreation date\nupdate date", or a version
+        record from the manifest-based update check
         """
         result = {
             'size': 'Unknown',
@@ -105,6 +108,8 @@ class ModPanel(QWidget):
             'update_date': 'Unknown'
         }
         
+        if isinstance(mod_info_str, dict):
+            mod_info_str = format_mod_record(mod_info_str)
         if mod_info_str:
             try:
                 parts = mod_info_str.split('\n')
@@ -149,8 +154,9 @@ class ModPanel(QWidget):
                     version = mod_info['size']  # Use size as version display
                     last_update = mod_info['update_date']
                     
-                    # For name, just use the mod ID for now
-                    # In future could fetch actual name from Steam
+                    # Version records from the manifest-based check carry the title
+                    if isinstance(mod_info_str, dict) and mod_info_str.get('title'):
+                        name = mod_info_str['title']
                 
                 # Add a new row
                 self.modTable.insertRow(i)
@@ -350,7 +356,8 @@ class ModPanel(QWidget):
                 
             out_of_date, self.mods_info = update_mods_info(
                 self.mods_info,
-                mod_ids
+                mod_ids,
+                None if self.config.get("mod_check_mode") == "scrape" else self.config.get("steam_cmd_path")
             )
             
             # Save updated mod info back to file
@@ -376,8 +383,15 @@ class ModPanel(QWidget):
         )
         
         if confirm == QMessageBox.Yes:
-            LastOasisManager.restart_all_tiles(1)
-            self.loadModsInfo()  # Refresh the UI after update
+            # The daemon runs the update in the background
+            self.calls.run(get_client(self.config).update_mods, self.onModUpdateStarted)
+
+    def onModUpdateStarted(self, result, error):
+        """Report a mod update the daemon did not accept"""
+        if error:
+            logger.error(f"Error starting mod update: {error}")
+            QMessageBox.critical(self, "Error", f"Failed to start mod update: {str(error)}")
+        self.loadModsInfo()  # Refresh the UI after update
 
     def onViewOnSteamClicked(self):
         """Handle view on Steam button click"""
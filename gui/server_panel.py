@@ -9,22 +9,56 @@ from PyQt5.QtWidgets import (
     QTableWidget, QTableWidgetItem, QHeaderView,
     QMessageBox
 )
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal, pyqtSlot
+from PyQt5.QtCore import Qt, QTimer, QObject, pyqtSignal, pyqtSlot
 from PyQt5.QtGui import QColor, QBrush
 
-# Import existing LastOasisManager functionality
-import LastOasisManager
+# Tiles are run by the manager daemon; the panel talks to it through the control API
+from manager_client import get_client, ManagerUnavailable
 from TileTracker import get_tracker
 
 logger = logging.getLogger('LOManagerGUI.ServerPanel')
 
+
+class ManagerCalls(QObject):
+    """
+    Runs manager_client calls on a background thread, since they can block
+    for up to a minute, and hands each result back on the GUI thread as
+    handler(result, error). Handlers of a deleted parent widget never run.
+    """
+    finished = pyqtSignal(object, object, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.finished.connect(self._deliver)
+
+    def run(self, call, handler=None):
+        threading.Thread(target=self._call, args=(call, handler), daemon=True).start()
+
+    def _call(self, call, handler):
+        try:
+            result, error = call(), None
+        except Exception as e:
+            result, error = None, e
+        try:
+            self.finished.emit(handler, result, error)
+        except RuntimeError:
+            pass  # the widget was deleted while the call ran
+
+    @pyqtSlot(object, object, object)
+    def _deliver(self, handler, result, error):
+        if handler:
+            handler(result, error)
+
+
 class ServerStatusWidget(QFrame):
     """Widget to display status of an individual server tile"""
     
-    def __init__(self, tile_id, parent=None, server_id=None):
+    def __init__(self, tile_id, identifier, parent=None, client=None):
         super().__init__(parent)
         self.tile_id = tile_id
-        self.server_id = server_id or f"{LastOasisManager.config.get('identifier', 'Disc0oasis')}{tile_id}"
+        self.server_id = f"{identifier}{tile_id}"
+        self.client = client or get_client()
+        self.calls = ManagerCalls(self)
         self.status = "Unknown"
         self.tile_name = f"Tile {tile_id}"
         
@@ -44,6 +78,14 @@ class ServerStatusWidget(QFrame):
         # Status indicator
         self.statusLabel = QLabel(f"Status: {self.status}")
         self.statusLabel.setAlignment(Qt.AlignCenter)
+
+        # Running operation and the error of the last failed one, from the daemon
+        self.operationLabel = QLabel("")
+        self.operationLabel.setAlignment(Qt.AlignCenter)
+        self.errorLabel = QLabel("")
+        self.errorLabel.setAlignment(Qt.AlignCenter)
+        self.errorLabel.setWordWrap(True)
+        self.errorLabel.setStyleSheet("color: red;")
         
         # Control buttons
         buttonsLayout = QHBoxLayout()
@@ -64,6 +106,8 @@ class ServerStatusWidget(QFrame):
         # Add all widgets to layout
         layout.addWidget(self.nameLabel)
         layout.addWidget(self.statusLabel)
+        layout.addWidget(self.operationLabel)
+        layout.addWidget(self.errorLabel)
         layout.addLayout(buttonsLayout)
         
         self.setLayout(layout)
@@ -77,7 +121,7 @@ class ServerStatusWidget(QFrame):
         self.nameLabel.setText(f"{self.tile_name} ({self.server_id})")
         
         # Update UI based on status
-        if self.status.lower() == "running":
+        if self.status.lower() in ("running", "ready"):
             self.statusLabel.setStyleSheet("color: green;")
             self.startButton.setEnabled(False)
             self.stopButton.setEnabled(True)
@@ -97,12 +141,36 @@ class ServerStatusWidget(QFrame):
             self.startButton.setEnabled(False)
             self.stopButton.setEnabled(False)
             self.restartButton.setEnabled(False)
+        elif self.status.lower() == "draining":
+            self.statusLabel.setStyleSheet("color: orange;")
+            self.startButton.setEnabled(False)
+            self.stopButton.setEnabled(True)
+            self.restartButton.setEnabled(False)
+        elif self.status.lower() == "crashed":
+            self.statusLabel.setStyleSheet("color: red;")
+            self.startButton.setEnabled(True)
+            self.stopButton.setEnabled(True)
+            self.restartButton.setEnabled(True)
         else:
             self.statusLabel.setStyleSheet("")
             self.startButton.setEnabled(True)
             self.stopButton.setEnabled(True)
             self.restartButton.setEnabled(True)
         
+    def updateLifecycle(self, tile):
+        """Show a tile's status from the daemon: lifecycle state, running operation and last error"""
+        lifecycle = tile.get("lifecycle") or {}
+        state = lifecycle.get("state")
+        if state is None or (tile.get("running") and state in ("stopped", "crashed")):
+            # Older daemons report no lifecycle; a running process wins over a stale stopped state
+            state = "running" if tile.get("running") else "stopped"
+        self.updateStatus(state.capitalize())
+        operation = lifecycle.get("operation")
+        self.operationLabel.setText(f"{operation} in progress" if operation else "")
+        error = lifecycle.get("last_error")
+        self.errorLabel.setText(f"Last error: {error}" if error else "")
+        self.errorLabel.setToolTip(error or "")
+
     def updateTileName(self, tracker=None):
         """Update the tile name from the tracker"""
         if tracker:
@@ -116,41 +184,28 @@ class ServerStatusWidget(QFrame):
         """Handle start button click"""
         logger.info(f"Starting tile {self.tile_id}")
         self.updateStatus("Starting")
-        try:
-            LastOasisManager.start_single_process(self.tile_id)
-        except Exception as e:
-            logger.error(f"Error starting tile {self.tile_id}: {e}")
-            self.updateStatus("Error")
+        self.calls.run(lambda: self.client.start_tile(self.tile_id), self.onActionDone("starting"))
     
     def onStopClicked(self):
         """Handle stop button click"""
         logger.info(f"Stopping tile {self.tile_id}")
         self.updateStatus("Stopping")
-        try:
-            # Stop the specific process for this tile
-            if self.tile_id < len(LastOasisManager.processes):
-                if LastOasisManager.stop_events[self.tile_id] is not None:
-                    LastOasisManager.stop_events[self.tile_id].set()
-                if LastOasisManager.processes[self.tile_id] is not None:
-                    LastOasisManager.processes[self.tile_id].join()
-                # Set to None instead of removing
-                LastOasisManager.stop_events[self.tile_id] = None
-                LastOasisManager.processes[self.tile_id] = None
-            else:
-                logger.warning(f"Process index {self.tile_id} out of range")
-        except Exception as e:
-            logger.error(f"Error stopping tile {self.tile_id}: {e}")
-            self.updateStatus("Error")
+        # Stop the specific process for this tile
+        self.calls.run(lambda: self.client.stop_tile(self.tile_id), self.onActionDone("stopping"))
     
     def onRestartClicked(self):
         """Handle restart button click"""
         logger.info(f"Restarting tile {self.tile_id}")
         self.updateStatus("Restarting")
-        try:
-            LastOasisManager.restart_all_tiles(1)
-        except Exception as e:
-            logger.error(f"Error restarting tile {self.tile_id}: {e}")
-            self.updateStatus("Error")
+        self.calls.run(lambda: self.client.restart_tile(self.tile_id), self.onActionDone("restarting"))
+
+    def onActionDone(self, action):
+        """Handler for a finished start, stop or restart request"""
+        def done(result, error):
+            if error:
+                logger.error(f"Error {action} tile {self.tile_id}: {error}")
+                self.updateStatus("Error")
+        return done
 
 
 class ServerPanel(QWidget):
@@ -160,6 +215,9 @@ class ServerPanel(QWidget):
         super().__init__(parent)
         self.config = {}
         self.server_widgets = []
+        self.client = get_client()
+        self.calls = ManagerCalls(self)
+        self.status_pending = False
         # Initialize TileTracker
         self.tile_tracker = get_tracker()
         self.initUI()
@@ -212,6 +270,7 @@ class ServerPanel(QWidget):
     def setConfig(self, config):
         """Set configuration and update UI accordingly"""
         self.config = config
+        self.client = get_client(config)
         
         # Re-initialize tile tracker with updated config
         self.tile_tracker = get_tracker(
@@ -238,8 +297,7 @@ class ServerPanel(QWidget):
             
             for i in range(tile_num):
                 # Create server ID for TileTracker lookup
-                server_id = f"{config.get('identifier', 'Disc0oasis')}{i}"
-                server_widget = ServerStatusWidget(i, server_id=server_id)
+                server_widget = ServerStatusWidget(i, config["identifier"], client=self.client)
                 # Update tile name from tracker
                 if self.tile_tracker:
                     server_widget.updateTileName(self.tile_tracker)
@@ -257,36 +315,39 @@ class ServerPanel(QWidget):
         if self.tile_tracker:
             self.tile_tracker.scan_logs_for_tile_names()
             
-        server_count = len(self.server_widgets)
-        if server_count > 0:
+        # One status request covers every tile; skip a poll while the last one is still out
+        if self.server_widgets and not self.status_pending:
+            self.status_pending = True
+            self.calls.run(self.client.status, self.onStatusFetched)
+
+    def onStatusFetched(self, status, error):
+        """Show the tile states reported by the manager daemon"""
+        self.status_pending = False
+        if self.server_widgets:
             running = 0
             stopped = 0
+
+            if isinstance(error, ManagerUnavailable):
+                for widget in self.server_widgets:
+                    widget.updateStatus("Unknown")
+                self.summaryLabel.setText("Manager daemon is not running")
+                return
+            if error:
+                logger.error(f"Error fetching server status: {error}")
+                return
+            tiles = status["tiles"]
             
             for widget in self.server_widgets:
-                # Check if this specific tile has a running process
-                is_running = (
-                    len(LastOasisManager.processes) > widget.tile_id and
-                    LastOasisManager.processes[widget.tile_id] is not None and
-                    LastOasisManager.processes[widget.tile_id].is_alive()
-                )
+                tile = tiles.get(widget.tile_id, {})
                 
                 # Update tile name from tracker first
                 if self.tile_tracker:
                     widget.updateTileName(self.tile_tracker)
                 
-                if is_running:
-                    if widget.status != "Running":
-                        widget.updateStatus("Running")
-                    else:
-                        # Force UI update for consistency even if status didn't change
-                        widget.updateStatus(widget.status)
+                widget.updateLifecycle(tile)
+                if tile.get("running", False):
                     running += 1
                 else:
-                    if widget.status != "Stopped":
-                        widget.updateStatus("Stopped")
-                    else:
-                        # Force UI update for consistency even if status didn't change
-                        widget.updateStatus(widget.status)
                     stopped += 1
                     
             self.summaryLabel.setText(f"Servers: {running} running, {stopped} stopped")
@@ -301,13 +362,9 @@ class ServerPanel(QWidget):
         )
         
         if confirm == QMessageBox.Yes:
-            try:
-                LastOasisManager.start_processes()
-                for widget in self.server_widgets:
-                    widget.updateStatus("Starting")
-            except Exception as e:
-                logger.error(f"Error starting servers: {e}")
-                QMessageBox.critical(self, "Error", f"Failed to start servers: {str(e)}")
+            for widget in self.server_widgets:
+                widget.updateStatus("Starting")
+            self.calls.run(self.client.start_all, self.onActionDone("starting", "start"))
 
     def onStopAllClicked(self):
         """Handle stop all button click"""
@@ -319,13 +376,9 @@ class ServerPanel(QWidget):
         )
         
         if confirm == QMessageBox.Yes:
-            try:
-                LastOasisManager.stop_processes()
-                for widget in self.server_widgets:
-                    widget.updateStatus("Stopping")
-            except Exception as e:
-                logger.error(f"Error stopping servers: {e}")
-                QMessageBox.critical(self, "Error", f"Failed to stop servers: {str(e)}")
+            for widget in self.server_widgets:
+                widget.updateStatus("Stopping")
+            self.calls.run(self.client.stop_all, self.onActionDone("stopping", "stop"))
     def onRestartAllClicked(self):
         """Handle restart all button click"""
         logger.info("Restarting all servers")
@@ -336,35 +389,44 @@ class ServerPanel(QWidget):
         )
         
         if confirm == QMessageBox.Yes:
-            try:
-                LastOasisManager.restart_all_tiles(1)
-                for widget in self.server_widgets:
-                    widget.updateStatus("Restarting")
-            except Exception as e:
-                logger.error(f"Error restarting servers: {e}")
-                QMessageBox.critical(self, "Error", f"Failed to restart servers: {str(e)}")
+            for widget in self.server_widgets:
+                widget.updateStatus("Restarting")
+            self.calls.run(self.client.restart_all, self.onActionDone("restarting", "restart"))
     
+    def onActionDone(self, action, verb):
+        """Handler for a finished start, stop or restart of all servers"""
+        def done(result, error):
+            if error:
+                logger.error(f"Error {action} servers: {error}")
+                QMessageBox.critical(self, "Error", f"Failed to {verb} servers: {str(error)}")
+        return done
+
     def onCheckUpdatesClicked(self):
         """Handle check for updates button click"""
         logger.info("Checking for updates")
-        try:
-            out_of_date, _ = LastOasisManager.check_mod_updates()
-            if out_of_date:
-                result = QMessageBox.question(
-                    self, 
-                    "Updates Available",
-                    f"Found {len(out_of_date)} mods that need updates. Do you want to update them now?",
-                    QMessageBox.Yes | QMessageBox.No,
-                    QMessageBox.Yes
-                )
-                if result == QMessageBox.Yes:
-                    LastOasisManager.restart_all_tiles(1)
-            else:
-                QMessageBox.information(
-                    self,
-                    "No Updates",
-                    "All mods are up to date."
-                )
-        except Exception as e:
-            logger.error(f"Error checking for updates: {e}")
-            QMessageBox.critical(self, "Error", f"Failed to check for updates: {str(e)}")
+        # A mod check can take minutes; the button is enabled again when it is done
+        self.checkUpdatesButton.setEnabled(False)
+        self.calls.run(self.client.check_updates, self.onUpdatesChecked)
+
+    def onUpdatesChecked(self, out_of_date, error):
+        """Offer to update the mods the manager daemon found out of date"""
+        self.checkUpdatesButton.setEnabled(True)
+        if error:
+            logger.error(f"Error checking for updates: {error}")
+            QMessageBox.critical(self, "Error", f"Failed to check for updates: {str(error)}")
+        elif out_of_date:
+            result = QMessageBox.question(
+                self, 
+                "Updates Available",
+                f"Found {len(out_of_date)} mods that need updates. Do you want to update them now?",
+                QMessageBox.Yes | QMessageBox.No,
+                QMessageBox.Yes
+            )
+            if result == QMessageBox.Yes:
+                self.calls.run(self.client.update_mods, self.onActionDone("updating mods on", "update mods on"))
+        else:
+            QMessageBox.information(
+                self,
+                "No Updates",
+                "All mods are up to date."
+            )
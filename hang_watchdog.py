@@ -0,0 +1,280 @@
+"""
+Hang Watchdog Module
+
+Finds tiles whose process is still alive but that stopped doing anything,
+e.g. a deadlocked server, which the supervisor alone never notices.
+
+Three activity signals are tracked for every ready tile:
+ - query: the tile answers an A2S_INFO query on its query port
+ - log: the tile's log file in the log folder keeps being written
+ - cpu: the tile's process tree uses more than ``cpu_idle`` percent CPU
+
+A signal only counts once it has been seen active for the current process,
+so a tile with a blocked query port is judged on the other two. A tile is
+declared hung when at least ``min_signals`` signals are available and every
+one of them has been silent for ``window`` seconds. Before acting, one last
+query with a longer timeout is sent; an answer counts as a false positive
+and the tile is left alone, otherwise ``on_hang`` restarts it.
+"""
+
+import os
+import time
+import socket
+import logging
+import threading
+import collections
+import concurrent.futures
+from typing import Callable, Dict, List, Optional
+
+from readiness import A2S_INFO_REQUEST, A2S_CHALLENGE_RESPONSE, SERVER_ID_RE
+
+logger = logging.getLogger('LOManager.Watchdog')
+
+# Constants
+DEFAULT_INTERVAL = 10.0  # seconds between checks
+DEFAULT_WINDOW = 180.0  # seconds every signal must be silent before a tile counts as hung
+DEFAULT_MIN_SIGNALS = 2  # signals that must be available before a tile can be declared hung
+DEFAULT_CPU_IDLE = 1.0  # CPU percent under which a tile counts as idle
+QUERY_TIMEOUT = 2.0
+CONFIRM_TIMEOUT = 5.0  # the final query before a restart gets longer to answer
+LOG_HEADER_BYTES = 64 * 1024  # the -identifier= line is near the top of the log
+EVENT_HISTORY_SIZE = 200
+SIGNALS = ("query", "log", "cpu")
+
+
+def a2s_ping(host: str, port: int, timeout: float = QUERY_TIMEOUT) -> bool:
+    """Return True if an A2S_INFO query to ``host:port`` is answered within ``timeout``"""
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect((host, port))
+            sock.send(A2S_INFO_REQUEST)
+            data = sock.recv(4096)
+            if len(data) >= 5 and data[4] == A2S_CHALLENGE_RESPONSE:
+                sock.send(A2S_INFO_REQUEST + data[5:9])
+                data = sock.recv(4096)
+            return bool(data)
+    except OSError:
+        return False
+
+
+class _TileState:
+    """Last time each signal was seen active for one tile process"""
+    __slots__ = ('pid', 'since', 'last_active', 'suspect_since')
+
+    def __init__(self, pid, since):
+        self.pid = pid
+        self.since = since  # activity from before this is not the current process
+        self.last_active: Dict[str, float] = {}
+        self.suspect_since = None
+
+
+class HangWatchdog:
+    """
+    Check every ready tile for signs of life at a fixed interval.
+
+    ``get_pids`` returns {tile_id: pid} of the running tiles, ``is_ready``
+    tells whether a tile finished booting, ``sampler`` is the manager's
+    ResourceSampler (or None) and ``on_hang(tile_id, event)`` restarts a hung
+    tile. ``server_ids`` maps tile ids to their -identifier values and
+    ``query_ports`` to their A2S query ports.
+    """
+
+    def __init__(self, get_pids: Callable[[], Dict[int, int]], is_ready: Callable[[int], bool],
+                 on_hang: Callable, server_ids: Dict[int, str], query_ports: Dict[int, int],
+                 log_folder: Optional[str] = None, sampler=None, query_host: str = "127.0.0.1",
+                 interval: float = DEFAULT_INTERVAL, window: float = DEFAULT_WINDOW,
+                 min_signals: int = DEFAULT_MIN_SIGNALS, cpu_idle: float = DEFAULT_CPU_IDLE):
+        self.get_pids = get_pids
+        self.is_ready = is_ready
+        self.on_hang = on_hang
+        self.server_ids = server_ids
+        self.query_ports = query_ports
+        self.log_folder = log_folder
+        self.sampler = sampler
+        self.query_host = query_host
+        self.interval = interval
+        self.window = window
+        self.min_signals = min_signals
+        self.cpu_idle = cpu_idle
+        self.events = collections.deque(maxlen=EVENT_HISTORY_SIZE)
+        self._tiles: Dict[int, _TileState] = {}
+        self._log_ids: Dict[str, tuple] = {}  # path -> (size when read, server_id)
+        self._counts = collections.Counter()
+        self._detection_times: List[float] = []
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix='watchdog-query')
+
+    def start(self):
+        """Start watching in a background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='hang-watchdog', daemon=True)
+        self._thread.start()
+        logger.info(f"Hang watchdog started (window {self.window:.0f}s, {self.min_signals} signals)")
+
+    def stop(self):
+        """Stop the background thread"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._pool.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        """
+        Return how often tiles were declared hung and restarted, how many
+        suspected hangs turned out to be false positives or recovered on
+        their own, and the mean seconds from last activity to detection.
+        """
+        times = self._detection_times
+        return {
+            "hangs": self._counts["hang"],
+            "false_positives": self._counts["false-positive"],
+            "recovered": self._counts["recovered"],
+            "mean_detection_time": sum(times) / len(times) if times else None,
+            "max_detection_time": max(times) if times else None,
+            "events": list(self.events),
+        }
+
+    def silent_for(self, tile_id: int, now: Optional[float] = None) -> Dict[str, float]:
+        """Return seconds since each available signal of a tile was last active"""
+        state = self._tiles.get(tile_id)
+        if state is None:
+            return {}
+        now = time.time() if now is None else now
+        return {signal: now - last for signal, last in state.last_active.items()}
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.check_once()
+            except Exception as e:
+                logger.error(f"Error checking tiles for hangs: {e}")
+
+    def check_once(self):
+        """Update every ready tile's signals once and act on hung tiles"""
+        now = time.time()
+        pids = self.get_pids()
+        for tile_id in list(self._tiles):
+            if tile_id not in pids:
+                del self._tiles[tile_id]
+        watched = {}
+        for tile_id, pid in pids.items():
+            state = self._tiles.get(tile_id)
+            if state is None or state.pid != pid:
+                state = self._tiles[tile_id] = _TileState(pid, now)
+            if self.is_ready(tile_id):
+                watched[tile_id] = state
+        if not watched:
+            return
+
+        answers = dict(zip(watched, self._pool.map(self._ping, watched)))
+        log_times = self._log_write_times()
+        for tile_id, state in watched.items():
+            if answers[tile_id]:
+                state.last_active["query"] = now
+            log_time = log_times.get(self.server_ids.get(tile_id))
+            if log_time is not None and log_time >= state.since:
+                state.last_active["log"] = max(state.last_active.get("log", 0.0), log_time)
+            cpu_time = self._last_cpu_activity(tile_id)
+            if cpu_time is not None and cpu_time >= state.since:
+                state.last_active["cpu"] = max(state.last_active.get("cpu", 0.0), cpu_time)
+            self._evaluate(tile_id, state, now)
+
+    def _evaluate(self, tile_id, state, now):
+        silent = {signal: now - last for signal, last in state.last_active.items()}
+        if len(silent) < self.min_signals:
+            return
+        quiet = min(silent.values())
+        if quiet < self.window / 2:
+            if state.suspect_since is not None:
+                self._event("recovered", tile_id, silent, now - state.suspect_since)
+                state.suspect_since = None
+            return
+        if state.suspect_since is None:
+            state.suspect_since = now
+            logger.info(f"Tile {tile_id} quiet for {quiet:.0f}s: " + self._describe(silent))
+        if quiet < self.window:
+            return
+
+        port = self.query_ports.get(tile_id)
+        if port and a2s_ping(self.query_host, port, CONFIRM_TIMEOUT):
+            state.last_active["query"] = time.time()
+            state.suspect_since = None
+            self._event("false-positive", tile_id, silent, quiet)
+            return
+
+        # Detection time runs from the last sign of life until the hang is confirmed
+        detection = time.time() - (now - quiet)
+        self._detection_times.append(detection)
+        event = self._event("hang", tile_id, silent, detection)
+        # Judge the relaunched process from scratch
+        del self._tiles[tile_id]
+        try:
+            self.on_hang(tile_id, event)
+        except Exception as e:
+            logger.error(f"Error restarting hung tile {tile_id}: {e}")
+
+    def _ping(self, tile_id):
+        port = self.query_ports.get(tile_id)
+        return bool(port) and a2s_ping(self.query_host, port)
+
+    def _last_cpu_activity(self, tile_id):
+        if self.sampler is None:
+            return None
+        samples = self.sampler.window(tile_id, self.window)
+        active = [sample["time"] for sample in samples if sample["cpu_percent"] >= self.cpu_idle]
+        return active[-1] if active else None
+
+    def _log_write_times(self) -> Dict[str, float]:
+        """Return {server_id: last modification time} of the logs in the log folder"""
+        if not self.log_folder:
+            return {}
+        result = {}
+        try:
+            with os.scandir(self.log_folder) as entries:
+                logs = [entry for entry in entries if entry.name.endswith('.log') and '-backup-' not in entry.name]
+        except OSError:
+            return {}
+        for entry in logs:
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            server_id = self._log_server_id(entry.path, stat.st_size)
+            if server_id:
+                result[server_id] = max(result.get(server_id, 0.0), stat.st_mtime)
+        return result
+
+    def _log_server_id(self, path, size):
+        cached = self._log_ids.get(path)
+        # A smaller file than last time is a new log, possibly of another tile
+        if cached is not None and cached[1] and size >= cached[0]:
+            return cached[1]
+        server_id = None
+        try:
+            with open(path, 'r', errors='ignore') as file:
+                match = SERVER_ID_RE.search(file.read(LOG_HEADER_BYTES))
+            server_id = match.group(1) if match else None
+        except OSError:
+            pass
+        self._log_ids[path] = (size, server_id)
+        return server_id
+
+    def _event(self, kind, tile_id, silent, seconds):
+        event = {"time": time.time(), "tile_id": tile_id, "kind": kind, "seconds": round(seconds, 1),
+                 "silent": {signal: round(value, 1) for signal, value in silent.items()}}
+        self.events.append(event)
+        self._counts[kind] += 1
+        message = f"Tile {tile_id} {kind} after {seconds:.0f}s: " + self._describe(silent)
+        if kind == "hang":
+            logger.warning(message)
+        else:
+            logger.info(message)
+        return event
+
+    @staticmethod
+    def _describe(silent):
+        return ", ".join(f"{signal} silent {silent[signal]:.0f}s" for signal in SIGNALS if signal in silent)
@@ -0,0 +1,118 @@
+"""
+Install Roots Module
+
+Blue/green server installs: two complete copies of the dedicated server,
+one live and one spare. A game patch is downloaded into the spare root with
+SteamCMD's ``+force_install_dir`` while the tiles keep running on the live
+one; the restart then only has to stop every tile and launch it again from
+the other root. The root that was live stays untouched, so going back to it
+(rollback) is another plain restart.
+
+Which root is live, and which one was live before, is kept in a small JSON
+state file so it survives manager restarts.
+"""
+
+import os
+import json
+import time
+import shutil
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger('LOManager.InstallRoots')
+
+# Constants
+DEFAULT_BINARIES_PATH = "Mist/Binaries/Win64/"  # server executable folder inside a root
+CARRIED_OVER_PATHS = ("Mist/Saved/Config",)  # per-tile server settings that follow the tiles to a new root
+
+
+class InstallRoots:
+    """
+    The live and the spare server install root.
+
+    ``roots`` are the two install directories (what SteamCMD gets as
+    ``+force_install_dir``); ``binaries_path`` is the server executable's
+    folder inside a root.
+    """
+
+    def __init__(self, roots: List[str], state_file: Optional[str] = None,
+                 binaries_path: str = DEFAULT_BINARIES_PATH):
+        if len(roots) != 2:
+            raise ValueError(f"install_roots needs exactly two directories, got {len(roots)}")
+        self.roots = [os.path.join(root, "") for root in roots]
+        self.state_file = state_file
+        self.binaries_path = binaries_path
+        self.active = self.roots[0]
+        self.previous = None
+        self.switched_at = None
+        self._load()
+
+    @property
+    def inactive(self) -> str:
+        return self.roots[1] if self.active == self.roots[0] else self.roots[0]
+
+    def folder_path(self, root: Optional[str] = None) -> str:
+        """Return the server executable folder inside ``root`` (default: the live root)"""
+        return os.path.join(root or self.active, self.binaries_path)
+
+    def switch(self, root: str):
+        """Make ``root`` the live root, remembering the current one for rollback"""
+        root = os.path.join(root, "")
+        if root not in self.roots:
+            raise ValueError(f"{root} is not one of the install roots {self.roots}")
+        if root == self.active:
+            return
+        self.carry_over(self.active, root)
+        self.previous, self.active = self.active, root
+        self.switched_at = time.time()
+        self._save()
+        logger.info(f"Live install root is now {self.active} (was {self.previous})")
+
+    def rollback_target(self) -> Optional[str]:
+        """Return the root that was live before the last switch, if there is one"""
+        return self.previous if self.previous and self.previous != self.active else None
+
+    def carry_over(self, source: str, target: str):
+        """Copy the tiles' server settings from one root to the other"""
+        for path in CARRIED_OVER_PATHS:
+            src = os.path.join(source, path)
+            if os.path.isdir(src):
+                try:
+                    # By hand: copytree only merges into an existing folder from Python 3.8 on
+                    for folder, _, names in os.walk(src):
+                        dest = os.path.join(target, path, os.path.relpath(folder, src))
+                        os.makedirs(dest, exist_ok=True)
+                        for name in names:
+                            shutil.copy2(os.path.join(folder, name), os.path.join(dest, name))
+                except OSError as e:
+                    logger.error(f"Could not copy {src} to {target}: {e}")
+
+    def describe(self) -> dict:
+        return {"roots": self.roots, "active": self.active, "inactive": self.inactive,
+                "previous": self.previous, "switched_at": self.switched_at}
+
+    def _load(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r') as file:
+                state = json.load(file)
+        except (IOError, ValueError) as e:
+            logger.error(f"Could not read {self.state_file}: {e}")
+            return
+        active = os.path.join(state.get("active", ""), "")
+        if active in self.roots:
+            self.active = active
+            previous = state.get("previous")
+            self.previous = os.path.join(previous, "") if previous else None
+            self.switched_at = state.get("switched_at")
+
+    def _save(self):
+        if not self.state_file:
+            return
+        try:
+            with open(self.state_file, 'w') as file:
+                json.dump({"active": self.active, "previous": self.previous, "switched_at": self.switched_at},
+                          file, indent=2)
+        except IOError as e:
+            logger.error(f"Could not save {self.state_file}: {e}")
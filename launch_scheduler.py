@@ -0,0 +1,218 @@
+"""
+Launch Scheduler Module
+
+Staggers the start of a cluster so N tiles do not all load their paks and
+mods from disk at the same moment. At most ``max_concurrent`` tiles boot at
+once; the next tile is launched as soon as a booting one reports ready (or
+runs out of time). Tiles listed in ``first`` (e.g. the hub tile) are
+launched on their own and waited for before anything else starts.
+
+Launch gates:
+ - "ready": only the boot slots limit launches
+ - "load": a free boot slot also has to wait until host CPU use drops
+   below ``load_threshold``, for at most ``boot_timeout`` seconds per launch
+
+The time from the first launch until every tile is ready is recorded per
+strategy, so cold start times of different settings can be compared.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+import collections
+import concurrent.futures
+from typing import Callable, Dict, List, Optional
+
+import psutil
+
+logger = logging.getLogger('LOManager.LaunchScheduler')
+
+# Constants
+DEFAULT_BOOT_TIMEOUT = 600.0  # a tile not ready after this long frees its boot slot anyway
+DEFAULT_LOAD_THRESHOLD = 85.0  # host CPU percent under which the "load" gate lets a launch through
+LOAD_SAMPLE_INTERVAL = 1.0
+LAUNCH_HISTORY_SIZE = 20  # cold starts kept per strategy
+GATES = ("ready", "load")
+
+
+class LaunchScheduler:
+    """
+    Launch a set of tiles with a limited number booting at once.
+
+    ``launch(tile_id)`` starts a tile and ``wait_ready(tile_id, timeout)``
+    blocks until it is ready, returning a true value, or None on timeout.
+    With ``max_concurrent`` 0 every tile is launched straight away.
+    """
+
+    def __init__(self, launch: Callable[[int], object], wait_ready: Callable[[int, float], object],
+                 max_concurrent: int = 0, first: Optional[List[int]] = None, gate: str = "ready",
+                 load_threshold: float = DEFAULT_LOAD_THRESHOLD, boot_timeout: float = DEFAULT_BOOT_TIMEOUT,
+                 get_load: Optional[Callable[[], float]] = None, history_file: Optional[str] = None):
+        if gate not in GATES:
+            raise ValueError(f"Unknown launch gate {gate!r}, expected one of {GATES}")
+        self.launch = launch
+        self.wait_ready = wait_ready
+        self.max_concurrent = max(0, max_concurrent)
+        self.first = list(first or [])
+        self.gate = gate
+        self.load_threshold = load_threshold
+        self.boot_timeout = boot_timeout
+        self.get_load = get_load or (lambda: psutil.cpu_percent(interval=LOAD_SAMPLE_INTERVAL))
+        self.history_file = history_file
+        self._lock = threading.Lock()
+        self._history: Dict[str, collections.deque] = {}
+        self._load()
+
+    @property
+    def strategy(self) -> str:
+        """Short name of the current settings, used to group cold start times"""
+        if not self.max_concurrent and not self.first:
+            return "all-at-once"
+        parts = [f"{self.max_concurrent or 'all'}-at-a-time"]
+        if self.first:
+            parts.append("first-" + "-".join(str(tile_id) for tile_id in self.first))
+        if self.gate == "load":
+            parts.append(f"load<{self.load_threshold:g}%")
+        return ",".join(parts)
+
+    def run(self, tile_ids: List[int], wait_all: bool = False) -> dict:
+        """
+        Launch ``tile_ids``. Returns once the last tile is launched, or once
+        every tile is ready with ``wait_all``. The report has the strategy,
+        seconds to launch each tile and, for tiles seen ready, seconds from
+        the start until they were ready.
+        """
+        started = time.time()
+        first = [tile_id for tile_id in self.first if tile_id in tile_ids]
+        rest = [tile_id for tile_id in tile_ids if tile_id not in first]
+        launched_at = {}
+        ready_at = {}
+        timed_out = []
+        limit = self.max_concurrent or len(tile_ids)
+
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, len(tile_ids)),
+                                                     thread_name_prefix='launch-wait')
+        booting = {}
+        try:
+            def start(tile_id):
+                if self.gate == "load":
+                    self._wait_for_load()
+                self.launch(tile_id)
+                launched_at[tile_id] = time.time() - started
+                booting[pool.submit(self.wait_ready, tile_id, self.boot_timeout)] = tile_id
+
+            def collect(block):
+                done, _ = concurrent.futures.wait(booting, None if block else 0,
+                                                  return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    tile_id = booting.pop(future)
+                    try:
+                        ready = future.result()
+                    except Exception as e:
+                        logger.error(f"Error waiting for tile {tile_id} to become ready: {e}")
+                        ready = None
+                    if ready is None:
+                        timed_out.append(tile_id)
+                        logger.warning(f"Tile {tile_id} not ready after {self.boot_timeout:.0f}s, "
+                                       f"launching the next tile anyway")
+                    else:
+                        ready_at[tile_id] = time.time() - started
+
+            # The first tiles (e.g. the hub) boot on their own before anything else
+            for tile_id in first:
+                start(tile_id)
+            while booting:
+                collect(True)
+
+            for tile_id in rest:
+                while len(booting) >= limit:
+                    collect(True)
+                start(tile_id)
+                collect(False)
+
+            if wait_all:
+                while booting:
+                    collect(True)
+        finally:
+            # Waits still running end on their own once their tile is ready or times out
+            pool.shutdown(wait=False)
+
+        report = {
+            "strategy": self.strategy,
+            "started": started,
+            "tiles": len(tile_ids),
+            "launched_at": launched_at,
+            "ready_at": ready_at,
+            "timed_out": timed_out,
+            "launch_duration": max(launched_at.values(), default=0.0),
+        }
+        if wait_all:
+            report["cold_start"] = time.time() - started
+        return report
+
+    def record(self, report: dict):
+        """Keep the cold start time of a finished run under its strategy"""
+        if report.get("cold_start") is None:
+            return
+        entry = {"time": report["started"], "tiles": report["tiles"], "cold_start": round(report["cold_start"], 1),
+                 "timed_out": len(report["timed_out"])}
+        with self._lock:
+            self._history.setdefault(report["strategy"], collections.deque(maxlen=LAUNCH_HISTORY_SIZE)).append(entry)
+        self._save()
+        logger.info(f"Cold start of {report['tiles']} tiles ({report['strategy']}) took {report['cold_start']:.0f}s")
+
+    def stats(self) -> Dict[str, dict]:
+        """Return cold start statistics per strategy (runs, last, mean, best and worst in seconds)"""
+        result = {}
+        with self._lock:
+            for strategy, runs in self._history.items():
+                times = [run["cold_start"] for run in runs]
+                result[strategy] = {
+                    "runs": len(times),
+                    "last": times[-1],
+                    "mean": sum(times) / len(times),
+                    "best": min(times),
+                    "worst": max(times),
+                    "history": list(runs),
+                }
+        return result
+
+    def _wait_for_load(self):
+        """Hold a launch until host CPU drops below the threshold, or for boot_timeout at most"""
+        deadline = time.monotonic() + self.boot_timeout
+        while True:
+            sampled = time.monotonic()
+            load = self.get_load()
+            if load < self.load_threshold:
+                return
+            if time.monotonic() >= deadline:
+                logger.warning(f"Host CPU still at {load:.0f}% after {self.boot_timeout:.0f}s, launching anyway")
+                return
+            logger.debug(f"Host CPU at {load:.0f}%, holding the next launch")
+            # A get_load that does not sample over an interval must not make this spin
+            time.sleep(max(0.0, min(LOAD_SAMPLE_INTERVAL - (time.monotonic() - sampled),
+                                    deadline - time.monotonic())))
+
+    def _load(self):
+        if not self.history_file or not os.path.exists(self.history_file):
+            return
+        try:
+            with open(self.history_file, 'r') as file:
+                data = json.load(file)
+            for strategy, runs in data.items():
+                self._history[strategy] = collections.deque(runs, maxlen=LAUNCH_HISTORY_SIZE)
+        except Exception as e:
+            logger.error(f"Error loading launch history from {self.history_file}: {e}")
+
+    def _save(self):
+        if not self.history_file:
+            return
+        try:
+            with self._lock:
+                data = {strategy: list(runs) for strategy, runs in self._history.items()}
+            with open(self.history_file, 'w') as file:
+                json.dump(data, file, indent=4)
+        except Exception as e:
+            logger.error(f"Error saving launch history to {self.history_file}: {e}")
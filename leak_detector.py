@@ -0,0 +1,239 @@
+"""
+Leak Detector Module
+
+Watches each tile's resident memory for steady growth and restarts a leaking
+tile before it runs out of memory and crashes.
+
+Once a minute the mean RSS of every tile over the last minute is taken from
+the resource sampler and added to a longer per-tile history. A least-squares
+line through that history gives the growth rate and predicts when the tile
+will reach ``threshold``. A leak only counts when the fit is good (r²) and
+the growth is real, so ordinary load swings do not trigger restarts.
+
+When a crossing is predicted within ``horizon`` seconds the tile is
+restarted as soon as few players are online (at most ``off_peak_players``),
+and regardless of players once the crossing is less than ``urgent`` seconds
+away. Every prediction is logged. Predictions that led to an action are
+also written as JSON lines to ``log_file`` if set, and with ``log_all`` the
+others too, so the thresholds can be tuned.
+"""
+
+import json
+import time
+import logging
+import threading
+import collections
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger('LOManager.LeakDetector')
+
+# Constants
+DEFAULT_INTERVAL = 60.0  # seconds between history points and predictions
+DEFAULT_HISTORY = 6 * 3600.0  # seconds of history kept per tile
+DEFAULT_MIN_HISTORY = 1800.0  # seconds of history needed before predicting
+DEFAULT_HORIZON = 4 * 3600.0  # act on crossings predicted within this many seconds
+DEFAULT_URGENT = 1800.0  # restart even with players online when the crossing is this close
+DEFAULT_MIN_R2 = 0.8  # how well the line has to fit before growth counts as a leak
+DEFAULT_MIN_GROWTH = 50 * 1024 ** 2  # bytes per hour below which growth is ignored
+PREDICTION_HISTORY_SIZE = 500
+
+
+def fit_line(points):
+    """
+    Least-squares fit of (x, y) points. Returns (slope, intercept, r2), or
+    None with fewer than two distinct x values.
+    """
+    n = len(points)
+    if n < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    sxx = sum((x - mean_x) ** 2 for x, _ in points)
+    if sxx == 0:
+        return None
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    syy = sum((y - mean_y) ** 2 for _, y in points)
+    slope = sxy / sxx
+    intercept = mean_y - slope * mean_x
+    r2 = (sxy * sxy) / (sxx * syy) if syy else 1.0
+    return slope, intercept, r2
+
+
+class LeakDetector:
+    """
+    Predict when each tile's memory crosses ``threshold`` and restart it ahead of time.
+
+    ``sampler`` is the manager's ResourceSampler and ``get_pids`` returns
+    {tile_id: pid} of the running tiles. ``get_players(tile_id)`` returns a
+    tile's player count or None, and ``on_restart(tile_id, prediction)``
+    performs a controlled restart of the tile.
+    """
+
+    def __init__(self, sampler, get_pids: Callable[[], Dict[int, int]], threshold: int,
+                 on_restart: Callable, get_players: Optional[Callable[[int], Optional[int]]] = None,
+                 interval: float = DEFAULT_INTERVAL, history: float = DEFAULT_HISTORY,
+                 min_history: float = DEFAULT_MIN_HISTORY, horizon: float = DEFAULT_HORIZON,
+                 urgent: float = DEFAULT_URGENT, off_peak_players: int = 0,
+                 min_r2: float = DEFAULT_MIN_R2, min_growth: float = DEFAULT_MIN_GROWTH,
+                 log_file: Optional[str] = None, log_all: bool = False):
+        self.sampler = sampler
+        self.get_pids = get_pids
+        self.threshold = threshold
+        self.on_restart = on_restart
+        self.get_players = get_players
+        self.interval = interval
+        self.history = history
+        self.min_history = min_history
+        self.horizon = horizon
+        self.urgent = urgent
+        self.off_peak_players = off_peak_players
+        self.min_r2 = min_r2
+        self.min_growth = min_growth
+        self.log_file = log_file
+        self.log_all = log_all
+        self.predictions = collections.deque(maxlen=PREDICTION_HISTORY_SIZE)
+        self._points: Dict[int, collections.deque] = {}
+        self._pids: Dict[int, int] = {}
+        self._restarting = set()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start predicting in a background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='leak-detector', daemon=True)
+        self._thread.start()
+        logger.info(f"Leak detector started (threshold {self.threshold / 1024 ** 3:.1f} GB, "
+                    f"horizon {self.horizon / 3600:.1f}h)")
+
+    def stop(self):
+        """Stop the background thread"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def latest(self) -> Dict[int, dict]:
+        """Return the newest prediction of every tile"""
+        result = {}
+        for prediction in list(self.predictions):
+            result[prediction["tile_id"]] = prediction
+        return result
+
+    def recent_predictions(self, seconds: Optional[float] = None) -> List[dict]:
+        """Return predictions, oldest first, optionally only the last ``seconds``"""
+        predictions = list(self.predictions)
+        if seconds is not None:
+            cutoff = time.time() - seconds
+            predictions = [prediction for prediction in predictions if prediction["time"] >= cutoff]
+        return predictions
+
+    def restart_done(self, tile_id: int):
+        """Allow another restart of a tile once a controlled restart has finished"""
+        with self._lock:
+            self._restarting.discard(tile_id)
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.check_once()
+            except Exception as e:
+                logger.error(f"Error predicting tile memory: {e}")
+
+    def check_once(self, now: Optional[float] = None):
+        """Add a history point for every running tile and act on the predictions"""
+        now = time.time() if now is None else now
+        pids = self.get_pids()
+        for tile_id in list(self._points):
+            if tile_id not in pids:
+                self._forget(tile_id)
+        for tile_id, pid in pids.items():
+            if self._pids.get(tile_id) != pid:
+                # A new process starts with a clean history
+                self._forget(tile_id)
+                self._pids[tile_id] = pid
+            samples = self.sampler.window(tile_id, self.interval)
+            if not samples:
+                continue
+            points = self._points.setdefault(tile_id, collections.deque())
+            points.append((now, sum(sample["rss"] for sample in samples) / len(samples)))
+            while points and now - points[0][0] > self.history:
+                points.popleft()
+            prediction = self.predict(tile_id, now)
+            if prediction is not None:
+                self._act(prediction)
+
+    def predict(self, tile_id: int, now: Optional[float] = None) -> Optional[dict]:
+        """
+        Fit the tile's history and return the prediction: current RSS, growth
+        in bytes per hour, r², and seconds until ``threshold`` is reached
+        (None when no leak is seen). Returns None while the history is too short.
+        """
+        now = time.time() if now is None else now
+        points = list(self._points.get(tile_id, ()))
+        if len(points) < 2 or points[-1][0] - points[0][0] < self.min_history:
+            return None
+        fit = fit_line([(t - now, rss) for t, rss in points])
+        if fit is None:
+            return None
+        slope, intercept, r2 = fit
+        growth = slope * 3600
+        eta = None
+        if growth >= self.min_growth and r2 >= self.min_r2:
+            # The line's value now is ``intercept``; a tile already over the threshold is due immediately
+            eta = max(0.0, (self.threshold - intercept) / slope)
+        return {"time": now, "tile_id": tile_id, "rss": points[-1][1], "fitted_rss": intercept,
+                "growth_per_hour": growth, "r2": r2, "eta": eta, "threshold": self.threshold,
+                "points": len(points), "players": None, "action": "none"}
+
+    def _act(self, prediction):
+        tile_id = prediction["tile_id"]
+        eta = prediction["eta"]
+        with self._lock:
+            restarting = tile_id in self._restarting
+        if restarting:
+            prediction["action"] = "restarting"
+        elif eta is not None and eta <= self.horizon:
+            players = self.get_players(tile_id) if self.get_players else None
+            prediction["players"] = players
+            if eta <= self.urgent:
+                prediction["action"] = "restart-urgent"
+            elif players is not None and players <= self.off_peak_players:
+                prediction["action"] = "restart-off-peak"
+            else:
+                prediction["action"] = "wait"
+
+        self._record(prediction)
+        if prediction["action"].startswith("restart-"):
+            with self._lock:
+                self._restarting.add(tile_id)
+            try:
+                self.on_restart(tile_id, prediction)
+            except Exception as e:
+                logger.error(f"Error restarting leaking tile {tile_id}: {e}")
+                self.restart_done(tile_id)
+
+    def _record(self, prediction):
+        self.predictions.append(prediction)
+        eta = prediction["eta"]
+        message = (f"Tile {prediction['tile_id']}: rss={prediction['rss'] / 1024 ** 2:.0f}MB "
+                   f"growth={prediction['growth_per_hour'] / 1024 ** 2:+.1f}MB/h r2={prediction['r2']:.2f} "
+                   f"eta={'-' if eta is None else f'{eta / 60:.0f}min'} players={prediction['players']} "
+                   f"action={prediction['action']}")
+        if prediction["action"] == "none":
+            logger.debug(message)
+        else:
+            logger.info(message)
+        # Every tile gets a prediction each interval, so by default only those that led to an action are kept
+        if self.log_file and (self.log_all or prediction["action"] != "none"):
+            try:
+                with open(self.log_file, 'a') as file:
+                    file.write(json.dumps(prediction) + "\n")
+            except IOError as e:
+                logger.error(f"Error writing leak prediction to {self.log_file}: {e}")
+
+    def _forget(self, tile_id):
+        self._points.pop(tile_id, None)
+        self._pids.pop(tile_id, None)
@@ -19,9 +19,8 @@ from typing import List, Dict, Any, Optional, Tuple, Union
 try:
     import a2s
 except ImportError:
-    print("Required package 'python-a2s' not found.")
-    print("Please install it using: pip install python-a2s")
-    sys.exit(1)
+    # Only fatal for the command line tool; the manager imports query_server
+    a2s = None
 
 # Constants
 # Constants
@@ -352,6 +351,10 @@ def query_server(address: Tuple[str, int], timeout: float) -> Optional[Dict[str,
     ip, port = address
     server_address_str = f"{ip}:{port}"
     logging.info(f"Querying server {server_address_str}")
+
+    if a2s is None:
+        logging.warning(f"Cannot query {server_address_str}: python-a2s is not installed")
+        return None
     
     try:
         # Get server info
@@ -519,6 +522,11 @@ def display_server_info(server_info_list: List[Dict[str, Any]]):
 
 # Main execution
 def main():
+    if a2s is None:
+        print("Required package 'python-a2s' not found.")
+        print("Please install it using: pip install python-a2s")
+        return 1
+
     args = parse_arguments()
     logger = setup_logging(args.verbose)
     logger.info("Starting Last Oasis Server Query Tool")
@@ -22,15 +22,16 @@ from PyQt5.QtGui import QIcon, QFont, QPixmap
 from PyQt5 import QtGui
 
 # Import custom panels
-from gui.server_panel import ServerPanel
+from gui.server_panel import ServerPanel, ManagerCalls
 from gui.mod_panel import ModPanel
 from gui.config_panel import ConfigPanel
 from gui.log_panel import LogPanel
 from gui.admin_panel import AdminPanel
 
 # Import existing functionality
-import LastOasisManager
 import admin_writer
+from TileTracker import get_tracker
+from manager_client import get_client, start_daemon, ManagerUnavailable
 from mod_checker import add_new_mod_ids, read_json, update_mods_info
 
 # Setup logging
@@ -46,6 +47,9 @@ class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.config = {}
+        # Daemon requests run off the GUI thread
+        self.calls = ManagerCalls(self)
+        self.status_pending = False
         self.initUI()
         self.loadConfig()
         
@@ -119,6 +123,11 @@ class MainWindow(QMainWindow):
         reloadConfigAction.setShortcut("Ctrl+R")
         reloadConfigAction.triggered.connect(self.loadConfig)
         fileMenu.addAction(reloadConfigAction)
+
+        # Start Manager action - the daemon runs the tiles independently of this window
+        startManagerAction = QAction("Start &Manager Daemon", self)
+        startManagerAction.triggered.connect(self.startManager)
+        fileMenu.addAction(startManagerAction)
         
         # Exit action
         exitAction = QAction("E&xit", self)
@@ -140,12 +149,13 @@ class MainWindow(QMainWindow):
             with open("config.json", 'r') as file:
                 self.config = json.load(file)
             
-            # Initialize LastOasisManager with the config
-            LastOasisManager.update_config()
+            # Let a running manager daemon pick up the new config
+            self.client = get_client(self.config)
+            self.calls.run(self.client.reload_config, self.onConfigReloaded)
             
             # Initialize TileTracker
             log_folder = os.path.join(self.config["folder_path"].replace("Binaries\\Win64\\", ""), "Saved\\Logs")
-            LastOasisManager.tile_tracker = LastOasisManager.get_tracker(
+            get_tracker(
                 log_folder=log_folder,
                 config_path="config.json"
             )
@@ -163,10 +173,53 @@ class MainWindow(QMainWindow):
             self.showError("Error loading configuration", str(e))
             logger.error(f"Error loading configuration: {e}")
     
+    def onConfigReloaded(self, result, error):
+        """Report a daemon that could not reload the configuration"""
+        if error and not isinstance(error, ManagerUnavailable):
+            self.showError("Error reloading configuration in the manager daemon", str(error))
+            logger.error(f"Error reloading configuration in the manager daemon: {error}")
+
     def updateStatus(self):
         """Update status information periodically"""
-        # This will be expanded to show real-time status
-        pass
+        # Skip a poll while the last one is still out
+        if self.status_pending:
+            return
+        self.status_pending = True
+        client = getattr(self, 'client', None) or get_client(self.config)
+        self.calls.run(client.status, self.onStatusFetched)
+
+    def onStatusFetched(self, status, error):
+        """Show the manager daemon's state in the status bar"""
+        self.status_pending = False
+        if isinstance(error, ManagerUnavailable):
+            self.statusMsg.setText("Manager daemon not running (File > Start Manager Daemon)")
+            return
+        if error:
+            self.statusMsg.setText(f"Manager daemon error: {error}")
+            return
+        running = sum(1 for tile in status["tiles"].values() if tile["running"])
+        operation = (status.get("operation") or {}).get("current")
+        message = f"Connected to manager daemon - {running}/{len(status['tiles'])} tiles running"
+        if operation:
+            message += f" - {operation['name']} in progress"
+        self.statusMsg.setText(message)
+
+    def startManager(self):
+        """Launch the manager daemon in the background if it is not already running"""
+        self.calls.run(get_client(self.config).is_available, self.onManagerChecked)
+
+    def onManagerChecked(self, available, error):
+        """Start the manager daemon unless it already answers"""
+        if available:
+            self.statusMsg.setText("Manager daemon is already running")
+            return
+        try:
+            start_daemon()
+            self.statusMsg.setText("Manager daemon starting...")
+            logger.info("Started manager daemon")
+        except Exception as e:
+            self.showError("Error starting manager daemon", str(e))
+            logger.error(f"Error starting manager daemon: {e}")
     
     def showAbout(self):
         """Show about dialog"""
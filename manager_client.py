@@ -0,0 +1,200 @@
+"""
+Manager Client Module
+
+Thin client for the manager daemon's control API (see control_api.py). The
+GUI and scripts use it instead of importing LastOasisManager, so they never
+run or supervise tiles themselves.
+
+Example:
+    client = get_client(config)
+    client.start_tile(0)
+    for line in client.stream_log(follow=True):
+        print(line, end="")
+"""
+
+import os
+import sys
+import json
+import subprocess
+import urllib.error
+import urllib.request
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urlencode
+
+# Constants
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_TIMEOUT = 5.0
+TOKEN_HEADER = "X-LOMan-Token"
+DAEMON_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "LastOasisManager.py")
+
+
+class ManagerUnavailable(ConnectionError):
+    """The manager daemon is not running or not reachable"""
+
+
+class ManagerError(RuntimeError):
+    """The manager daemon rejected a request"""
+
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+class ManagerClient:
+    """Talk to a running manager daemon over its loopback control API"""
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, token: Optional[str] = None,
+                 timeout: float = DEFAULT_TIMEOUT):
+        self.base_url = f"http://{host}:{port}"
+        self.token = token
+        self.timeout = timeout
+
+    def _open(self, method, path, query=None, timeout=None):
+        url = self.base_url + path + (f"?{urlencode(query)}" if query else "")
+        request = urllib.request.Request(url, method=method, data=b"" if method == "POST" else None)
+        if self.token:
+            request.add_header(TOKEN_HEADER, self.token)
+        try:
+            return urllib.request.urlopen(request, timeout=timeout or self.timeout)
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get("error", e.reason)
+            except ValueError:
+                message = e.reason
+            raise ManagerError(e.code, message) from None
+        except (urllib.error.URLError, OSError) as e:
+            raise ManagerUnavailable(f"Manager daemon not reachable at {self.base_url}: {e}") from None
+
+    def _request(self, method, path, query=None, timeout=None):
+        with self._open(method, path, query, timeout) as response:
+            return json.loads(response.read())
+
+    def is_available(self) -> bool:
+        """True if the daemon answers"""
+        try:
+            self.status()
+            return True
+        except (ManagerUnavailable, ManagerError):
+            return False
+
+    def status(self) -> dict:
+        """Return manager status; tile entries are keyed by int tile ID"""
+        status = self._request("GET", "/status")
+        status["tiles"] = {int(tile_id): tile for tile_id, tile in status.get("tiles", {}).items()}
+        return status
+
+    def crash_stats(self) -> Dict[int, dict]:
+        return {int(tile_id): stats for tile_id, stats in self._request("GET", "/crashes").items()}
+
+    def boot_stats(self) -> Dict[int, dict]:
+        return {int(tile_id): stats for tile_id, stats in self._request("GET", "/boots").items()}
+
+    def launch_stats(self) -> dict:
+        return self._request("GET", "/launches")
+
+    def hang_stats(self) -> dict:
+        return self._request("GET", "/hangs")
+
+    def server_update(self, force: bool = False) -> dict:
+        """Installed and remote server build IDs and whether an update is available"""
+        return self._request("GET", "/server-update", {"force": 1} if force else None, timeout=180)
+
+    def request_validation(self) -> dict:
+        """Have the next server update validate every file"""
+        return self._request("POST", "/validate-server")
+
+    def rollback_install(self) -> dict:
+        """Restart every tile on the install root that was live before the last switch"""
+        return self._request("POST", "/rollback-install")
+
+    def cluster_status(self) -> Optional[dict]:
+        """Agents, tile assignments and placement events; None unless the daemon coordinates a cluster"""
+        return self._request("GET", "/cluster")
+
+    def leak_predictions(self, seconds: Optional[float] = None) -> dict:
+        return self._request("GET", "/leaks", {"seconds": seconds} if seconds else None)
+
+    def limit_events(self, seconds: Optional[float] = None) -> List[dict]:
+        return self._request("GET", "/limits", {"seconds": seconds} if seconds else None)
+
+    def tile_resources(self, tile_id: int, seconds: Optional[float] = None) -> List[dict]:
+        return self._request("GET", f"/tiles/{tile_id}/resources", {"seconds": seconds} if seconds else None)
+
+    def start_tile(self, tile_id: int) -> dict:
+        # Launching waits for the process to start, which can take longer than a status call
+        return self._request("POST", f"/tiles/{tile_id}/start", timeout=60)
+
+    def stop_tile(self, tile_id: int, countdown: int = 0) -> dict:
+        return self._request("POST", f"/tiles/{tile_id}/stop", {"countdown": countdown} if countdown else None,
+                             timeout=60 + countdown)
+
+    def restart_tile(self, tile_id: int, countdown: int = 0) -> dict:
+        return self._request("POST", f"/tiles/{tile_id}/restart", {"countdown": countdown} if countdown else None,
+                             timeout=120 + countdown)
+
+    def redeploy_tile(self, tile_id: int, countdown: int = 0) -> dict:
+        """
+        Restart one tile with the current mod set; runs in the background,
+        progress and a refusal or failure (``last_error``) show in status()
+        """
+        return self._request("POST", f"/tiles/{tile_id}/redeploy", {"countdown": countdown} if countdown else None)
+
+    def release_tile(self, tile_id: int) -> dict:
+        """Lift a crash-loop quarantine and start the tile"""
+        return self._request("POST", f"/tiles/{tile_id}/release", timeout=60)
+
+    def start_all(self) -> dict:
+        return self._request("POST", "/start")
+
+    def stop_all(self) -> dict:
+        return self._request("POST", "/stop")
+
+    def restart_all(self, mode: str = "full") -> dict:
+        return self._request("POST", "/restart", {"mode": mode})
+
+    def update_mods(self) -> dict:
+        return self._request("POST", "/update-mods")
+
+    def check_updates(self) -> List[str]:
+        # SteamCMD and workshop lookups run inside this request
+        return self._request("POST", "/check-updates", timeout=300)["out_of_date"]
+
+    def reload_config(self) -> dict:
+        return self._request("POST", "/reload-config")
+
+    def stream_log(self, name: str = "manager", lines: int = 200, follow: bool = False) -> Iterator[str]:
+        """
+        Yield lines of a log: the manager's own log or a file from the server
+        log folder. With ``follow`` the generator keeps yielding new lines
+        until it is closed.
+        """
+        query = {"name": name, "lines": lines, "follow": int(follow)}
+        with self._open("GET", "/logs", query, timeout=None if follow else self.timeout) as response:
+            for raw in response:
+                yield raw.decode('utf-8', errors='replace')
+
+
+def get_client(config: Optional[dict] = None) -> ManagerClient:
+    """Return a client for the daemon described by ``config`` (config.json when omitted)"""
+    if config is None:
+        try:
+            with open("config.json", 'r') as file:
+                config = json.load(file)
+        except (OSError, ValueError):
+            config = {}
+    return ManagerClient(host=config.get("control_api_host", DEFAULT_HOST),
+                         port=config.get("control_api_port", DEFAULT_PORT),
+                         token=config.get("control_api_token"))
+
+
+def start_daemon() -> subprocess.Popen:
+    """Launch the manager daemon in the background, detached from the caller"""
+    kwargs = {}
+    if os.name == 'nt':
+        # A hidden console rather than none: tiles share it, and CTRL+BREAK only reaches them through it
+        kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+    return subprocess.Popen([sys.executable, DAEMON_SCRIPT], cwd=os.path.dirname(DAEMON_SCRIPT),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **kwargs)
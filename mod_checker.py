@@ -3,13 +3,19 @@ Steam Workshop Mod Checker Module
 
 This module provides functionality to check and manage Steam Workshop mods for Last Oasis.
 It handles:
- - Fetching mod update times from Steam Workshop
+ - Reading the local state of downloaded mods from SteamCMD's workshop manifest
+ - Fetching the remote state of all mods in one Steam Web API request
+ - Fetching mod update times from Steam Workshop pages (legacy)
  - Comparing current mod versions with saved versions
  - Identifying mods that need updates
  - Managing mod information in a JSON database
 
-The module uses web scraping with rate limiting and retry mechanisms to avoid
-being blocked by Steam's servers.
+Given the SteamCMD folder, versions are compared by manifest ID and integer
+``time_updated`` timestamp; ``steamapps/workshop/appworkshop_903950.acf``
+tells which version SteamCMD already has, and Steam is only asked for the
+current one. Without it, the module falls back to scraping each mod's
+Workshop page, with rate limiting and retry mechanisms to avoid being
+blocked by Steam's servers, and comparing the update date strings.
 """
 
 import json
@@ -23,6 +29,8 @@ from datetime import datetime
 import requests
 from bs4 import BeautifulSoup
 
+import vdf
+
 # Configure logger
 logger = logging.getLogger("ModChecker")
 
@@ -37,6 +45,9 @@ DEFAULT_TIMEOUT = 15  # seconds
 MAX_RETRIES = 3
 RETRY_BACKOFF_FACTOR = 2  # seconds
 RATE_LIMIT_DELAY = (1, 3)  # Random delay between (min, max) seconds
+WORKSHOP_APP_ID = 903950
+PUBLISHED_FILE_DETAILS_URL = "https://api.steampowered.com/ISteamRemoteStorage/GetPublishedFileDetails/v1/"
+MAX_ITEMS_PER_REQUEST = 100
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:89.0) Gecko/20100101 Firefox/89.0",
@@ -269,16 +280,189 @@ def fetch_mod_update_time(mod_id: str) -> Optional[str]:
     logger.error(f"Failed to fetch update time for mod {mod_id} after {MAX_RETRIES} attempts")
     return None
 
-def update_mods_info(mods_info: Dict[str, str], mod_ids: List[str]) -> Tuple[List[str], Dict[str, str]]:
+def workshop_manifest_path(steam_cmd_path: str) -> str:
+    """Return the path of SteamCMD's workshop manifest for Last Oasis"""
+    return os.path.join(f"{steam_cmd_path}steamapps", "workshop", f"appworkshop_{WORKSHOP_APP_ID}.acf")
+
+
+def _to_int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def read_workshop_manifest(manifest_path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Read the downloaded mods from SteamCMD's workshop manifest.
+    
+    Args:
+        manifest_path: Path of ``appworkshop_903950.acf``
+        
+    Returns:
+        Dictionary mapping mod ID to {"manifest", "time_updated", "size"} of the
+        version SteamCMD has downloaded; empty when there is no manifest
+    """
+    if not os.path.exists(manifest_path):
+        logger.debug(f"No workshop manifest at {manifest_path}")
+        return {}
+    try:
+        data = vdf.load(manifest_path)
+    except (OSError, vdf.VDFError) as e:
+        logger.error(f"Could not read workshop manifest {manifest_path}: {e}")
+        return {}
+    installed = vdf.get(data, "AppWorkshop", "WorkshopItemsInstalled", default={})
+    details = vdf.get(data, "AppWorkshop", "WorkshopItemDetails", default={})
+    local = {}
+    for mod_id, item in installed.items():
+        if not isinstance(item, dict):
+            continue
+        detail = details.get(mod_id, {}) if isinstance(details, dict) else {}
+        local[mod_id] = {
+            "manifest": vdf.get(item, "manifest") or vdf.get(detail, "manifest"),
+            "time_updated": _to_int(vdf.get(item, "timeupdated") or vdf.get(detail, "timeupdated")),
+            "size": _to_int(vdf.get(item, "size")),
+        }
+    logger.debug(f"Workshop manifest lists {len(local)} downloaded mods")
+    return local
+
+
+def fetch_published_file_details(mod_ids: List[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    Fetch the current version of many mods from the Steam Web API at once.
+    
+    Args:
+        mod_ids: Steam Workshop IDs of the mods
+        
+    Returns:
+        Dictionary mapping mod ID to {"manifest", "time_updated", "time_created",
+        "size", "title"} for every mod Steam knows, or None if the request failed
+    """
+    details = {}
+    for start in range(0, len(mod_ids), MAX_ITEMS_PER_REQUEST):
+        chunk = mod_ids[start:start + MAX_ITEMS_PER_REQUEST]
+        data = {"itemcount": len(chunk)}
+        data.update({f"publishedfileids[{i}]": mod_id for i, mod_id in enumerate(chunk)})
+        for attempt in range(MAX_RETRIES):
+            if attempt > 0:
+                delay = random.uniform(RATE_LIMIT_DELAY[0], RATE_LIMIT_DELAY[1]) * RETRY_BACKOFF_FACTOR * attempt
+                logger.debug(f"Waiting {delay:.2f} seconds before retry {attempt+1}/{MAX_RETRIES}")
+                time.sleep(delay)
+            try:
+                response = requests.post(PUBLISHED_FILE_DETAILS_URL, data=data, timeout=DEFAULT_TIMEOUT)
+                response.raise_for_status()
+                items = response.json()["response"]["publishedfiledetails"]
+                break
+            except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Published file details request failed: {e} (attempt {attempt+1}/{MAX_RETRIES})")
+        else:
+            logger.error(f"Failed to fetch published file details after {MAX_RETRIES} attempts")
+            return None
+        for item in items:
+            if item.get("result") != 1:
+                logger.warning(f"Steam has no details for mod {item.get('publishedfileid')} "
+                               f"(result {item.get('result')})")
+                continue
+            details[str(item["publishedfileid"])] = {
+                "manifest": str(item["hcontent_file"]) if item.get("hcontent_file") else None,
+                "time_updated": _to_int(item.get("time_updated")),
+                "time_created": _to_int(item.get("time_created")),
+                "size": _to_int(item.get("file_size")),
+                "title": item.get("title"),
+            }
+    return details
+
+
+def is_same_version(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    """
+    Compare two mod versions by manifest ID, or by ``time_updated`` when a
+    manifest ID is missing.
+    """
+    if a.get("manifest") and b.get("manifest"):
+        return str(a["manifest"]) == str(b["manifest"])
+    if a.get("time_updated") is not None and b.get("time_updated") is not None:
+        return a["time_updated"] >= b["time_updated"]
+    return False
+
+
+def format_mod_record(record: Dict[str, Any]) -> str:
+    """Render a mod record as the legacy "size\ncreation date\nupdate date" text"""
+    def date(timestamp):
+        return time.strftime("%d %b, %Y @ %I:%M%p", time.localtime(timestamp)) if timestamp else "Unknown"
+    size = f"{record['size'] / 1000000:.3f} MB" if record.get("size") is not None else "Unknown"
+    return f"{size}\n{date(record.get('time_created'))}\n{date(record.get('time_updated'))}"
+
+
+def check_mod_versions(mods_info: Dict[str, Any], mod_ids: List[str],
+                       steam_cmd_path: str) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    Find out-of-date mods by manifest ID and timestamp instead of date strings.
+    
+    The deployed version of each mod is the record saved in ``mods_info``.
+    Mods without such a record (new mods, or mods recorded by the legacy
+    scraper) count as current when SteamCMD already has the current version
+    according to its workshop manifest. Steam is asked for every mod in one
+    request.
+    
+    Args:
+        mods_info: Dictionary of mod IDs and their recorded versions
+        mod_ids: List of mod IDs to check for updates
+        steam_cmd_path: SteamCMD folder (with trailing separator)
+        
+    Returns:
+        Tuple containing:
+            - List of mod IDs that are out of date
+            - Updated mods_info dictionary with the current versions; unchanged
+              when Steam could not be asked
+    """
+    mod_ids = [mod_id.strip() for mod_id in mod_ids if validate_mod_id(mod_id)]
+    local = read_workshop_manifest(workshop_manifest_path(steam_cmd_path))
+    logger.info(f"Checking updates for {len(mod_ids)} mods ({len(local)} in the workshop manifest)")
+    remote = fetch_published_file_details(mod_ids)
+    if remote is None:
+        logger.warning("Couldn't fetch the current mod versions, skipping the update check")
+        return [], mods_info
+
+    out_of_date = []
+    for mod_id in mod_ids:
+        current = remote.get(mod_id)
+        if current is None:
+            logger.warning(f"Couldn't fetch the current version of mod {mod_id}, skipping update check")
+            continue
+        recorded = mods_info.get(mod_id)
+        if isinstance(recorded, dict) and ("manifest" in recorded or "time_updated" in recorded):
+            up_to_date = is_same_version(recorded, current)
+        else:
+            # No usable record of what is deployed: trust SteamCMD's download
+            up_to_date = mod_id in local and is_same_version(local[mod_id], current)
+        if not up_to_date:
+            logger.info(f"Mod {mod_id} is out of date!")
+            logger.debug(f"  Recorded: {recorded}")
+            logger.debug(f"  Downloaded: {local.get(mod_id)}")
+            logger.debug(f"  Current: {current}")
+            out_of_date.append(mod_id)
+        mods_info[mod_id] = current
+
+    logger.info(f"Update check complete: {len(out_of_date)} mods need updates")
+    if out_of_date:
+        logger.info(f"Out-of-date mods: {', '.join(out_of_date)}")
+    return out_of_date, mods_info
+
+
+def update_mods_info(mods_info: Dict[str, str], mod_ids: List[str],
+                     steam_cmd_path: Optional[str] = None) -> Tuple[List[str], Dict[str, str]]:
     """
     Check and update mods info based on current data from Steam Workshop.
     
-    This function fetches the current update time for each mod from Steam Workshop,
+    With ``steam_cmd_path`` this is check_mod_versions(). Otherwise this
+    function fetches the current update time for each mod from Steam Workshop,
     compares it with the stored update time, and identifies mods that need updating.
     
     Args:
         mods_info: Dictionary of mod IDs and their last known update times
         mod_ids: List of mod IDs to check for updates
+        steam_cmd_path: SteamCMD folder whose workshop manifest is read, or
+            None to scrape the Workshop pages
         
     Returns:
         Tuple containing:
@@ -303,6 +487,9 @@ def update_mods_info(mods_info: Dict[str, str], mod_ids: List[str]) -> Tuple[Lis
             logger.error(f"Failed to convert mod_ids to list: {e}")
             return [], mods_info
 
+    if steam_cmd_path is not None:
+        return check_mod_versions(mods_info, mod_ids, steam_cmd_path)
+
     out_of_date = []
     total_mods = len(mod_ids)
     update_count = 0
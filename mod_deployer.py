@@ -0,0 +1,442 @@
+"""
+Mod Deployer Module
+
+This module prepares the game's Mods folder for Last Oasis tiles.
+It handles:
+ - Building the complete new mod set in a side directory while tiles are running
+ - Keeping a manifest of every deployed file (size, mtime and hash) so an
+   update only copies, replaces or deletes what actually changed
+ - Hardlinking or reflinking files from the workshop cache instead of copying
+ - Activating each changed mod's modinfo.json in one batch
+ - Switching the staged directory live with a pair of directory renames
+
+Because all copying happens before the tiles are stopped, the stop-to-start
+window of a restart no longer depends on how large the mods are. The staged
+and live folders are double-buffered: the set swapped out at one restart is
+brought up to date and reused as the next staging directory.
+"""
+
+import os
+import sys
+import json
+import errno
+import shutil
+import hashlib
+import logging
+from typing import Dict, List, Optional, Tuple
+
+# Configure logger
+logger = logging.getLogger("ModDeployer")
+
+# Constants
+WORKSHOP_APP_ID = "903950"
+STAGING_SUFFIX = ".staged"
+PREVIOUS_SUFFIX = ".previous"
+STAGED_MARKER = ".staging_complete"
+MANIFEST_FILE = ".loman_manifest.json"
+MANIFEST_VERSION = 1
+COPY_CHUNK_SIZE = 1024 * 1024
+FICLONE = 0x40049409  # Linux ioctl for copy-on-write clones
+
+# How files are placed for each deploy mode, tried in order
+DEPLOY_MODES = ("copy", "hardlink", "reflink", "auto")
+DEPLOY_METHODS = {
+    "copy": ("copy",),
+    "hardlink": ("hardlink", "copy"),
+    "reflink": ("reflink", "copy"),
+    "auto": ("reflink", "hardlink", "copy"),
+}
+METHOD_STATS = {"copy": "copied", "hardlink": "linked", "reflink": "cloned"}
+# Files changed after deployment, which must never share storage with the cache
+COPY_ONLY_FILES = {"modinfo.json"}
+
+
+def workshop_content_path(steam_cmd_path: str) -> str:
+    """Return the SteamCMD workshop cache folder for Last Oasis"""
+    return os.path.join(steam_cmd_path + "steamapps/workshop/content/", WORKSHOP_APP_ID)
+
+
+def staging_path(mods_folder: str) -> str:
+    """Return the side directory the next mod set is staged in"""
+    return os.path.normpath(mods_folder) + STAGING_SUFFIX
+
+
+def previous_path(mods_folder: str) -> str:
+    """Return the directory the replaced mod set is kept in after a swap"""
+    return os.path.normpath(mods_folder) + PREVIOUS_SUFFIX
+
+
+def activate_mod(mod_folder: str) -> bool:
+    """
+    Mark a deployed mod as active in its modinfo.json.
+
+    Args:
+        mod_folder: Deployed mod directory
+
+    Returns:
+        True if modinfo.json was updated, False otherwise
+    """
+    modinfo_path = os.path.join(mod_folder, 'modinfo.json')
+    try:
+        with open(modinfo_path, 'r') as file:
+            mod_data = json.load(file)
+
+        mod_data["active"] = True
+
+        with open(modinfo_path, 'w') as file:
+            json.dump(mod_data, file)
+        return True
+    except FileNotFoundError:
+        logger.warning(f"modinfo.json not found at {modinfo_path}")
+    except json.JSONDecodeError as e:
+        logger.error(f"Error parsing modinfo.json at {modinfo_path}: {e}")
+    except IOError as e:
+        logger.error(f"I/O error when handling modinfo.json at {modinfo_path}: {e}")
+    return False
+
+
+def _remove_path(path: str):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.unlink(path)
+
+
+def load_manifest(target_folder: str) -> Dict[str, dict]:
+    """
+    Load the deployment manifest of a Mods folder.
+
+    Args:
+        target_folder: Deployed Mods folder
+
+    Returns:
+        Dictionary mapping mod ID to {"files": {relative path: [size, mtime_ns, sha1]}}.
+        Empty if there is no usable manifest, which makes the next sync a full deploy.
+    """
+    manifest_path = os.path.join(target_folder, MANIFEST_FILE)
+    try:
+        with open(manifest_path, 'r') as file:
+            data = json.load(file)
+        if data.get("version") != MANIFEST_VERSION or not isinstance(data.get("mods"), dict):
+            logger.warning(f"Ignoring manifest with unknown format: {manifest_path}")
+            return {}
+        return data["mods"]
+    except FileNotFoundError:
+        return {}
+    except (json.JSONDecodeError, IOError, AttributeError) as e:
+        logger.warning(f"Ignoring unreadable manifest {manifest_path}: {e}")
+        return {}
+
+
+def save_manifest(target_folder: str, mods: Dict[str, dict]):
+    """Write the deployment manifest atomically"""
+    manifest_path = os.path.join(target_folder, MANIFEST_FILE)
+    temp_path = manifest_path + ".tmp"
+    with open(temp_path, 'w') as file:
+        json.dump({"version": MANIFEST_VERSION, "mods": mods}, file)
+    os.replace(temp_path, manifest_path)
+
+
+def file_hash(path: str) -> str:
+    """Return the SHA-1 of a file"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(COPY_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def copy_file(src: str, dst: str) -> str:
+    """Copy a file with its metadata, hashing it in the same pass. Returns the SHA-1."""
+    digest = hashlib.sha1()
+    temp_path = dst + ".loman_tmp"
+    with open(src, 'rb') as fsrc, open(temp_path, 'wb') as fdst:
+        for chunk in iter(lambda: fsrc.read(COPY_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            fdst.write(chunk)
+    shutil.copystat(src, temp_path)
+    os.replace(temp_path, dst)
+    return digest.hexdigest()
+
+
+def _scan_source(mod_src: str) -> Dict[str, os.stat_result]:
+    files = {}
+    for root, _, names in os.walk(mod_src):
+        for name in names:
+            path = os.path.join(root, name)
+            files[os.path.relpath(path, mod_src).replace(os.sep, '/')] = os.stat(path)
+    return files
+
+
+def reflink_file(src: str, dst: str):
+    """
+    Create ``dst`` as a copy-on-write clone of ``src``.
+
+    Raises OSError when the platform or filesystem cannot clone files
+    (only Linux FICLONE is supported, e.g. on Btrfs or XFS).
+    """
+    if not sys.platform.startswith('linux'):
+        raise OSError(errno.EOPNOTSUPP, "Reflinks are not supported on this platform")
+    import fcntl
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    shutil.copystat(src, dst)
+
+
+def place_file(src: str, dst: str, methods: List[str]) -> Tuple[str, Optional[str]]:
+    """
+    Put ``src`` at ``dst`` with the first method in ``methods`` that works.
+
+    A method that fails (cross-device link, unsupported filesystem) is removed
+    from ``methods`` so the rest of the deployment does not retry it. Copying
+    always works and ends the chain.
+
+    Returns:
+        (method used, SHA-1 of the content or None when it was not read)
+    """
+    temp_path = dst + ".loman_tmp"
+    for method in list(methods):
+        if method == "copy":
+            break
+        try:
+            if os.path.lexists(temp_path):
+                os.unlink(temp_path)
+            if method == "hardlink":
+                os.link(src, temp_path)
+            else:
+                reflink_file(src, temp_path)
+            os.replace(temp_path, dst)
+            return method, None
+        except OSError as e:
+            logger.info(f"Cannot {method} into {os.path.dirname(dst)} ({e}), falling back")
+            if os.path.lexists(temp_path):
+                os.unlink(temp_path)
+            methods.remove(method)
+    return "copy", copy_file(src, dst)
+
+
+def _is_unchanged(entry: list, src_path: str, dest_path: str, st: os.stat_result, stats: Dict[str, int]):
+    """Decide from the manifest entry whether a deployed file still matches its source"""
+    if not entry or entry[0] != st.st_size or not os.path.exists(dest_path):
+        return False, None
+    if entry[1] == st.st_mtime_ns:
+        return True, entry[2]
+    method = entry[3] if len(entry) > 3 else "copy"
+    if method == "hardlink" and os.path.samefile(src_path, dest_path):
+        return True, entry[2]
+    if entry[2] is None:
+        return False, None  # Linked or cloned without hashing: re-placing is cheaper than hashing
+    # Touched but maybe not modified: only the hash can tell
+    digest = file_hash(src_path)
+    stats["hashed_bytes"] += st.st_size
+    return digest == entry[2], digest
+
+
+def _sync_mod(mod_src: str, mod_dest: str, old_files: Dict[str, list], stats: Dict[str, int],
+              methods: List[str]):
+    """Bring one deployed mod in line with the cache. Returns (manifest files, modinfo changed)."""
+    source_files = _scan_source(mod_src)
+    new_files = {}
+    modinfo_changed = False
+    os.makedirs(mod_dest, exist_ok=True)
+
+    for rel_path, st in source_files.items():
+        src_path = os.path.join(mod_src, *rel_path.split('/'))
+        dest_path = os.path.join(mod_dest, *rel_path.split('/'))
+        entry = old_files.get(rel_path)
+
+        unchanged, digest = _is_unchanged(entry, src_path, dest_path, st, stats)
+        if unchanged:
+            new_files[rel_path] = [st.st_size, st.st_mtime_ns, digest] + entry[3:]
+            stats["unchanged"] += 1
+            continue
+
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        if rel_path in COPY_ONLY_FILES:
+            method, digest = "copy", copy_file(src_path, dest_path)
+        else:
+            method, digest = place_file(src_path, dest_path, methods)
+        new_files[rel_path] = [st.st_size, st.st_mtime_ns, digest, method]
+        stats[METHOD_STATS[method]] += 1
+        if method == "copy":
+            stats["copied_bytes"] += st.st_size
+        if rel_path == 'modinfo.json':
+            modinfo_changed = True
+
+    for rel_path in old_files:
+        if rel_path not in source_files:
+            dest_path = os.path.join(mod_dest, *rel_path.split('/'))
+            if os.path.lexists(dest_path):
+                os.unlink(dest_path)
+            stats["removed"] += 1
+
+    return new_files, modinfo_changed
+
+
+def sync_mods(workshop_folder: str, target_folder: str, mod_ids: List[str],
+              mode: str = "copy") -> Dict[str, int]:
+    """
+    Incrementally deploy the active mods from the workshop cache into a Mods folder.
+
+    Only files whose size, mtime or hash differ from the manifest are placed,
+    files that vanished from the cache are deleted, mods no longer in
+    ``mod_ids`` are pruned, and modinfo.json activation is applied once for
+    every mod whose modinfo changed.
+
+    With ``mode`` "hardlink", "reflink" or "auto" files are linked or cloned
+    from the cache instead of copied, falling back to a copy when the
+    filesystem refuses. modinfo.json is always copied because it is modified
+    after deployment. SteamCMD replaces updated files rather than rewriting
+    them, so a hardlinked file in a Mods folder keeps the old content until
+    it is re-linked.
+
+    Args:
+        workshop_folder: SteamCMD workshop cache for the game
+        target_folder: Mods folder to deploy into
+        mod_ids: Active workshop IDs
+        mode: One of DEPLOY_MODES
+
+    Returns:
+        Statistics: copied, copied_bytes, linked, cloned, hashed_bytes, unchanged, removed, pruned_mods
+    """
+    if mode not in DEPLOY_MODES:
+        logger.warning(f"Unknown mod deploy mode '{mode}', copying instead")
+        mode = "copy"
+    methods = list(DEPLOY_METHODS[mode])
+    stats = {"copied": 0, "copied_bytes": 0, "linked": 0, "cloned": 0, "hashed_bytes": 0,
+             "unchanged": 0, "removed": 0, "pruned_mods": 0}
+    os.makedirs(target_folder, exist_ok=True)
+    old_manifest = load_manifest(target_folder)
+    new_manifest = {}
+    to_activate = []
+    mod_ids = [workshop_id.strip() for workshop_id in mod_ids if workshop_id.strip()]
+
+    for workshop_id in mod_ids:
+        src_item = os.path.join(workshop_folder, workshop_id)
+        dest_item = os.path.join(target_folder, workshop_id)
+        old_files = old_manifest.get(workshop_id, {}).get("files", {})
+        try:
+            if not os.path.isdir(src_item):
+                logger.warning(f"Mod {workshop_id} is not in the workshop cache, skipping")
+                continue
+            if workshop_id not in old_manifest and os.path.lexists(dest_item):
+                # Deployed before manifests existed: start this mod from scratch
+                _remove_path(dest_item)
+            files, modinfo_changed = _sync_mod(src_item, dest_item, old_files, stats, methods)
+            new_manifest[workshop_id] = {"files": files}
+            if modinfo_changed:
+                to_activate.append(dest_item)
+        except Exception as e:
+            logger.error(f"Failed to deploy {src_item} to {dest_item}: {e}")
+            # Keep what is there, but make the next sync redo the whole mod
+            new_manifest[workshop_id] = {"files": {}}
+
+    # Prune mods that were removed from the active set, plus anything else unmanaged
+    keep = set(new_manifest) | {MANIFEST_FILE, STAGED_MARKER}
+    for item in os.listdir(target_folder):
+        if item not in keep:
+            try:
+                _remove_path(os.path.join(target_folder, item))
+                stats["pruned_mods"] += 1
+            except Exception as e:
+                logger.error(f"Failed to prune {item} from {target_folder}: {e}")
+
+    for mod_folder in to_activate:
+        activate_mod(mod_folder)
+
+    save_manifest(target_folder, new_manifest)
+    logger.info(f"Synced {len(new_manifest)} mods into {target_folder}: {stats['copied']} files "
+                f"({stats['copied_bytes']} bytes) copied, {stats['linked']} hardlinked, "
+                f"{stats['cloned']} cloned, {stats['unchanged']} unchanged, "
+                f"{stats['removed']} removed, {stats['pruned_mods']} pruned")
+    return stats
+
+
+def stage_mods(workshop_folder: str, mods_folder: str, mod_ids: List[str],
+               mode: str = "copy") -> Optional[str]:
+    """
+    Build the complete new Mods folder next to the live one.
+
+    Safe to run while tiles are running: the live Mods folder is not touched.
+    The mod set swapped out at the previous restart is reused as the starting
+    point, so only files that changed since then are copied.
+
+    Args:
+        workshop_folder: SteamCMD workshop cache for the game
+        mods_folder: Live Mods folder the tiles load from
+        mod_ids: Active workshop IDs to deploy
+        mode: How files are placed, see sync_mods()
+
+    Returns:
+        Path of the staged directory, or None if staging failed
+    """
+    staging = staging_path(mods_folder)
+    previous = previous_path(mods_folder)
+    try:
+        marker_path = os.path.join(staging, STAGED_MARKER)
+        if os.path.lexists(marker_path):
+            os.unlink(marker_path)
+        if not os.path.isdir(staging) and os.path.isdir(previous):
+            os.rename(previous, staging)
+        elif os.path.lexists(previous):
+            _remove_path(previous)
+
+        sync_mods(workshop_folder, staging, mod_ids, mode)
+
+        with open(marker_path, 'w') as marker:
+            marker.write(",".join(mod_ids))
+
+        logger.info(f"Staged {len(mod_ids)} mods in {staging}")
+        return staging
+
+    except Exception as e:
+        logger.error(f"Failed to stage mods in {staging}: {e}")
+        return None
+
+
+def has_staged_mods(mods_folder: str) -> bool:
+    """Return True if a completely staged mod set is waiting to be swapped in"""
+    return os.path.exists(os.path.join(staging_path(mods_folder), STAGED_MARKER))
+
+
+def swap_staged_mods(mods_folder: str) -> bool:
+    """
+    Switch the staged mod set live.
+
+    The live folder is renamed to the .previous directory and the staged one
+    takes its place, so the switch costs two renames regardless of mod size.
+    Must be called while no tile is running.
+
+    Args:
+        mods_folder: Live Mods folder the tiles load from
+
+    Returns:
+        True if the staged set is now live, False otherwise
+    """
+    staging = staging_path(mods_folder)
+    previous = previous_path(mods_folder)
+    live = os.path.normpath(mods_folder)
+
+    if not has_staged_mods(mods_folder):
+        logger.warning(f"No completely staged mod set in {staging}")
+        return False
+
+    try:
+        if os.path.lexists(previous):
+            _remove_path(previous)
+        if os.path.lexists(live):
+            os.rename(live, previous)
+        try:
+            os.rename(staging, live)
+        except OSError:
+            # Put the old set back so the tiles still have their mods
+            if os.path.lexists(previous):
+                os.rename(previous, live)
+            raise
+        os.unlink(os.path.join(live, STAGED_MARKER))
+        logger.info(f"Swapped staged mods into {live}")
+        return True
+
+    except OSError as e:
+        logger.error(f"Failed to swap staged mods into {live}: {e}")
+        return False
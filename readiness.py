@@ -0,0 +1,358 @@
+"""
+Readiness Probe Module
+
+Detects when a freshly launched tile is actually up instead of assuming so
+after a fixed sleep. A tile counts as ready as soon as either:
+ - its log prints the ``LogPersistence: tile_name:`` line, or
+ - it answers an A2S_INFO query on its query port
+
+whichever comes first. One probe thread serves every tile: it tails the log
+folder incrementally and waits on the UDP query sockets of all pending tiles
+with a single select, so probing costs nothing once every tile is up.
+
+The time from launch to ready is recorded per launch so boot time regressions
+show up in the history.
+"""
+
+import os
+import re
+import json
+import time
+import socket
+import logging
+import selectors
+import threading
+import collections
+import concurrent.futures
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger('LOManager.Readiness')
+
+# Constants
+DEFAULT_PROBE_INTERVAL = 1.0  # seconds between log scans and A2S queries
+DEFAULT_QUERY_HOST = "127.0.0.1"
+BOOT_HISTORY_SIZE = 50  # boot records kept per tile
+A2S_INFO_REQUEST = b'\xFF\xFF\xFF\xFFTSource Engine Query\x00'
+A2S_CHALLENGE_RESPONSE = 0x41
+SERVER_ID_RE = re.compile(r'-identifier=(\w+)')
+TILE_NAME_RE = re.compile(r'LogPersistence: tile_name: (.+)')
+READ_CHUNK_SIZE = 256 * 1024
+
+
+def _file_identity(stat):
+    """Tell a recreated log file apart from the one previously at the same path"""
+    birth = getattr(stat, 'st_birthtime', None)
+    if birth is None and os.name == 'nt':
+        birth = stat.st_ctime  # creation time on Windows
+    return stat.st_ino, birth
+
+
+class _Pending:
+    """A launched tile that has not been seen ready yet"""
+    __slots__ = ('tile_id', 'server_id', 'query_port', 'launched_at', 'future', 'sock')
+
+    def __init__(self, tile_id, server_id, query_port, launched_at):
+        self.tile_id = tile_id
+        self.server_id = server_id
+        self.query_port = query_port
+        self.launched_at = launched_at
+        self.future = concurrent.futures.Future()
+        self.sock = None
+
+
+class _LogCursor:
+    """How far one log file has been read"""
+    __slots__ = ('identity', 'offset', 'server_id', 'partial')
+
+    def __init__(self, identity, offset):
+        self.identity = identity
+        self.offset = offset
+        self.server_id = None
+        self.partial = ""
+
+
+class ReadinessProbe:
+    """
+    Wait for tiles to become ready after launch.
+
+    on_ready(tile_id, seconds, signal, tile_name) is called from the probe
+    thread when a tile becomes ready; ``signal`` is "log" or "query" and
+    ``tile_name`` is None when the query answered first.
+    """
+
+    def __init__(self, log_folder: str, query_host: str = DEFAULT_QUERY_HOST,
+                 interval: float = DEFAULT_PROBE_INTERVAL, on_ready: Optional[Callable] = None,
+                 history_file: Optional[str] = None):
+        self.log_folder = log_folder
+        self.query_host = query_host
+        self.interval = interval
+        self.on_ready = on_ready
+        self.history_file = history_file
+        self._lock = threading.Lock()
+        self._pending: Dict[int, _Pending] = {}
+        self._futures: Dict[int, concurrent.futures.Future] = {}  # latest launch of each tile
+        self._cursors: Dict[str, _LogCursor] = {}
+        self._history: Dict[int, collections.deque] = {}
+        self._selector = selectors.DefaultSelector()
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._load()
+
+    def start(self):
+        """Start the probe thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='readiness-probe', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the probe thread and give up on every pending tile"""
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            for tile_id in list(self._pending):
+                self._drop(tile_id)
+
+    def expect(self, tile_id: int, server_id: str, query_port: Optional[int],
+               launched_at: Optional[float] = None) -> concurrent.futures.Future:
+        """
+        Start watching a tile that has just been launched.
+
+        Args:
+            tile_id: Tile index
+            server_id: The tile's -identifier value, as printed in its log
+            query_port: UDP port the tile answers A2S queries on, or None to only watch the log
+            launched_at: Launch time (time.time()), defaults to now
+
+        Returns:
+            Future resolving to the seconds from launch to ready
+        """
+        pending = _Pending(tile_id, server_id, query_port, launched_at or time.time())
+        if query_port:
+            try:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                sock.setblocking(False)
+                sock.connect((self.query_host, query_port))
+                pending.sock = sock
+            except OSError as e:
+                logger.warning(f"Cannot query tile {tile_id} on port {query_port}: {e}")
+        with self._lock:
+            self._drop(tile_id)
+            if not self._pending:
+                self._skip_existing_logs()
+            self._pending[tile_id] = pending
+            self._futures[tile_id] = pending.future
+            if pending.sock is not None:
+                self._selector.register(pending.sock, selectors.EVENT_READ, pending)
+        self._wakeup.set()
+        return pending.future
+
+    def cancel(self, tile_id: int):
+        """Stop waiting for a tile, e.g. because it exited before becoming ready"""
+        with self._lock:
+            self._drop(tile_id)
+
+    def is_pending(self, tile_id: int) -> bool:
+        """True while a launched tile has not reported ready"""
+        return tile_id in self._pending
+
+    def wait(self, tile_id: int, timeout: Optional[float] = None) -> Optional[float]:
+        """
+        Block until the latest launch of a tile is ready.
+
+        Returns:
+            Seconds from launch to ready, or None on timeout, cancellation or
+            if the tile was never launched
+        """
+        future = self._futures.get(tile_id)
+        if future is None:
+            return None
+        try:
+            return future.result(timeout)
+        except (concurrent.futures.TimeoutError, concurrent.futures.CancelledError):
+            return None
+
+    def boot_history(self, tile_id: int) -> List[dict]:
+        """Return the recorded boots of a tile, oldest first"""
+        with self._lock:
+            return list(self._history.get(tile_id, ()))
+
+    def boot_stats(self) -> Dict[int, dict]:
+        """Return last, mean and best time-to-ready for every tile with a recorded boot"""
+        result = {}
+        with self._lock:
+            for tile_id, history in self._history.items():
+                seconds = [boot["seconds"] for boot in history]
+                if seconds:
+                    result[tile_id] = {
+                        "boots": len(seconds),
+                        "last": seconds[-1],
+                        "mean": sum(seconds) / len(seconds),
+                        "best": min(seconds),
+                        "worst": max(seconds),
+                    }
+        return result
+
+    def _drop(self, tile_id):
+        pending = self._pending.pop(tile_id, None)
+        if pending is None:
+            return
+        if pending.sock is not None:
+            self._selector.unregister(pending.sock)
+            pending.sock.close()
+        pending.future.cancel()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            if not self._pending:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            try:
+                self._probe_once()
+            except Exception as e:
+                logger.error(f"Error probing tile readiness: {e}")
+
+    def _probe_once(self):
+        with self._lock:
+            pending = list(self._pending.values())
+            for tile in pending:
+                if tile.sock is not None:
+                    try:
+                        tile.sock.send(A2S_INFO_REQUEST)
+                    except OSError:
+                        pass  # Port not open yet (ICMP unreachable); retried next round
+            self._scan_logs()
+
+        # The wait for query answers doubles as the probe interval
+        deadline = time.monotonic() + self.interval
+        while self._pending and not self._stop_event.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if not self._selector.get_map():
+                self._stop_event.wait(remaining)
+                break
+            for key, _ in self._selector.select(remaining):
+                with self._lock:
+                    self._read_answer(key.data)
+
+    def _read_answer(self, tile):
+        if self._pending.get(tile.tile_id) is not tile:
+            return
+        try:
+            data = tile.sock.recv(4096)
+        except OSError:
+            return  # ICMP port unreachable surfaces here on some platforms
+        if len(data) >= 5 and data[4] == A2S_CHALLENGE_RESPONSE:
+            try:
+                tile.sock.send(A2S_INFO_REQUEST + data[5:9])
+            except OSError:
+                pass
+        if data:
+            self._mark_ready(tile, "query", None)
+
+    def _skip_existing_logs(self):
+        """Move every log cursor to the current end of its file so earlier output is ignored"""
+        for path in self._list_logs():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            cursor = self._cursors.get(path)
+            if cursor is None or cursor.identity != _file_identity(stat):
+                self._cursors[path] = _LogCursor(_file_identity(stat), stat.st_size)
+            else:
+                cursor.offset = stat.st_size
+                cursor.partial = ""
+
+    def _list_logs(self):
+        try:
+            with os.scandir(self.log_folder) as entries:
+                # Rotated logs are renamed copies of a previous run
+                return [entry.path for entry in entries
+                        if entry.name.endswith('.log') and '-backup-' not in entry.name]
+        except OSError:
+            return []
+
+    def _scan_logs(self):
+        for path in self._list_logs():
+            try:
+                # os.stat rather than DirEntry.stat: the latter has no inode number on Windows
+                stat = os.stat(path)
+            except OSError:
+                continue
+            cursor = self._cursors.get(path)
+            if cursor is None or cursor.identity != _file_identity(stat) or stat.st_size < cursor.offset:
+                # A new or recreated log belongs to a run started after we began watching
+                cursor = _LogCursor(_file_identity(stat), 0)
+                self._cursors[path] = cursor
+            if stat.st_size > cursor.offset:
+                self._read_log(path, cursor)
+
+    def _read_log(self, path, cursor):
+        try:
+            with open(path, 'r', errors='ignore') as file:
+                file.seek(cursor.offset)
+                data = file.read(READ_CHUNK_SIZE)
+                cursor.offset = file.tell()
+        except OSError:
+            return
+        lines = (cursor.partial + data).split('\n')
+        cursor.partial = lines.pop()
+        for line in lines:
+            id_match = SERVER_ID_RE.search(line)
+            if id_match:
+                cursor.server_id = id_match.group(1)
+                continue
+            name_match = TILE_NAME_RE.search(line)
+            if name_match and cursor.server_id:
+                for tile in self._pending.values():
+                    if tile.server_id == cursor.server_id:
+                        self._mark_ready(tile, "log", name_match.group(1).strip())
+                        break
+
+    def _mark_ready(self, tile, signal, tile_name):
+        seconds = time.time() - tile.launched_at
+        self._pending.pop(tile.tile_id, None)
+        if tile.sock is not None:
+            self._selector.unregister(tile.sock)
+            tile.sock.close()
+        history = self._history.setdefault(tile.tile_id, collections.deque(maxlen=BOOT_HISTORY_SIZE))
+        history.append({"launched_at": tile.launched_at, "seconds": round(seconds, 2), "signal": signal})
+        logger.info(f"Tile {tile.tile_id} ready after {seconds:.1f}s ({signal})")
+        tile.future.set_result(seconds)
+        self._save()
+        if self.on_ready:
+            threading.Thread(target=self._call_on_ready, args=(tile.tile_id, seconds, signal, tile_name),
+                             daemon=True).start()
+
+    def _call_on_ready(self, *args):
+        try:
+            self.on_ready(*args)
+        except Exception as e:
+            logger.error(f"Error in readiness callback: {e}")
+
+    def _load(self):
+        if not self.history_file or not os.path.exists(self.history_file):
+            return
+        try:
+            with open(self.history_file, 'r') as file:
+                data = json.load(file)
+            for tile_id, boots in data.items():
+                self._history[int(tile_id)] = collections.deque(boots, maxlen=BOOT_HISTORY_SIZE)
+        except Exception as e:
+            logger.error(f"Error loading boot history from {self.history_file}: {e}")
+
+    def _save(self):
+        if not self.history_file:
+            return
+        try:
+            with open(self.history_file, 'w') as file:
+                json.dump({str(tile_id): list(boots) for tile_id, boots in self._history.items()}, file, indent=4)
+        except Exception as e:
+            logger.error(f"Error saving boot history to {self.history_file}: {e}")
@@ -0,0 +1,307 @@
+"""
+Resource Governor Module
+
+Enforces per-tile memory and CPU ceilings so one leaking or spinning tile
+cannot drag the whole host (and every other tile) into swap.
+
+Enforcement backends:
+ - cgroups v2 (Linux, including tiles running under Wine): every tile gets
+   its own cgroup with ``memory.max`` and ``cpu.max`` set, so the kernel
+   enforces the limits; the governor reports the breach counters the kernel
+   keeps in ``memory.events`` and ``cpu.stat``
+ - soft limits (everywhere else): the governor compares the resource
+   sampler's readings against the limits and acts itself
+
+Actions on a breach:
+ - memory: "restart" asks the manager for a controlled restart of the tile,
+   "warn" only reports it
+ - CPU: "throttle" drops the tile to idle priority until it is back under
+   the limit (the cgroup backend throttles in the kernel instead), "warn"
+   only reports it
+
+Every breach is recorded as an event and passed to ``on_event``.
+"""
+
+import os
+import time
+import logging
+import threading
+import collections
+from typing import Callable, Dict, List, Optional
+
+import psutil
+
+logger = logging.getLogger('LOManager.Governor')
+
+# Constants
+DEFAULT_INTERVAL = 5.0  # seconds between limit checks
+DEFAULT_CPU_WINDOW = 60.0  # CPU use is averaged over this many seconds before acting
+EVENT_COOLDOWN = 300.0  # the same breach of the same tile is reported at most this often
+EVENT_HISTORY_SIZE = 500
+CPU_RELEASE_FRACTION = 0.8  # a throttled tile is released below this share of its CPU limit
+CGROUP_ROOT = "/sys/fs/cgroup"
+CGROUP_GROUP = "loman"
+CPU_PERIOD_US = 100000
+MEMORY_ACTIONS = ("restart", "warn")
+CPU_ACTIONS = ("throttle", "warn")
+THROTTLE_PRIORITY = psutil.IDLE_PRIORITY_CLASS if psutil.WINDOWS else 19
+
+
+def parse_size(value) -> Optional[int]:
+    """Parse a byte count such as 8589934592, "8GB" or "512M"; None/0/"" mean no limit"""
+    if value in (None, "", 0):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip().upper().rstrip("B")
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(float(text))
+
+
+class CgroupLimiter:
+    """Per-tile cgroup v2 groups under <root>/<group>/tile<N>"""
+
+    def __init__(self, root: str = CGROUP_ROOT, group: str = CGROUP_GROUP):
+        self.root = root
+        self.base = os.path.join(root, group)
+        self._counters: Dict[int, Dict[str, int]] = {}
+
+    @staticmethod
+    def available(root: str = CGROUP_ROOT) -> bool:
+        """True on a cgroup v2 host where we may create groups"""
+        controllers = os.path.join(root, "cgroup.controllers")
+        if not os.path.exists(controllers) or not os.access(root, os.W_OK):
+            return False
+        with open(controllers) as file:
+            enabled = file.read().split()
+        return "memory" in enabled and "cpu" in enabled
+
+    def _write(self, path, value):
+        with open(path, 'w') as file:
+            file.write(str(value))
+
+    def _read(self, path) -> Dict[str, int]:
+        try:
+            with open(path) as file:
+                return {key: int(value) for key, value in (line.split() for line in file if line.strip())}
+        except OSError:
+            return {}
+
+    def tile_path(self, tile_id: int) -> str:
+        return os.path.join(self.base, f"tile{tile_id}")
+
+    def attach(self, tile_id: int, pids: List[int], memory_limit: Optional[int], cpu_limit: Optional[float]):
+        """Create (or update) the tile's cgroup, set its limits and move ``pids`` into it"""
+        if not os.path.isdir(self.base):
+            os.makedirs(self.base, exist_ok=True)
+            self._write(os.path.join(self.root, "cgroup.subtree_control"), "+memory +cpu")
+            self._write(os.path.join(self.base, "cgroup.subtree_control"), "+memory +cpu")
+        path = self.tile_path(tile_id)
+        os.makedirs(path, exist_ok=True)
+        self._write(os.path.join(path, "memory.max"), memory_limit or "max")
+        quota = int(cpu_limit / 100 * CPU_PERIOD_US) if cpu_limit else "max"
+        self._write(os.path.join(path, "cpu.max"), f"{quota} {CPU_PERIOD_US}")
+        for pid in pids:
+            try:
+                self._write(os.path.join(path, "cgroup.procs"), pid)
+            except OSError:
+                pass  # Exited in the meantime
+
+    def breaches(self, tile_id: int) -> Dict[str, int]:
+        """
+        Return how often each limit was hit since the last call:
+        {"memory_max", "oom_kill", "cpu_throttled"}
+        """
+        path = self.tile_path(tile_id)
+        memory = self._read(os.path.join(path, "memory.events"))
+        cpu = self._read(os.path.join(path, "cpu.stat"))
+        current = {"memory_max": memory.get("max", 0), "oom_kill": memory.get("oom_kill", 0),
+                   "cpu_throttled": cpu.get("nr_throttled", 0)}
+        previous = self._counters.get(tile_id, {})
+        self._counters[tile_id] = current
+        return {key: value - previous.get(key, 0) for key, value in current.items()}
+
+
+class ResourceGovernor:
+    """
+    Check every tile against its limits at a fixed interval.
+
+    ``sampler`` is the manager's ResourceSampler, ``get_pids`` returns
+    {tile_id: pid} of the running tiles and ``on_restart(tile_id, event)``
+    performs a controlled restart. ``on_event(event)`` is told about every
+    breach.
+    """
+
+    def __init__(self, sampler, get_pids: Callable[[], Dict[int, int]],
+                 memory_limit: Optional[int] = None, cpu_limit: Optional[float] = None,
+                 memory_action: str = "restart", cpu_action: str = "throttle",
+                 on_restart: Optional[Callable] = None, on_event: Optional[Callable] = None,
+                 interval: float = DEFAULT_INTERVAL, cpu_window: float = DEFAULT_CPU_WINDOW,
+                 use_cgroups: bool = True):
+        if memory_action not in MEMORY_ACTIONS:
+            raise ValueError(f"Unknown memory action {memory_action!r}, expected one of {MEMORY_ACTIONS}")
+        if cpu_action not in CPU_ACTIONS:
+            raise ValueError(f"Unknown CPU action {cpu_action!r}, expected one of {CPU_ACTIONS}")
+        self.sampler = sampler
+        self.get_pids = get_pids
+        self.memory_limit = memory_limit
+        self.cpu_limit = cpu_limit
+        self.memory_action = memory_action
+        self.cpu_action = cpu_action
+        self.on_restart = on_restart
+        self.on_event = on_event
+        self.interval = interval
+        self.cpu_window = cpu_window
+        self.cgroups = CgroupLimiter() if use_cgroups and CgroupLimiter.available() else None
+        self.backend = "cgroup" if self.cgroups else "soft"
+        self.events = collections.deque(maxlen=EVENT_HISTORY_SIZE)
+        self._last_reported: Dict[tuple, float] = {}
+        self._throttled: Dict[int, dict] = {}  # tile_id -> {pid: original priority}
+        self._restarting = set()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start checking limits in a background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='resource-governor', daemon=True)
+        self._thread.start()
+        logger.info(f"Resource governor started ({self.backend} limits: memory={self.memory_limit} "
+                    f"cpu={self.cpu_limit}%)")
+
+    def stop(self):
+        """Stop the background thread"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def attach(self, tile_id: int, pid: int):
+        """Put a (re)launched tile's process tree under its limits (cgroup backend only)"""
+        if self.cgroups is None:
+            return
+        try:
+            root = psutil.Process(pid)
+            pids = [pid] + [child.pid for child in root.children(recursive=True)]
+            self.cgroups.attach(tile_id, pids, self.memory_limit, self.cpu_limit)
+        except (psutil.NoSuchProcess, OSError) as e:
+            logger.error(f"Could not apply cgroup limits to tile {tile_id}: {e}")
+
+    def restart_done(self, tile_id: int):
+        """Allow the next restart of a tile once a controlled restart has finished"""
+        with self._lock:
+            self._restarting.discard(tile_id)
+        self._throttled.pop(tile_id, None)
+
+    def recent_events(self, seconds: Optional[float] = None) -> List[dict]:
+        """Return breach events, oldest first, optionally only the last ``seconds``"""
+        events = list(self.events)
+        if seconds is not None:
+            cutoff = time.time() - seconds
+            events = [event for event in events if event["time"] >= cutoff]
+        return events
+
+    def is_throttled(self, tile_id: int) -> bool:
+        return tile_id in self._throttled
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.check_once()
+            except Exception as e:
+                logger.error(f"Error checking tile limits: {e}")
+
+    def check_once(self):
+        """Check every running tile once"""
+        pids = self.get_pids()
+        for tile_id in list(self._throttled):
+            if tile_id not in pids:
+                del self._throttled[tile_id]
+        for tile_id, pid in pids.items():
+            if self.cgroups is not None:
+                self._check_cgroup(tile_id)
+            else:
+                self._check_soft(tile_id, pid)
+
+    def _check_cgroup(self, tile_id):
+        breaches = self.cgroups.breaches(tile_id)
+        if breaches.get("oom_kill"):
+            self._event(tile_id, "memory", None, self.memory_limit, "killed by the kernel at memory.max")
+        elif breaches.get("memory_max"):
+            self._event(tile_id, "memory", None, self.memory_limit, "held at memory.max")
+        if breaches.get("cpu_throttled"):
+            self._event(tile_id, "cpu", None, self.cpu_limit,
+                        f"throttled {breaches['cpu_throttled']} times by cpu.max")
+
+    def _check_soft(self, tile_id, pid):
+        latest = self.sampler.latest(tile_id) if self.sampler else None
+        if latest is None:
+            return
+
+        if self.memory_limit and latest["rss"] > self.memory_limit:
+            if self.memory_action == "restart" and self.on_restart:
+                with self._lock:
+                    first = tile_id not in self._restarting
+                    self._restarting.add(tile_id)
+                if first:
+                    event = self._event(tile_id, "memory", latest["rss"], self.memory_limit, "restart", force=True)
+                    self.on_restart(tile_id, event)
+            else:
+                self._event(tile_id, "memory", latest["rss"], self.memory_limit, "warn")
+
+        if self.cpu_limit:
+            samples = self.sampler.window(tile_id, self.cpu_window)
+            if len(samples) < 2 or samples[-1]["time"] - samples[0]["time"] < self.cpu_window * 0.9:
+                return  # Not enough history yet for a sustained average
+            average = sum(sample["cpu_percent"] for sample in samples) / len(samples)
+            if average > self.cpu_limit:
+                if self.cpu_action == "throttle" and tile_id not in self._throttled:
+                    self._throttle(tile_id, pid)
+                    self._event(tile_id, "cpu", average, self.cpu_limit, "throttle", force=True)
+                elif self.cpu_action == "warn":
+                    self._event(tile_id, "cpu", average, self.cpu_limit, "warn")
+            elif tile_id in self._throttled and average < self.cpu_limit * CPU_RELEASE_FRACTION:
+                self._release(tile_id)
+                self._event(tile_id, "cpu", average, self.cpu_limit, "released", force=True)
+
+    def _throttle(self, tile_id, pid):
+        original = {}
+        try:
+            root = psutil.Process(pid)
+            for proc in [root] + root.children(recursive=True):
+                try:
+                    original[proc.pid] = proc.nice()
+                    proc.nice(THROTTLE_PRIORITY)
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+        except psutil.NoSuchProcess:
+            return
+        self._throttled[tile_id] = original
+
+    def _release(self, tile_id):
+        for pid, priority in self._throttled.pop(tile_id, {}).items():
+            try:
+                psutil.Process(pid).nice(priority)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+
+    def _event(self, tile_id, kind, value, limit, action, force=False):
+        now = time.time()
+        key = (tile_id, kind, action)
+        if not force and now - self._last_reported.get(key, 0) < EVENT_COOLDOWN:
+            return None
+        self._last_reported[key] = now
+        event = {"time": now, "tile_id": tile_id, "kind": kind, "value": value, "limit": limit,
+                 "action": action, "backend": self.backend}
+        self.events.append(event)
+        logger.warning(f"Tile {tile_id} {kind} limit breach: value={value} limit={limit} action={action}")
+        if self.on_event:
+            try:
+                self.on_event(event)
+            except Exception as e:
+                logger.error(f"Error in governor event callback: {e}")
+        return event
@@ -0,0 +1,252 @@
+"""
+Resource Sampler Module
+
+Background sampling of every tile's process tree: CPU %, resident memory,
+thread count, handle (Windows) or file descriptor count, and disk I/O.
+
+Samples are kept per tile in a fixed-size ring buffer stored column-wise in
+``array('d')`` blocks, so memory use is constant no matter how long the
+manager runs. Process objects are cached between samples, the process
+trees are rebuilt from a single scan of the process table every few ticks,
+thread and handle counts are carried forward between refreshes, and shell
+wrappers are skipped. Together that keeps sampling every tile once a second
+around or below 1% of one core.
+"""
+
+import time
+import logging
+import threading
+from array import array
+from typing import Callable, Dict, List, Optional
+
+import psutil
+
+logger = logging.getLogger('LOManager.ResourceSampler')
+
+# Constants
+DEFAULT_INTERVAL = 1.0  # seconds between samples
+DEFAULT_CAPACITY = 3600  # samples kept per tile (one hour at the default interval)
+CHILDREN_REFRESH_TICKS = 10  # re-read the process trees every N samples
+COUNTS_REFRESH_TICKS = 5  # thread/handle counts change slowly: re-read every N samples
+# Shell wrappers the tiles are launched through: part of the tree, but not worth sampling
+SHELL_NAMES = {"cmd.exe", "sh", "bash", "dash"}
+FIELDS = ("time", "cpu_percent", "rss", "threads", "handles", "read_bytes", "write_bytes")
+
+
+class TileSeries:
+    """Fixed-size ring buffer of samples for one tile"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._columns = {name: array('d', [0.0]) * capacity for name in FIELDS}
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def append(self, values: Dict[str, float]):
+        """Store one sample, overwriting the oldest when the buffer is full"""
+        with self._lock:
+            for name in FIELDS:
+                self._columns[name][self._next] = values.get(name, 0.0)
+            self._next = (self._next + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def window(self, seconds: Optional[float] = None, count: Optional[int] = None) -> List[Dict[str, float]]:
+        """
+        Return samples oldest first, limited to the last ``seconds`` and/or ``count``.
+        """
+        with self._lock:
+            start = (self._next - self._count) % self.capacity
+            indices = [(start + i) % self.capacity for i in range(self._count)]
+            samples = [{name: self._columns[name][i] for name in FIELDS} for i in indices]
+        if seconds is not None and samples:
+            cutoff = samples[-1]["time"] - seconds
+            samples = [sample for sample in samples if sample["time"] >= cutoff]
+        if count is not None:
+            samples = samples[-count:] if count > 0 else []
+        return samples
+
+    def column(self, name: str, seconds: Optional[float] = None) -> List[float]:
+        """Return one field of the window as a plain list"""
+        return [sample[name] for sample in self.window(seconds)]
+
+    def latest(self) -> Optional[Dict[str, float]]:
+        """Return the newest sample, or None if nothing was recorded yet"""
+        samples = self.window(count=1)
+        return samples[0] if samples else None
+
+
+class _TreeCache:
+    """Cached psutil handles for one tile's process tree"""
+    __slots__ = ('root_pid', 'processes', 'counts')
+
+    def __init__(self, root_pid):
+        self.root_pid = root_pid
+        self.processes = {}
+        self.counts = None
+
+
+class ResourceSampler:
+    """
+    Sample every tile's process tree at a fixed interval.
+
+    ``get_pids`` is called once per tick and must return {tile_id: root pid}
+    for every running tile (for example TileSupervisor.pids).
+    """
+
+    def __init__(self, get_pids: Callable[[], Dict[int, int]], interval: float = DEFAULT_INTERVAL,
+                 capacity: int = DEFAULT_CAPACITY):
+        self.get_pids = get_pids
+        self.interval = interval
+        self.capacity = capacity
+        self.series: Dict[int, TileSeries] = {}
+        self._trees: Dict[int, _TreeCache] = {}
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._cpu_time = 0.0
+        self._started_at = None
+        self._ticks = 0
+
+    def start(self):
+        """Start sampling in a background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._started_at = time.monotonic()
+        self._cpu_time = 0.0
+        self._thread = threading.Thread(target=self._run, name='resource-sampler', daemon=True)
+        self._thread.start()
+        logger.info(f"Resource sampler started (every {self.interval}s, {self.capacity} samples per tile)")
+
+    def stop(self):
+        """Stop the background thread"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def window(self, tile_id: int, seconds: Optional[float] = None,
+               count: Optional[int] = None) -> List[Dict[str, float]]:
+        """Return recent samples for a tile, oldest first"""
+        series = self.series.get(tile_id)
+        return series.window(seconds, count) if series else []
+
+    def latest(self, tile_id: int) -> Optional[Dict[str, float]]:
+        """Return the newest sample for a tile"""
+        series = self.series.get(tile_id)
+        return series.latest() if series else None
+
+    def overhead_percent(self) -> float:
+        """CPU time spent sampling as a percentage of one core since start()"""
+        if not self._started_at:
+            return 0.0
+        elapsed = time.monotonic() - self._started_at
+        return 100.0 * self._cpu_time / elapsed if elapsed > 0 else 0.0
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while not self._stop_event.is_set():
+            started = time.thread_time()
+            try:
+                self.sample_once()
+            except Exception as e:
+                logger.error(f"Error sampling tile resources: {e}")
+            self._cpu_time += time.thread_time() - started
+
+            next_tick += self.interval
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                next_tick = time.monotonic()
+                delay = 0
+            self._stop_event.wait(delay)
+
+    def sample_once(self):
+        """Take one sample of every running tile"""
+        now = time.time()
+        pids = self.get_pids()
+
+        for tile_id in list(self._trees):
+            if tile_id not in pids:
+                del self._trees[tile_id]
+
+        stale = []
+        for tile_id, pid in pids.items():
+            tree = self._trees.get(tile_id)
+            if tree is None or tree.root_pid != pid:
+                tree = _TreeCache(pid)
+                self._trees[tile_id] = tree
+            if not tree.processes:
+                stale.append(tree)
+        if self._ticks % CHILDREN_REFRESH_TICKS == 0:
+            stale = list(self._trees.values())
+        if stale:
+            self._refresh_trees(stale)
+        self._ticks += 1
+
+        for tile_id, tree in self._trees.items():
+            series = self.series.get(tile_id)
+            if series is None:
+                series = TileSeries(self.capacity)
+                self.series[tile_id] = series
+            series.append(self._sample_tree(tree, now))
+
+    def _refresh_trees(self, trees):
+        """Re-read the members of the given trees from one scan of the process table"""
+        children = {}
+        for proc in psutil.process_iter(['ppid']):
+            children.setdefault(proc.info['ppid'], []).append(proc.pid)
+
+        for tree in trees:
+            members = []
+            pending = [tree.root_pid]
+            while pending:
+                pid = pending.pop()
+                members.append(pid)
+                pending.extend(children.get(pid, ()))
+
+            processes = {}
+            for pid in members:
+                # Keep existing handles so cpu_percent() has a baseline to diff against
+                proc = tree.processes.get(pid)
+                if proc is None:
+                    try:
+                        proc = psutil.Process(pid)
+                        if pid == tree.root_pid and len(members) > 1 and proc.name() in SHELL_NAMES:
+                            continue
+                    except psutil.Error:
+                        continue
+                processes[pid] = proc
+            tree.processes = processes
+
+    def _sample_tree(self, tree, now):
+        values = {"time": now, "cpu_percent": 0.0, "rss": 0.0, "threads": 0.0,
+                  "handles": 0.0, "read_bytes": 0.0, "write_bytes": 0.0}
+        counts_due = (self._ticks - 1) % COUNTS_REFRESH_TICKS == 0 or tree.counts is None
+        if not counts_due:
+            values["threads"], values["handles"] = tree.counts
+        for pid, proc in list(tree.processes.items()):
+            try:
+                with proc.oneshot():
+                    values["cpu_percent"] += proc.cpu_percent(None)
+                    values["rss"] += proc.memory_info().rss
+                    if counts_due:
+                        values["threads"] += proc.num_threads()
+                        if psutil.WINDOWS:
+                            values["handles"] += proc.num_handles()
+                        else:
+                            values["handles"] += proc.num_fds()
+                    try:
+                        io = proc.io_counters()
+                        values["read_bytes"] += io.read_bytes
+                        values["write_bytes"] += io.write_bytes
+                    except (AttributeError, psutil.AccessDenied):
+                        pass
+            except psutil.NoSuchProcess:
+                del tree.processes[pid]
+            except psutil.AccessDenied:
+                pass
+        if counts_due:
+            tree.counts = (values["threads"], values["handles"])
+        return values
@@ -0,0 +1,145 @@
+"""
+Server Update Module
+
+Decides whether the Last Oasis dedicated server needs an update by
+comparing build IDs instead of scanning SteamCMD output for phrases.
+
+ - installed: ``buildid`` from ``steamapps/appmanifest_920720.acf`` of the
+   install, re-read only when the file changes
+ - remote: ``buildid`` of the branch (normally ``public``) from SteamCMD's
+   ``app_info_print``, cached for ``ttl`` seconds
+
+A check with a fresh remote answer only stats the manifest, so it takes
+milliseconds. An update is only reported when both build IDs are known and
+differ, or when the manifest says the install is incomplete; when Steam
+cannot be asked, no update is reported.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Callable, Optional
+
+import vdf
+from steamcmd import SERVER_APP_ID
+
+logger = logging.getLogger('LOManager.ServerUpdate')
+
+# Constants
+DEFAULT_REMOTE_TTL = 600.0  # seconds a remote build ID is trusted
+STATE_FULLY_INSTALLED = 4  # StateFlags bit of a complete install
+
+
+def manifest_name(app_id: int = SERVER_APP_ID) -> str:
+    return f"appmanifest_{app_id}.acf"
+
+
+def find_app_manifest(folder_path: str, steam_cmd_path: str, app_id: int = SERVER_APP_ID) -> str:
+    """
+    Return the app manifest of the install that ``folder_path`` (the
+    server's Binaries/Win64 folder) belongs to: the ``steamapps`` folder
+    above it (a Steam library) or next to one of its parents (an install
+    made with ``+force_install_dir``), or SteamCMD's own ``steamapps`` when
+    there is none.
+    """
+    name = manifest_name(app_id)
+    path = os.path.abspath(folder_path or ".")
+    while True:
+        if os.path.basename(path).lower() == "steamapps" and os.path.exists(os.path.join(path, name)):
+            return os.path.join(path, name)
+        if os.path.exists(os.path.join(path, "steamapps", name)):
+            return os.path.join(path, "steamapps", name)
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return os.path.join(steam_cmd_path + "steamapps", name)
+
+
+class BuildIdChecker:
+    """
+    Compare the installed build ID with the remote one.
+
+    ``fetch_remote()`` returns the remote build ID or None (it is only
+    called when the cached answer is older than ``ttl`` seconds).
+    """
+
+    def __init__(self, manifest_path: str, fetch_remote: Callable[[], Optional[str]],
+                 ttl: float = DEFAULT_REMOTE_TTL):
+        self.manifest_path = manifest_path
+        self.fetch_remote = fetch_remote
+        self.ttl = ttl
+        self.last_check = None
+        self._manifest_key = None
+        self._manifest = {}
+        self._remote = None
+        self._remote_at = 0.0
+        self._lock = threading.Lock()
+
+    def installed_manifest(self) -> dict:
+        """Return the AppState block of the manifest, {} when there is none"""
+        try:
+            stat = os.stat(self.manifest_path)
+        except OSError:
+            self._manifest_key, self._manifest = None, {}
+            return self._manifest
+        key = (stat.st_mtime_ns, stat.st_size)
+        if key != self._manifest_key:
+            try:
+                self._manifest = vdf.get(vdf.load(self.manifest_path), "AppState", default={})
+            except (OSError, vdf.VDFError) as e:
+                logger.error(f"Could not read {self.manifest_path}: {e}")
+                self._manifest = {}
+            self._manifest_key = key
+        return self._manifest
+
+    def installed_build_id(self) -> Optional[str]:
+        return vdf.get(self.installed_manifest(), "buildid")
+
+    def remote_build_id(self, force: bool = False) -> Optional[str]:
+        """Return the cached remote build ID, asking Steam when it is older than ``ttl``"""
+        # Concurrent checks wait for one fetch instead of each starting SteamCMD
+        with self._lock:
+            if force or self._remote is None or time.time() - self._remote_at > self.ttl:
+                remote = self.fetch_remote()
+                if remote is not None:
+                    self._remote, self._remote_at = str(remote), time.time()
+                elif self._remote is not None:
+                    logger.warning("Could not get the remote build ID, keeping the cached one")
+            return self._remote
+
+    def invalidate_remote(self):
+        """Ask Steam again on the next check"""
+        with self._lock:
+            self._remote = None
+
+    def check(self, force: bool = False) -> dict:
+        """
+        Return {"update_available", "installed", "remote", "remote_age",
+        "reason", "seconds"} and remember it as ``last_check``.
+        """
+        started = time.perf_counter()
+        installed = self.installed_build_id()
+        remote = self.remote_build_id(force)
+        flags = vdf.get(self.installed_manifest(), "StateFlags")
+        if remote is None:
+            update, reason = False, "remote build ID unknown"
+        elif installed is None:
+            update, reason = True, "no installed build ID"
+        elif installed != remote:
+            update, reason = True, f"build {installed} installed, {remote} available"
+        elif flags is not None and flags.isdigit() and not int(flags) & STATE_FULLY_INSTALLED:
+            update, reason = True, f"install incomplete (StateFlags {flags})"
+        else:
+            update, reason = False, f"build {installed} is current"
+        self.last_check = {
+            "time": time.time(),
+            "update_available": update,
+            "installed": installed,
+            "remote": remote,
+            "remote_age": time.time() - self._remote_at if remote is not None else None,
+            "reason": reason,
+            "seconds": time.perf_counter() - started,
+        }
+        return self.last_check
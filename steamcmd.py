@@ -0,0 +1,394 @@
+"""
+SteamCMD Helper Module
+
+This module wraps the SteamCMD invocations used by the Last Oasis manager.
+It handles:
+ - Batching many workshop downloads into a single SteamCMD session
+ - Running a bounded number of sessions at the same time
+ - Parsing per-item success or failure out of SteamCMD's output
+ - Reading an app's remote build IDs from ``app_info_print`` as it streams
+ - Running ``app_update`` with or without validation and timing each phase
+
+Each SteamCMD launch pays for start-up, self-update checks and an anonymous
+login, so downloading one mod per process makes update time grow with the
+number of mods instead of with the amount of data. Given a ``pool``
+(steamcmd_session.SteamCMDPool), the functions below send their commands to
+an already logged-in SteamCMD instead and only start their own process when
+no session can be started.
+"""
+
+import re
+import time
+import logging
+import threading
+import subprocess
+import concurrent.futures
+from typing import Callable, Dict, List, Optional
+
+import vdf
+from steamcmd_session import SessionError, SessionStartError
+
+# Configure logger
+logger = logging.getLogger("SteamCMD")
+
+# Constants
+WORKSHOP_APP_ID = 903950
+SERVER_APP_ID = 920720
+DEFAULT_APP_INFO_TIMEOUT = 120
+DEFAULT_BATCH_SIZE = 25
+DEFAULT_MAX_SESSIONS = 1
+DEFAULT_DOWNLOAD_RETRIES = 1
+
+DOWNLOAD_SUCCESS_RE = re.compile(r'Success\. Downloaded item (\d+) to "([^"]*)" \((\d+) bytes\)')
+DOWNLOAD_ERROR_RE = re.compile(r'ERROR! Download item (\d+) failed \(([^)]*)\)')
+LOGIN_START_RE = re.compile(r"Logging in user '|Connecting anonymously")
+LOGIN_DONE_RE = re.compile(r'Waiting for user info\.\.\.OK|Logged in OK')
+UPDATE_STATE_RE = re.compile(r'Update state \(0x[0-9a-fA-F]+\) ([a-zA-Z ]+?),')
+APP_UPDATE_SUCCESS_RE = re.compile(r"Success! App '\d+' (fully installed|already up to date)")
+APP_UPDATE_ERROR_RE = re.compile(r'Error! App \'\d+\' state is (0x[0-9a-fA-F]+) after update job|ERROR! (.*)')
+
+
+def steamcmd_executable(steam_cmd_path: str) -> str:
+    """Return the SteamCMD executable inside ``steam_cmd_path``"""
+    return f"{steam_cmd_path}steamcmd.exe"
+
+
+def build_workshop_command(steam_cmd_path: str, workshop_ids: List[str]) -> List[str]:
+    """
+    Build one SteamCMD command that downloads every given workshop item.
+
+    SteamCMD is started without a shell, so a timeout kills SteamCMD itself
+    and not just a shell that would leave it holding the output pipe.
+
+    Args:
+        steam_cmd_path: Directory containing SteamCMD (with trailing separator)
+        workshop_ids: Workshop IDs to download in this session
+
+    Returns:
+        The command as an argument list
+    """
+    items = [arg for workshop_id in workshop_ids
+             for arg in ("+workshop_download_item", str(WORKSHOP_APP_ID), workshop_id)]
+    return [steamcmd_executable(steam_cmd_path), "+login", "anonymous", *items, "+quit"]
+
+
+def parse_workshop_output(output: str, workshop_ids: List[str]) -> Dict[str, dict]:
+    """
+    Extract the result of each requested workshop item from SteamCMD output.
+
+    Args:
+        output: Captured SteamCMD stdout
+        workshop_ids: Workshop IDs that were requested
+
+    Returns:
+        Dictionary mapping workshop ID to {"success", "path", "bytes", "error"}.
+        Items SteamCMD said nothing about are reported as failed.
+    """
+    results = {
+        workshop_id: {"success": False, "path": None, "bytes": 0, "error": "no result in SteamCMD output"}
+        for workshop_id in workshop_ids
+    }
+    for match in DOWNLOAD_SUCCESS_RE.finditer(output or ""):
+        workshop_id, path, size = match.groups()
+        results[workshop_id] = {"success": True, "path": path, "bytes": int(size), "error": None}
+    for match in DOWNLOAD_ERROR_RE.finditer(output or ""):
+        workshop_id, reason = match.groups()
+        results[workshop_id] = {"success": False, "path": None, "bytes": 0, "error": reason}
+    return results
+
+
+def _run_pooled_batch(pool, workshop_ids: List[str], timeout: Optional[float],
+                      hang_timeout: Optional[float]) -> Dict[str, dict]:
+    logger.info(f"Downloading {len(workshop_ids)} workshop items in a running SteamCMD session")
+    commands = [f"workshop_download_item {WORKSHOP_APP_ID} {workshop_id}" for workshop_id in workshop_ids]
+    try:
+        # SteamCMD prints nothing while an item downloads, so silence alone is no sign of a hang
+        output = pool.run(commands, timeout, hang_timeout=hang_timeout)
+    except SessionStartError:
+        raise
+    except SessionError as e:
+        # Items finished before the session hung keep their result; the rest is retried
+        logger.error(f"SteamCMD session failed during the downloads: {e}")
+        output = e.output
+    return parse_workshop_output("\n".join(output), workshop_ids)
+
+
+def _run_batch(steam_cmd_path: str, workshop_ids: List[str], timeout: Optional[float],
+               pool=None, hang_timeout: Optional[float] = None) -> Dict[str, dict]:
+    if pool is not None:
+        try:
+            return _run_pooled_batch(pool, workshop_ids, timeout, hang_timeout)
+        except SessionStartError as e:
+            logger.warning(f"{e}; using a separate SteamCMD process")
+    cmd = build_workshop_command(steam_cmd_path, workshop_ids)
+    logger.info(f"Downloading {len(workshop_ids)} workshop items in one SteamCMD session")
+    try:
+        process = subprocess.run(cmd, text=True, errors='replace', capture_output=True, timeout=timeout)
+        output = process.stdout
+    except subprocess.TimeoutExpired as e:
+        logger.error(f"SteamCMD session timed out after {timeout}s")
+        output = e.stdout.decode(errors='replace') if isinstance(e.stdout, bytes) else (e.stdout or "")
+    logger.debug(output)
+    return parse_workshop_output(output, workshop_ids)
+
+
+def download_workshop_items(steam_cmd_path: str, workshop_ids: List[str],
+                            batch_size: int = DEFAULT_BATCH_SIZE,
+                            max_sessions: int = DEFAULT_MAX_SESSIONS,
+                            retries: int = DEFAULT_DOWNLOAD_RETRIES,
+                            timeout: Optional[float] = None, pool=None,
+                            hang_timeout: Optional[float] = None) -> Dict[str, dict]:
+    """
+    Download workshop items using as few SteamCMD sessions as possible.
+
+    Items are split into batches of ``batch_size``; each batch is one SteamCMD
+    process that logs in once and downloads all of its items. Up to
+    ``max_sessions`` batches run at the same time. Failed items are retried
+    together in a follow-up batch.
+
+    Args:
+        steam_cmd_path: Directory containing SteamCMD (with trailing separator)
+        workshop_ids: Workshop IDs to download
+        batch_size: Maximum items per SteamCMD session
+        max_sessions: Maximum SteamCMD sessions running at once
+        retries: How many times failed items are retried
+        timeout: Per-session timeout in seconds, or None
+        pool: SteamCMD session pool to download with, or None for a new
+            process per batch (``max_sessions`` should not exceed its size)
+        hang_timeout: Seconds a pooled download may print nothing before its
+            session is replaced, or None to only apply ``timeout``
+
+    Returns:
+        Dictionary mapping workshop ID to its parsed result
+    """
+    pending = [workshop_id.strip() for workshop_id in workshop_ids if workshop_id.strip()]
+    results: Dict[str, dict] = {}
+    batch_size = max(1, batch_size)
+
+    for attempt in range(retries + 1):
+        if not pending:
+            break
+        if attempt > 0:
+            logger.info(f"Retrying {len(pending)} failed workshop downloads")
+
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_sessions)) as executor:
+            run = lambda batch: _run_batch(steam_cmd_path, batch, timeout, pool, hang_timeout)  # noqa: E731
+            for batch_results in executor.map(run, batches):
+                results.update(batch_results)
+
+        pending = [workshop_id for workshop_id in pending if not results[workshop_id]["success"]]
+
+    succeeded = sum(1 for result in results.values() if result["success"])
+    logger.info(f"Workshop download complete: {succeeded}/{len(results)} items succeeded")
+    for workshop_id, result in results.items():
+        if not result["success"]:
+            logger.warning(f"Workshop item {workshop_id} failed to download: {result['error']}")
+    return results
+
+
+def _reap(process, timeout=60):
+    try:
+        process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.communicate()
+
+
+def build_app_info_command(steam_cmd_path: str, app_id: int = SERVER_APP_ID) -> List[str]:
+    """Build the SteamCMD command that prints fresh app info for ``app_id``"""
+    return [steamcmd_executable(steam_cmd_path), "+login", "anonymous", "+app_info_update", "1",
+            "+app_info_print", str(app_id), "+quit"]
+
+
+def _fetch_pooled_app_info(pool, app_id: int, timeout: Optional[float]) -> Optional[dict]:
+    try:
+        with pool.session() as session:
+            session.run("app_info_update 1", timeout)
+            output = session.run(f"app_info_print {app_id}", timeout)
+    except SessionStartError:
+        raise
+    except SessionError as e:
+        logger.error(f"SteamCMD session failed while printing the app info of {app_id}: {e}")
+        return None
+    return vdf.find_block(output, str(app_id))
+
+
+def fetch_app_info(steam_cmd_path: str, app_id: int = SERVER_APP_ID,
+                   timeout: Optional[float] = DEFAULT_APP_INFO_TIMEOUT, pool=None) -> Optional[dict]:
+    """
+    Run ``app_info_print`` and parse the app's VDF block while SteamCMD is
+    still writing it. Returns the block as a dict, or None when SteamCMD
+    printed no block (e.g. it could not log in) or ran into ``timeout``.
+    """
+    if pool is not None:
+        try:
+            info = _fetch_pooled_app_info(pool, app_id, timeout)
+            if info is None:
+                logger.error(f"SteamCMD printed no app info for {app_id}")
+            return info
+        except SessionStartError as e:
+            logger.warning(f"{e}; using a separate SteamCMD process")
+        except vdf.VDFError as e:
+            logger.error(f"Could not parse the app info of {app_id}: {e}")
+            return None
+    cmd = build_app_info_command(steam_cmd_path, app_id)
+    try:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                   text=True, errors='replace')
+    except OSError as e:
+        logger.error(f"Could not start SteamCMD: {e}")
+        return None
+    timer = threading.Timer(timeout, process.kill) if timeout else None
+    if timer:
+        timer.start()
+    try:
+        info = vdf.find_block(process.stdout, str(app_id))
+    except vdf.VDFError as e:
+        logger.error(f"Could not parse the app info of {app_id}: {e}")
+        info = None
+    finally:
+        if timer:
+            timer.cancel()
+        # Only +quit is left once the block is read; let SteamCMD finish it in the background
+        threading.Thread(target=_reap, args=(process,), name='steamcmd-reap', daemon=True).start()
+    if info is None:
+        logger.error(f"SteamCMD printed no app info for {app_id}")
+    return info
+
+
+def branch_build_id(app_info: dict, branch: str = "public") -> Optional[str]:
+    """Return the build ID of ``branch`` from an app info block"""
+    return vdf.get(app_info, "depots", "branches", branch, "buildid")
+
+
+def build_app_update_command(steam_cmd_path: str, app_id: int = SERVER_APP_ID, validate: bool = False,
+                             install_dir: Optional[str] = None) -> List[str]:
+    """
+    Build the SteamCMD command that updates ``app_id``, validating every
+    file only if asked, into ``install_dir`` when given
+    """
+    force_dir = ["+force_install_dir", install_dir.rstrip('\\/')] if install_dir else []
+    return [steamcmd_executable(steam_cmd_path), *force_dir, "+login", "anonymous",
+            "+app_update", str(app_id), *(["validate"] if validate else []), "+quit"]
+
+
+class PhaseTimer:
+    """
+    Split a SteamCMD run into phases from its output lines: ``startup``
+    until the login starts, ``login``, ``checking`` until the first
+    ``Update state`` line, one phase per update state name (e.g.
+    ``verifying install``, ``downloading``, ``committing``) and ``finish``
+    after the result line. Seconds spent in phases that
+    repeat are added up.
+    """
+
+    def __init__(self, phase: str = "startup"):
+        self.started = time.perf_counter()
+        self.phase = phase
+        self._since = self.started
+        self.phases: Dict[str, float] = {}
+
+    def feed(self, line: str):
+        phase = None
+        if self.phase == "startup" and LOGIN_START_RE.search(line):
+            phase = "login"
+        elif self.phase in ("startup", "login") and LOGIN_DONE_RE.search(line):
+            phase = "checking"
+        else:
+            match = UPDATE_STATE_RE.search(line)
+            if match:
+                phase = match.group(1).strip().lower()
+            elif APP_UPDATE_SUCCESS_RE.search(line):
+                phase = "finish"
+        if phase is not None and phase != self.phase:
+            self._switch(phase)
+
+    def finish(self) -> Dict[str, float]:
+        self._switch(None)
+        return {phase: round(seconds, 2) for phase, seconds in self.phases.items()}
+
+    def _switch(self, phase):
+        now = time.perf_counter()
+        self.phases[self.phase] = self.phases.get(self.phase, 0.0) + now - self._since
+        self.phase, self._since = phase, now
+
+
+def run_app_update(steam_cmd_path: str, app_id: int = SERVER_APP_ID, validate: bool = False,
+                   install_dir: Optional[str] = None, timeout: Optional[float] = None,
+                   on_line: Optional[Callable[[str], None]] = None, pool=None,
+                   hang_timeout: Optional[float] = None) -> dict:
+    """
+    Run ``app_update`` and time its phases while the output streams in.
+
+    With a ``pool`` the update runs in a logged-in session, except into an
+    ``install_dir``: SteamCMD only takes ``force_install_dir`` before the
+    login, so that update gets a process of its own. ``hang_timeout`` is how
+    long a pooled update may print nothing (None: only ``timeout`` applies).
+
+    Returns {"success", "validate", "seconds", "phases", "result", "error"},
+    where ``phases`` maps each phase to its seconds (see PhaseTimer) and
+    ``result`` is SteamCMD's final success line.
+    """
+    logger.info(f"Updating app {app_id}{f' in {install_dir}' if install_dir else ''} "
+                f"({'with' if validate else 'without'} validation)")
+    result = error = timer = None
+
+    def handle(line):
+        nonlocal result, error
+        line = line.rstrip()
+        if not line:
+            return
+        if on_line:
+            on_line(line)
+        timer.feed(line)
+        success = APP_UPDATE_SUCCESS_RE.search(line)
+        if success:
+            result = success.group(0)
+        failure = APP_UPDATE_ERROR_RE.search(line)
+        if failure:
+            error = failure.group(0)
+
+    if pool is not None and not install_dir:
+        # Start-up and login were paid for when the session was opened
+        timer = PhaseTimer("checking")
+        try:
+            with pool.session() as session:
+                session.run(f"app_update {app_id}{' validate' if validate else ''}", timeout, handle,
+                            hang_timeout=hang_timeout)
+            if result is None and error is None:
+                error = "SteamCMD printed no result"
+        except SessionStartError as e:
+            logger.warning(f"{e}; using a separate SteamCMD process")
+            timer = None
+        except SessionError as e:
+            error = str(e)
+    if timer is None:
+        timer = PhaseTimer()
+        cmd = build_app_update_command(steam_cmd_path, app_id, validate, install_dir)
+        try:
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                       text=True, errors='replace')
+        except OSError as e:
+            process = None
+            error = f"Could not start SteamCMD: {e}"
+        if process is not None:
+            killer = threading.Timer(timeout, process.kill) if timeout else None
+            if killer:
+                killer.start()
+            try:
+                for line in process.stdout:
+                    handle(line)
+                process.wait()
+            finally:
+                if killer:
+                    killer.cancel()
+                process.stdout.close()
+            if result is None and error is None:
+                error = f"SteamCMD exited with {process.returncode} without a result"
+    phases = timer.finish()
+    report = {"success": result is not None, "validate": validate, "seconds": round(sum(phases.values()), 2),
+              "phases": phases, "result": result, "error": None if result else error}
+    logger.info(f"App {app_id} update {'succeeded' if report['success'] else 'failed'} in {report['seconds']}s: "
+                + ", ".join(f"{phase} {seconds}s" for phase, seconds in phases.items()))
+    return report
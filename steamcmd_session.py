@@ -0,0 +1,352 @@
+"""
+SteamCMD Session Module
+
+Keeps logged-in SteamCMD processes around and drives them over stdin, so
+checking for a server update, updating the game and downloading mods no
+longer each pay for SteamCMD's start-up and an anonymous login (and no
+longer log in often enough to run into Steam's rate limits).
+
+A session is one interactive SteamCMD: a command is written to its stdin
+and its output is read as it streams in until SteamCMD prints its
+``Steam>`` prompt again. A session that prints nothing for ``hang_timeout``
+seconds, or exits, is killed and replaced by a fresh one on the next
+request. Commands that legitimately stay silent for long, such as
+``workshop_download_item`` of a large mod, pass their own hang timeout
+(or None for none). The pool keeps up to ``size`` sessions and hands each to one
+caller at a time, and a background thread quits sessions left idle for
+``max_idle`` seconds.
+
+Any executable that prints a prompt and answers commands the way SteamCMD
+does can stand in for it (see benchmarks/fake_steamcmd.py).
+"""
+
+import os
+import re
+import time
+import codecs
+import queue
+import logging
+import threading
+import subprocess
+import contextlib
+from typing import Callable, List, Optional
+
+logger = logging.getLogger("SteamCMD.Session")
+
+# Constants
+PROMPT = "Steam>"
+DEFAULT_START_TIMEOUT = 180.0  # a first start may include a SteamCMD self-update
+DEFAULT_HANG_TIMEOUT = 300.0  # seconds without output before a session counts as hung
+DEFAULT_MAX_IDLE = 600.0  # idle sessions older than this are closed instead of reused
+REAP_INTERVAL = 30.0  # longest time between checks for sessions left idle too long
+LOGIN_DONE_RE = re.compile(r'Waiting for user info\.\.\.OK|Logged in OK')
+LOGIN_FAILED_RE = re.compile(r'FAILED|Login Failure|ERROR!', re.IGNORECASE)
+_ANSI_RE = re.compile(r'\x1b\[[0-9;]*[A-Za-z]')
+
+_LINE, _PROMPT, _EOF = "line", "prompt", "eof"
+SESSION_DEFAULT = object()  # use the session's hang_timeout
+
+
+class SessionError(OSError):
+    """A SteamCMD session hung, exited or could not be written to"""
+
+    def __init__(self, message: str, output: Optional[List[str]] = None):
+        super().__init__(message)
+        self.output = output or []
+
+
+class SessionStartError(SessionError):
+    """A SteamCMD session could not be started or logged in"""
+
+
+class SteamCMDSession:
+    """
+    One interactive, logged-in SteamCMD process.
+
+    ``executable`` defaults to ``steamcmd.exe`` inside ``steam_cmd_path``.
+    """
+
+    def __init__(self, steam_cmd_path: str, login: str = "anonymous", executable: Optional[str] = None,
+                 hang_timeout: float = DEFAULT_HANG_TIMEOUT):
+        self.executable = executable or f"{steam_cmd_path}steamcmd.exe"
+        self.login = login
+        self.hang_timeout = hang_timeout
+        self.process = None
+        self.started_at = None
+        self.last_used = None
+        self.commands = 0
+        self._events = queue.Queue()
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def start(self, timeout: float = DEFAULT_START_TIMEOUT):
+        """Start SteamCMD, wait for its first prompt and log in"""
+        started = time.perf_counter()
+        try:
+            self.process = subprocess.Popen([self.executable], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                            stderr=subprocess.STDOUT, bufsize=0)
+        except OSError as e:
+            raise SessionStartError(f"Could not start {self.executable}: {e}") from None
+        threading.Thread(target=self._read, args=(self.process.stdout,), name='steamcmd-session-reader',
+                         daemon=True).start()
+        try:
+            self._wait_for_prompt(timeout, timeout)
+            output = self.run(f"login {self.login}", timeout=timeout)
+        except SessionError as e:
+            self.kill()
+            raise SessionStartError(f"SteamCMD session did not start: {e}", e.output) from None
+        if any(LOGIN_FAILED_RE.search(line) for line in output) or not any(LOGIN_DONE_RE.search(line)
+                                                                            for line in output):
+            self.kill()
+            raise SessionStartError(f"SteamCMD login as {self.login} failed", output)
+        self.started_at = self.last_used = time.time()
+        logger.info(f"SteamCMD session {self.process.pid} logged in after {time.perf_counter() - started:.1f}s")
+
+    def run(self, command: str, timeout: Optional[float] = None,
+            on_line: Optional[Callable[[str], None]] = None, hang_timeout=SESSION_DEFAULT) -> List[str]:
+        """
+        Send ``command`` and return its output lines once the prompt is back.
+        Raises SessionError when SteamCMD exits, prints nothing for
+        ``hang_timeout`` seconds (the session's own unless given; None
+        disables it) or takes longer than ``timeout`` in total; the session
+        is unusable afterwards.
+        """
+        if hang_timeout is SESSION_DEFAULT:
+            hang_timeout = self.hang_timeout
+        if not self.alive:
+            raise SessionError("SteamCMD session is not running")
+        try:
+            self.process.stdin.write((command + "\n").encode())
+            self.process.stdin.flush()
+        except OSError as e:
+            raise SessionError(f"Could not send {command!r} to SteamCMD: {e}") from None
+        self.commands += 1
+        try:
+            return self._wait_for_prompt(timeout, hang_timeout, on_line)
+        finally:
+            self.last_used = time.time()
+
+    def close(self, timeout: float = 10.0):
+        """Quit SteamCMD, killing it when it does not exit within ``timeout``"""
+        if not self.alive:
+            return
+        try:
+            self.process.stdin.write(b"quit\n")
+            self.process.stdin.flush()
+            self.process.wait(timeout)
+        except (OSError, subprocess.TimeoutExpired):
+            self.kill()
+
+    def kill(self):
+        if self.process is None:
+            return
+        try:
+            self.process.kill()
+            self.process.wait(10)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logger.error(f"Could not kill SteamCMD session {self.process.pid}: {e}")
+
+    def _wait_for_prompt(self, timeout, hang_timeout, on_line=None) -> List[str]:
+        deadline = time.monotonic() + timeout if timeout else None
+        output = []
+        while True:
+            wait = hang_timeout or None
+            if deadline is not None:
+                left = max(0.0, deadline - time.monotonic())
+                wait = left if wait is None else min(wait, left)
+            try:
+                kind, line = self._events.get(timeout=wait)
+            except queue.Empty:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise SessionError(f"SteamCMD did not finish within {timeout}s", output) from None
+                raise SessionError(f"SteamCMD printed nothing for {hang_timeout}s", output) from None
+            if kind == _PROMPT:
+                return output
+            if kind == _EOF:
+                raise SessionError("SteamCMD exited", output)
+            output.append(line)
+            if on_line:
+                on_line(line)
+
+    def _read(self, stream):
+        """Split the output into lines; the prompt comes without a newline"""
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        pending = ""
+        while True:
+            try:
+                chunk = os.read(stream.fileno(), 4096)
+            except OSError:
+                chunk = b""
+            if not chunk:
+                break
+            pending += _ANSI_RE.sub("", decoder.decode(chunk)).replace("\r", "")
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                if line.strip():
+                    self._events.put((_LINE, line))
+            if pending.strip().endswith(PROMPT):
+                text = pending.strip()[:-len(PROMPT)]
+                if text.strip():
+                    self._events.put((_LINE, text))
+                self._events.put((_PROMPT, None))
+                pending = ""
+        if pending.strip():
+            self._events.put((_LINE, pending))
+        self._events.put((_EOF, None))
+
+
+class SteamCMDPool:
+    """
+    Up to ``size`` logged-in SteamCMD sessions, each used by one caller at a
+    time. Sessions are started on demand, reused while they are idle for
+    less than ``max_idle`` seconds and replaced when they fail. Sessions
+    idle for longer are quit in the background; close() quits the rest.
+    """
+
+    def __init__(self, steam_cmd_path: str, size: int = 1, login: str = "anonymous",
+                 executable: Optional[str] = None, hang_timeout: float = DEFAULT_HANG_TIMEOUT,
+                 max_idle: float = DEFAULT_MAX_IDLE, start_timeout: float = DEFAULT_START_TIMEOUT):
+        self.steam_cmd_path = steam_cmd_path
+        self.size = max(1, size)
+        self.login = login
+        self.executable = executable
+        self.hang_timeout = hang_timeout
+        self.max_idle = max_idle
+        self.start_timeout = start_timeout
+        self.started = 0
+        self.recycled = 0
+        self.commands = 0
+        self._idle: List[SteamCMDSession] = []
+        self._count = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        threading.Thread(target=self._reap_loop, name='steamcmd-session-reaper', daemon=True).start()
+
+    @contextlib.contextmanager
+    def session(self):
+        """
+        Lend a logged-in session for a series of commands. A session that
+        raises SessionError is killed instead of being returned to the pool.
+        """
+        session = self._acquire()
+        commands = session.commands
+        try:
+            yield session
+        except SessionError:
+            session.kill()
+            self._release(None)
+            with self._cond:
+                self.recycled += 1
+            logger.warning(f"Recycled SteamCMD session {session.process.pid}")
+            raise
+        except BaseException:
+            # Output of an interrupted command may still be on its way
+            session.kill()
+            self._release(None)
+            raise
+        finally:
+            with self._cond:
+                self.commands += session.commands - commands
+        self._release(session)
+
+    def run(self, commands: List[str], timeout: Optional[float] = None,
+            on_line: Optional[Callable[[str], None]] = None, hang_timeout=SESSION_DEFAULT) -> List[str]:
+        """
+        Run ``commands`` one after another in one session and return all
+        output lines; ``timeout`` and ``hang_timeout`` apply to each command
+        """
+        output = []
+        with self.session() as session:
+            for command in commands:
+                try:
+                    output.extend(session.run(command, timeout, on_line, hang_timeout))
+                except SessionError as e:
+                    e.output = output + e.output
+                    raise
+        return output
+
+    def close(self):
+        """Quit every idle session; sessions in use are quit when they come back"""
+        self._stop_event.set()
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._count -= len(idle)
+            self._cond.notify_all()
+        for session in idle:
+            session.close()
+
+    def reap_idle(self) -> int:
+        """Quit idle sessions unused for ``max_idle`` seconds or exited; returns how many"""
+        with self._cond:
+            now = time.time()
+            stale = [session for session in self._idle
+                     if not session.alive or now - session.last_used >= self.max_idle]
+            if stale:
+                self._idle = [session for session in self._idle if session not in stale]
+                self._count -= len(stale)
+                self._cond.notify_all()
+        for session in stale:
+            logger.info(f"Closing SteamCMD session {session.process.pid} after {now - session.last_used:.0f}s idle")
+            session.close()
+        return len(stale)
+
+    def describe(self) -> dict:
+        with self._cond:
+            return {"size": self.size, "sessions": self._count, "idle": len(self._idle),
+                    "started": self.started, "recycled": self.recycled, "commands": self.commands}
+
+    def _reap_loop(self):
+        while not self._stop_event.wait(min(REAP_INTERVAL, self.max_idle)):
+            try:
+                self.reap_idle()
+            except Exception as e:
+                logger.error(f"Error closing idle SteamCMD sessions: {e}")
+
+    def _acquire(self) -> SteamCMDSession:
+        stale = []
+        session = None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise SessionError("SteamCMD session pool is closed")
+                while self._idle and session is None:
+                    candidate = self._idle.pop()
+                    if candidate.alive and time.time() - candidate.last_used < self.max_idle:
+                        session = candidate
+                    else:
+                        stale.append(candidate)
+                        self._count -= 1
+                if session is not None or self._count < self.size:
+                    break
+                self._cond.wait()
+            if session is None:
+                # Reserve the slot before starting outside the lock
+                self._count += 1
+        for candidate in stale:
+            candidate.close()
+        if session is not None:
+            return session
+        session = SteamCMDSession(self.steam_cmd_path, self.login, self.executable, self.hang_timeout)
+        try:
+            session.start(self.start_timeout)
+        except SessionError:
+            self._release(None)
+            raise
+        with self._cond:
+            self.started += 1
+        return session
+
+    def _release(self, session: Optional[SteamCMDSession]):
+        with self._cond:
+            if session is not None and session.alive and not self._closed:
+                self._idle.append(session)
+                session = None
+            else:
+                self._count -= 1
+            self._cond.notify()
+        if session is not None:
+            session.close()
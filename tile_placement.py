@@ -0,0 +1,163 @@
+"""
+Tile Placement Module
+
+Pins each tile's process tree to a set of CPU cores and sets its scheduling
+priority, so heavy tiles stop competing for the same cores while others sit
+idle.
+
+Core set policies:
+ - "none": leave scheduling to the operating system
+ - "round-robin": hand out ``cores_per_tile`` logical CPUs to each tile in turn
+ - "physical": hand out whole physical cores (all SMT siblings together),
+   spreading tiles across cores before doubling up
+ - "explicit": use a {tile_id: [cpu, ...]} map from the config
+
+A tile can run at a higher priority while it boots and drop back to its
+normal priority once it is ready.
+"""
+
+import os
+import logging
+from typing import Dict, List, Optional
+
+import psutil
+
+logger = logging.getLogger('LOManager.Placement')
+
+# Constants
+POLICIES = ("none", "round-robin", "physical", "explicit")
+PRIORITIES = ("idle", "below_normal", "normal", "above_normal", "high")
+
+if psutil.WINDOWS:
+    PRIORITY_VALUES = {
+        "idle": psutil.IDLE_PRIORITY_CLASS,
+        "below_normal": psutil.BELOW_NORMAL_PRIORITY_CLASS,
+        "normal": psutil.NORMAL_PRIORITY_CLASS,
+        "above_normal": psutil.ABOVE_NORMAL_PRIORITY_CLASS,
+        "high": psutil.HIGH_PRIORITY_CLASS,
+    }
+else:
+    # Raising priority (negative nice) needs root or CAP_SYS_NICE
+    PRIORITY_VALUES = {"idle": 19, "below_normal": 10, "normal": 0, "above_normal": -5, "high": -10}
+
+
+def physical_cores() -> List[List[int]]:
+    """
+    Group logical CPUs by physical core, e.g. [[0, 1], [2, 3], ...] with SMT.
+
+    Linux reads the topology from sysfs. Elsewhere SMT siblings are assumed to
+    be numbered next to each other, which is how Windows enumerates them.
+    """
+    logical = psutil.cpu_count(logical=True) or 1
+    topology = "/sys/devices/system/cpu/cpu{}/topology/thread_siblings_list"
+    if os.path.exists(topology.format(0)):
+        cores = {}
+        for cpu in range(logical):
+            try:
+                with open(topology.format(cpu)) as file:
+                    siblings = file.read().strip()
+            except OSError:
+                siblings = str(cpu)
+            cores.setdefault(siblings, []).append(cpu)
+        return sorted(cores.values())
+
+    physical = psutil.cpu_count(logical=False) or logical
+    per_core = max(1, logical // physical)
+    return [list(range(core * per_core, min(logical, (core + 1) * per_core))) for core in range(physical)]
+
+
+def plan_core_sets(tile_num: int, policy: str = "none", cores_per_tile: int = 1,
+                   core_map: Optional[Dict[str, List[int]]] = None,
+                   reserved_cpus: Optional[List[int]] = None) -> Dict[int, Optional[List[int]]]:
+    """
+    Decide which CPUs each tile may run on.
+
+    Args:
+        tile_num: Number of tiles
+        policy: One of POLICIES
+        cores_per_tile: Logical CPUs ("round-robin") or physical cores ("physical") per tile
+        core_map: {tile_id: [cpu, ...]} for the "explicit" policy (keys may be strings from JSON)
+        reserved_cpus: CPUs kept free for the manager and the OS
+
+    Returns:
+        {tile_id: sorted CPU list}, or None for tiles left unpinned
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown placement policy {policy!r}, expected one of {POLICIES}")
+    reserved = set(reserved_cpus or ())
+    plan: Dict[int, Optional[List[int]]] = {tile_id: None for tile_id in range(tile_num)}
+
+    if policy == "explicit":
+        for tile_id, cpus in (core_map or {}).items():
+            if int(tile_id) in plan:
+                plan[int(tile_id)] = sorted(cpus)
+        return plan
+
+    if policy == "round-robin":
+        units = [[cpu] for cpu in range(psutil.cpu_count(logical=True) or 1) if cpu not in reserved]
+    elif policy == "physical":
+        units = [[cpu for cpu in core if cpu not in reserved] for core in physical_cores()]
+        units = [core for core in units if core]
+    else:
+        return plan
+    if not units:
+        return plan
+
+    per_tile = max(1, min(cores_per_tile, len(units)))
+    for tile_id in range(tile_num):
+        start = (tile_id * per_tile) % len(units)
+        chosen = [units[(start + i) % len(units)] for i in range(per_tile)]
+        plan[tile_id] = sorted(cpu for unit in chosen for cpu in unit)
+    return plan
+
+
+class TilePlacement:
+    """Apply core sets and priorities to tile process trees and remember what was applied"""
+
+    def __init__(self, core_sets: Dict[int, Optional[List[int]]], priority: str = "normal",
+                 boot_priority: Optional[str] = None):
+        for name in (priority, boot_priority):
+            if name is not None and name not in PRIORITIES:
+                raise ValueError(f"Unknown priority {name!r}, expected one of {PRIORITIES}")
+        self.core_sets = core_sets
+        self.priority = priority
+        self.boot_priority = boot_priority
+        self.applied: Dict[int, dict] = {}
+
+    def apply(self, tile_id: int, pid: int, booting: bool = False) -> dict:
+        """
+        Pin the tile's process tree to its core set and set its priority.
+        Processes that cannot be changed (already gone, access denied) are skipped.
+        """
+        cpus = self.core_sets.get(tile_id)
+        priority = self.boot_priority if booting and self.boot_priority else self.priority
+        try:
+            root = psutil.Process(pid)
+            tree = [root] + root.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return self.applied.get(tile_id, {})
+
+        pinned = 0
+        for proc in tree:
+            try:
+                if cpus is not None and hasattr(proc, 'cpu_affinity'):
+                    proc.cpu_affinity(cpus)
+                proc.nice(PRIORITY_VALUES[priority])
+                pinned += 1
+            except psutil.NoSuchProcess:
+                pass
+            except psutil.AccessDenied as e:
+                logger.warning(f"Could not place tile {tile_id} process {proc.pid}: {e}")
+
+        self.applied[tile_id] = {"cpus": cpus, "priority": priority, "booting": booting, "processes": pinned}
+        logger.info(f"Tile {tile_id}: cpus={cpus or 'all'} priority={priority} ({pinned} processes)")
+        return self.applied[tile_id]
+
+    def describe(self, tile_id: int) -> dict:
+        """Return the planned core set and the last applied placement of a tile"""
+        applied = self.applied.get(tile_id, {})
+        return {
+            "cpus": self.core_sets.get(tile_id),
+            "priority": applied.get("priority", self.priority),
+            "booting": applied.get("booting", False),
+        }
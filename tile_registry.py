@@ -0,0 +1,120 @@
+"""
+Tile Registry Module
+
+Thread-safe record of every tile's lifecycle state and of the operation
+running on it, so single tiles can be started, stopped, restarted or
+redeployed independently and at the same time.
+
+Each tile has its own re-entrant operation lock: operations on one tile run
+one after another, operations on different tiles run in parallel, and
+cluster-wide operations take every tile's lock through exclusive().
+
+Lifecycle states:
+ - stopped: no process
+ - starting: launched, not ready yet
+ - ready: reported ready (log line or A2S answer)
+ - draining: players are being warned before the tile goes down
+ - stopping: asked to shut down, waiting for the exit
+ - crashed: exited without being asked to, waiting for the restart
+"""
+
+import time
+import logging
+import threading
+import contextlib
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger('LOManager.TileRegistry')
+
+# Constants
+TILE_STATES = ("stopped", "starting", "ready", "draining", "stopping", "crashed")
+
+
+class TileEntry:
+    """State of one tile"""
+    __slots__ = ('tile_id', 'state', 'state_since', 'operation', 'last_error', 'lock', 'thread', 'stop_event')
+
+    def __init__(self, tile_id):
+        self.tile_id = tile_id
+        self.state = "stopped"
+        self.state_since = time.time()
+        self.operation = None
+        self.last_error = None
+        self.lock = threading.RLock()
+        # Only used by the legacy thread-per-tile mode
+        self.thread = None
+        self.stop_event = None
+
+
+class TileRegistry:
+    """Tile entries by tile id, created on first use"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tiles: Dict[int, TileEntry] = {}
+
+    def entry(self, tile_id: int) -> TileEntry:
+        """Return the tile's entry, creating it if needed"""
+        with self._lock:
+            entry = self._tiles.get(tile_id)
+            if entry is None:
+                entry = self._tiles[tile_id] = TileEntry(tile_id)
+            return entry
+
+    def entries(self):
+        """Return every entry, ordered by tile id"""
+        with self._lock:
+            return [self._tiles[tile_id] for tile_id in sorted(self._tiles)]
+
+    def state(self, tile_id: int) -> str:
+        return self.entry(tile_id).state
+
+    def set_state(self, tile_id: int, state: str, only_from: Optional[Iterable[str]] = None) -> bool:
+        """
+        Move a tile to ``state``; with ``only_from`` only if it is currently in
+        one of those states. Returns True if the state was changed.
+        """
+        if state not in TILE_STATES:
+            raise ValueError(f"Unknown tile state {state!r}, expected one of {TILE_STATES}")
+        entry = self.entry(tile_id)
+        with self._lock:
+            if only_from is not None and entry.state not in only_from:
+                return False
+            if entry.state != state:
+                logger.debug(f"Tile {tile_id}: {entry.state} -> {state}")
+                entry.state = state
+                entry.state_since = time.time()
+            return True
+
+    def set_error(self, tile_id: int, error: Optional[str]):
+        """Record why the tile's last background operation failed, None when it succeeded"""
+        self.entry(tile_id).last_error = error
+
+    def describe(self, tile_id: int) -> dict:
+        """Return the tile's state, since when it is in it, the running operation and the last error"""
+        entry = self.entry(tile_id)
+        return {"state": entry.state, "since": entry.state_since, "operation": entry.operation,
+                "last_error": entry.last_error}
+
+    @contextlib.contextmanager
+    def operation(self, tile_id: int, name: str):
+        """Hold the tile's operation lock for the duration of ``name``"""
+        entry = self.entry(tile_id)
+        with entry.lock:
+            outer, entry.operation = entry.operation, entry.operation or name
+            try:
+                yield entry
+            finally:
+                entry.operation = outer
+
+    @contextlib.contextmanager
+    def exclusive(self, tile_ids: Iterable[int], name: str):
+        """Hold the operation locks of several tiles at once, taken in tile order"""
+        with contextlib.ExitStack() as stack:
+            for tile_id in sorted(set(tile_ids)):
+                stack.enter_context(self.operation(tile_id, name))
+            yield
+
+    def busy(self) -> Dict[int, str]:
+        """Return {tile_id: operation} of every tile with an operation running"""
+        return {entry.tile_id: entry.operation for entry in self.entries() if entry.operation}
@@ -0,0 +1,803 @@
+"""
+Tile Supervisor Module
+
+Event-driven supervision of Last Oasis tile processes. A single loop thread
+owns every tile process and is woken by the operating system the moment one
+of them exits, instead of one thread per tile polling ``process.poll()``.
+
+Exit notification backends:
+ - Windows: RegisterWaitForSingleObject on the process handle (the waits run
+   on the system thread pool, not on Python threads)
+ - Linux: pidfd_open() descriptors registered with the loop's selector
+ - Anything else: one shared poll of every tile process
+
+Stopping a tile first asks it to shut down cleanly (CTRL+BREAK to its
+process group on Windows, SIGTERM elsewhere) so it can flush its saves, and
+only kills its process tree once a grace period has passed. Every tile of a
+stop_all() is signalled at the same time and its stop time is recorded.
+
+Slow work triggered by tile events (Discord messages, log scans) is handed to
+a small fixed-size worker pool so the loop itself never blocks.
+
+An optional RestartPolicy keeps a crash history per tile, backs restarts off
+exponentially when crashes cluster and quarantines tiles that keep failing
+right after boot.
+"""
+
+import os
+import sys
+import json
+import time
+import heapq
+import queue
+import socket
+import logging
+import itertools
+import collections
+import selectors
+import threading
+import subprocess
+import concurrent.futures
+from typing import Callable, Dict, List, Optional
+
+import psutil
+
+logger = logging.getLogger('LOManager.Supervisor')
+
+# Constants
+DEFAULT_RESTART_DELAY = 1.0  # seconds between a crash and the relaunch
+DEFAULT_POLL_INTERVAL = 0.5  # only used by the fallback backend
+NOTIFY_WORKERS = 2
+DEFAULT_BACKOFF_MAX = 300.0  # longest delay between crash restarts
+DEFAULT_CRASH_WINDOW = 600.0  # crashes closer together than this count as a cluster
+DEFAULT_FAST_FAILURE = 60.0  # a crash with less uptime than this is a boot failure
+DEFAULT_QUARANTINE_AFTER = 5  # consecutive boot failures before a tile is quarantined
+CRASH_HISTORY_SIZE = 100  # crash records kept per tile
+DEFAULT_STOP_GRACE = 0.0  # seconds a stopping tile gets to exit cleanly before it is killed
+CTRL_BREAK_EVENT = 1
+
+if sys.platform == 'win32':
+    import ctypes
+    from ctypes import wintypes
+
+    _kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    _WAITORTIMERCALLBACK = ctypes.WINFUNCTYPE(None, ctypes.c_void_p, wintypes.BOOLEAN)
+    _kernel32.RegisterWaitForSingleObject.argtypes = [
+        ctypes.POINTER(wintypes.HANDLE), wintypes.HANDLE, _WAITORTIMERCALLBACK,
+        ctypes.c_void_p, wintypes.ULONG, wintypes.ULONG]
+    _kernel32.RegisterWaitForSingleObject.restype = wintypes.BOOL
+    _kernel32.UnregisterWait.argtypes = [wintypes.HANDLE]
+    _kernel32.UnregisterWait.restype = wintypes.BOOL
+    _INFINITE = 0xFFFFFFFF
+    _WT_EXECUTEONLYONCE = 0x00000008
+    _kernel32.OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+    _kernel32.OpenProcess.restype = wintypes.HANDLE
+    _kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+    _kernel32.GenerateConsoleCtrlEvent.argtypes = [wintypes.DWORD, wintypes.DWORD]
+    _kernel32.GenerateConsoleCtrlEvent.restype = wintypes.BOOL
+    _SYNCHRONIZE = 0x00100000
+    _PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+
+
+def kill_process_tree(pid):
+    """Kill a process and every child it spawned"""
+    try:
+        parent = psutil.Process(pid)
+    except psutil.NoSuchProcess:
+        return
+    for child in parent.children(recursive=True):
+        try:
+            child.kill()
+        except psutil.NoSuchProcess:
+            pass
+    try:
+        parent.kill()
+    except psutil.NoSuchProcess:
+        pass
+
+
+def request_graceful_stop(pid) -> bool:
+    """
+    Ask a tile to shut down cleanly: CTRL+BREAK to its process group on
+    Windows (the tile must have been started with CREATE_NEW_PROCESS_GROUP
+    and share this process's console, so the manager needs one, even a
+    hidden one), SIGTERM elsewhere. Returns False if the request could not
+    be delivered.
+
+    Only the processes under the shell wrapper are signalled, so the wrapper
+    exits when the server does, as cmd.exe does on Windows.
+    """
+    if sys.platform == 'win32':
+        if not _kernel32.GenerateConsoleCtrlEvent(CTRL_BREAK_EVENT, pid):
+            logger.warning(f"Could not send CTRL+BREAK to tile process {pid} (error {ctypes.get_last_error()}), "
+                           f"it will be killed; the manager must run with a console for clean shutdowns")
+            return False
+        return True
+    try:
+        parent = psutil.Process(pid)
+        procs = parent.children(recursive=True) or [parent]
+    except psutil.NoSuchProcess:
+        return False
+    for proc in procs:
+        try:
+            proc.terminate()
+        except psutil.NoSuchProcess:
+            pass
+    return True
+
+
+def stop_process_tree(pid, grace: float) -> dict:
+    """
+    Blocking stop of a process tree: request a clean shutdown, wait up to
+    ``grace`` seconds, then kill whatever is left. Returns the seconds it
+    took and whether it had to be killed.
+    """
+    started = time.monotonic()
+    forced = True
+    try:
+        parent = psutil.Process(pid)
+        procs = [parent] + parent.children(recursive=True)
+    except psutil.NoSuchProcess:
+        return {"seconds": 0.0, "forced": False}
+    if grace > 0 and request_graceful_stop(pid):
+        _, alive = psutil.wait_procs(procs, timeout=grace)
+        forced = bool(alive)
+    if forced:
+        kill_process_tree(pid)
+        psutil.wait_procs(procs, timeout=5)
+    return {"seconds": time.monotonic() - started, "forced": forced}
+
+
+class RestartPolicy:
+    """
+    Per-tile crash history with exponential restart backoff and quarantine.
+
+    Every crash is recorded with its time, exit code and uptime. The restart
+    delay doubles for each crash inside ``window`` seconds, up to
+    ``max_delay``. After ``quarantine_after`` consecutive crashes that each
+    happened within ``fast_failure`` seconds of launch the tile is quarantined
+    and not restarted until release() is called.
+    """
+
+    def __init__(self, base_delay: float = DEFAULT_RESTART_DELAY, max_delay: float = DEFAULT_BACKOFF_MAX,
+                 window: float = DEFAULT_CRASH_WINDOW, fast_failure: float = DEFAULT_FAST_FAILURE,
+                 quarantine_after: int = DEFAULT_QUARANTINE_AFTER, history_file: Optional[str] = None):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.window = window
+        self.fast_failure = fast_failure
+        self.quarantine_after = quarantine_after
+        self.history_file = history_file
+        self._lock = threading.Lock()
+        self._history: Dict[int, collections.deque] = {}
+        self._fast_failures: Dict[int, int] = {}
+        self._quarantined: Dict[int, float] = {}
+        self._next_delay: Dict[int, float] = {}
+        self._load()
+
+    def record_crash(self, tile_id: int, exit_code: Optional[int], uptime: float) -> Optional[float]:
+        """
+        Record a crash and decide what happens next.
+
+        Returns:
+            Seconds to wait before restarting, or None if the tile is now quarantined
+        """
+        now = time.time()
+        with self._lock:
+            history = self._history.setdefault(tile_id, collections.deque(maxlen=CRASH_HISTORY_SIZE))
+            history.append({"time": now, "exit_code": exit_code, "uptime": round(uptime, 1)})
+
+            if uptime < self.fast_failure:
+                self._fast_failures[tile_id] = self._fast_failures.get(tile_id, 0) + 1
+            else:
+                self._fast_failures[tile_id] = 0
+
+            if self._fast_failures[tile_id] >= self.quarantine_after:
+                self._quarantined[tile_id] = now
+                self._next_delay.pop(tile_id, None)
+                delay = None
+            else:
+                clustered = sum(1 for crash in history if now - crash["time"] <= self.window)
+                delay = min(self.max_delay, self.base_delay * (2 ** (clustered - 1)))
+                self._next_delay[tile_id] = delay
+        self._save()
+        return delay
+
+    def is_quarantined(self, tile_id: int) -> bool:
+        """Return True if the tile is held back from restarting"""
+        return tile_id in self._quarantined
+
+    def release(self, tile_id: int):
+        """Lift a quarantine and clear the boot-failure streak"""
+        with self._lock:
+            self._quarantined.pop(tile_id, None)
+            self._fast_failures[tile_id] = 0
+        self._save()
+
+    def history(self, tile_id: int) -> List[dict]:
+        """Return the recorded crashes of a tile, oldest first"""
+        with self._lock:
+            return list(self._history.get(tile_id, ()))
+
+    def stats(self) -> Dict[int, dict]:
+        """Return crash-rate statistics for every tile that has crashed"""
+        now = time.time()
+        result = {}
+        with self._lock:
+            for tile_id, history in self._history.items():
+                recent = [crash for crash in history if now - crash["time"] <= 3600]
+                result[tile_id] = {
+                    "crashes_total": len(history),
+                    "crashes_last_hour": len(recent),
+                    "crashes_in_window": sum(1 for crash in history if now - crash["time"] <= self.window),
+                    "mean_uptime": (sum(crash["uptime"] for crash in history) / len(history)) if history else None,
+                    "consecutive_fast_failures": self._fast_failures.get(tile_id, 0),
+                    "quarantined": tile_id in self._quarantined,
+                    "quarantined_since": self._quarantined.get(tile_id),
+                    "next_restart_delay": self._next_delay.get(tile_id),
+                    "last_crash": history[-1] if history else None,
+                }
+        return result
+
+    def _load(self):
+        if not self.history_file or not os.path.exists(self.history_file):
+            return
+        try:
+            with open(self.history_file, 'r') as file:
+                data = json.load(file)
+            for tile_id, crashes in data.get("history", {}).items():
+                self._history[int(tile_id)] = collections.deque(crashes, maxlen=CRASH_HISTORY_SIZE)
+            self._quarantined = {int(tile_id): since for tile_id, since in data.get("quarantined", {}).items()}
+            self._fast_failures = {int(tile_id): count for tile_id, count in data.get("fast_failures", {}).items()}
+        except Exception as e:
+            logger.error(f"Error loading crash history from {self.history_file}: {e}")
+
+    def _save(self):
+        if not self.history_file:
+            return
+        try:
+            with self._lock:
+                data = {
+                    "history": {str(tile_id): list(crashes) for tile_id, crashes in self._history.items()},
+                    "quarantined": {str(tile_id): since for tile_id, since in self._quarantined.items()},
+                    "fast_failures": {str(tile_id): count for tile_id, count in self._fast_failures.items()},
+                }
+            with open(self.history_file, 'w') as file:
+                json.dump(data, file, indent=4)
+        except Exception as e:
+            logger.error(f"Error saving crash history to {self.history_file}: {e}")
+
+
+class AdoptedProcess:
+    """
+    Popen-like wrapper around a tile process this supervisor did not start,
+    e.g. one left running by a previous manager instance.
+
+    Exit codes of processes that are not our children are only available on
+    Windows; elsewhere wait() and poll() report None as the exit code.
+    """
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self._process = psutil.Process(pid)  # remembers the create time, so pid reuse is detected
+        self.create_time = self._process.create_time()
+        self.returncode = None
+        self._exited = False
+        self._handle = None
+        if sys.platform == 'win32':
+            self._handle = _kernel32.OpenProcess(_SYNCHRONIZE | _PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+            if not self._handle:
+                raise ctypes.WinError(ctypes.get_last_error())
+
+    def _has_exited(self):
+        try:
+            # An orphan nobody reaps lingers as a zombie after exiting
+            return not self._process.is_running() or self._process.status() == psutil.STATUS_ZOMBIE
+        except psutil.NoSuchProcess:
+            return True
+
+    def poll(self):
+        if not self._exited and self._has_exited():
+            return self.wait()
+        return self.returncode
+
+    def wait(self, timeout: Optional[float] = None):
+        if not self._exited:
+            if not self._has_exited() or sys.platform == 'win32':
+                try:
+                    self.returncode = self._process.wait(timeout)
+                except psutil.NoSuchProcess:
+                    pass
+            self._exited = True
+            if self._handle:
+                _kernel32.CloseHandle(self._handle)
+                self._handle = None
+        return self.returncode
+
+
+class _Tile:
+    """Book-keeping for one supervised tile"""
+    __slots__ = ('tile_id', 'command', 'process', 'generation', 'started_at', 'stopping',
+                 'auto_restart', 'stop_waiters', 'watch_handle', 'restart_timer',
+                 'stop_requested_at', 'forced', 'restart_delay')
+
+    def __init__(self, tile_id, command):
+        self.tile_id = tile_id
+        self.command = command
+        self.process = None
+        self.generation = 0
+        self.started_at = None
+        self.stopping = False
+        self.auto_restart = True
+        self.stop_waiters = []
+        self.watch_handle = None
+        self.restart_timer = None
+        self.stop_requested_at = None
+        self.forced = False
+        # Seconds until the relaunch decided at the last exit, None when there is none
+        self.restart_delay = None
+
+
+class TileSupervisor:
+    """
+    Supervise any number of tile processes from a single event loop.
+
+    Callbacks are run on the notification pool, never on the loop thread:
+     - on_launch(tile_id, pid, launched_at)
+     - on_exit(tile_id, returncode, uptime, stopped) where ``stopped`` is True
+       when the exit was requested through stop_tile()/stop_all()
+     - on_quarantine(tile_id, crash_history) when the restart policy gives up
+
+    Without a ``restart_policy`` crashed tiles are relaunched after a fixed
+    ``restart_delay``. Stopped tiles get ``stop_grace`` seconds to exit
+    cleanly before they are killed.
+    """
+
+    def __init__(self, on_launch: Optional[Callable] = None, on_exit: Optional[Callable] = None,
+                 restart_delay: float = DEFAULT_RESTART_DELAY,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 popen_kwargs: Optional[dict] = None,
+                 restart_policy: Optional[RestartPolicy] = None,
+                 on_quarantine: Optional[Callable] = None,
+                 stop_grace: float = DEFAULT_STOP_GRACE):
+        self.on_launch = on_launch
+        self.on_exit = on_exit
+        self.on_quarantine = on_quarantine
+        self.restart_policy = restart_policy
+        self.restart_delay = restart_delay
+        self.poll_interval = poll_interval
+        self.stop_grace = stop_grace
+        self.popen_kwargs = popen_kwargs if popen_kwargs is not None else {
+            'stdout': subprocess.DEVNULL, 'shell': True}
+        if sys.platform == 'win32' and popen_kwargs is None:
+            # Its own process group, so CTRL+BREAK reaches the tile and nothing else
+            self.popen_kwargs['creationflags'] = subprocess.CREATE_NEW_PROCESS_GROUP
+        self._stop_reports: Dict[int, dict] = {}
+
+        self._tiles: Dict[int, _Tile] = {}
+        self._commands = queue.SimpleQueue()
+        self._timers = []
+        self._timer_seq = itertools.count()
+        self._selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+        self._notify_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=NOTIFY_WORKERS, thread_name_prefix='tile-notify')
+        self._thread = None
+        self._running = False
+        self._win_callbacks = {}
+
+        if sys.platform == 'win32':
+            self.backend = 'win32-wait'
+        elif hasattr(os, 'pidfd_open'):
+            self.backend = 'pidfd'
+        else:
+            self.backend = 'poll'
+
+    # ------------------------------------------------------------------
+    # Public API (safe to call from any thread)
+    # ------------------------------------------------------------------
+    def start(self):
+        """Start the supervisor loop thread"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name='tile-supervisor', daemon=True)
+        self._thread.start()
+        logger.info(f"Tile supervisor started ({self.backend} backend)")
+
+    def shutdown(self, stop_tiles=True, timeout=None):
+        """Stop the loop thread, optionally stopping every tile first"""
+        if not self._running:
+            return
+        if stop_tiles:
+            self.stop_all(timeout=timeout)
+        self._running = False
+        self._wake()
+        self._thread.join(timeout)
+        self._notify_pool.shutdown(wait=False)
+
+    def launch(self, tile_id: int, command: str) -> concurrent.futures.Future:
+        """
+        Launch (or relaunch) a tile. The future resolves to the new pid.
+        An explicit launch lifts a crash-loop quarantine.
+        """
+        if self.restart_policy is not None:
+            self.restart_policy.release(tile_id)
+        return self._call(self._launch, tile_id, command)
+
+    def adopt(self, tile_id: int, pid: int, command: str) -> concurrent.futures.Future:
+        """
+        Take over supervision of an already running tile process. Its exit is
+        handled exactly like that of a launched tile, and ``command`` is used
+        when it has to be relaunched. The future resolves to the pid.
+        """
+        return self._call(self._adopt, tile_id, pid, command)
+
+    def stop_tile(self, tile_id: int, timeout: Optional[float] = None, grace: Optional[float] = None) -> bool:
+        """
+        Stop a tile and block until its exit has been observed. The tile gets
+        ``grace`` seconds (default ``stop_grace``) to exit cleanly before its
+        process tree is killed.
+        """
+        waiter = self._call(self._stop, tile_id, grace).result()
+        if waiter is None:
+            return True
+        try:
+            waiter.result(timeout)
+            return True
+        except concurrent.futures.TimeoutError:
+            return False
+
+    def stop_all(self, timeout: Optional[float] = None, grace: Optional[float] = None) -> bool:
+        """Signal every tile at once and wait for all of them to exit"""
+        waiters = self._call(self._stop_all, grace).result()
+        done, not_done = concurrent.futures.wait(waiters, timeout)
+        return not not_done
+
+    def kill_tile(self, tile_id: int):
+        """
+        Kill a tile's process tree without stopping the tile, so its exit is
+        handled like a crash and the restart policy relaunches it
+        """
+        self._call(self._kill, tile_id)
+
+    def stop_report(self, tile_ids: Optional[List[int]] = None) -> Dict[int, dict]:
+        """
+        Return how the last stop of each tile went: seconds from the stop
+        request to the exit, whether it had to be killed, and its exit code.
+        """
+        reports = dict(self._stop_reports)
+        if tile_ids is not None:
+            reports = {tile_id: reports[tile_id] for tile_id in tile_ids if tile_id in reports}
+        return reports
+
+    def set_command(self, tile_id: int, command):
+        """Change the command used the next time a tile is (re)launched"""
+        self._call(self._set_command, tile_id, command)
+
+    def forget(self, tile_id: int):
+        """Drop a stopped tile from the supervisor"""
+        self._call(self._tiles.pop, tile_id, None)
+
+    def is_running(self, tile_id: int) -> bool:
+        """Return True while the tile has a live process"""
+        tile = self._tiles.get(tile_id)
+        return tile is not None and tile.process is not None
+
+    def pid(self, tile_id: int) -> Optional[int]:
+        """Return the pid of the tile's process, or None"""
+        tile = self._tiles.get(tile_id)
+        process = tile.process if tile else None
+        return process.pid if process else None
+
+    def pids(self) -> Dict[int, int]:
+        """Return a {tile_id: pid} snapshot of every running tile"""
+        result = {}
+        for tile_id, tile in list(self._tiles.items()):
+            process = tile.process
+            if process is not None:
+                result[tile_id] = process.pid
+        return result
+
+    def uptime(self, tile_id: int) -> Optional[float]:
+        """Seconds since the tile was last launched, or None if it is not running"""
+        tile = self._tiles.get(tile_id)
+        if tile is None or tile.process is None or tile.started_at is None:
+            return None
+        return time.monotonic() - tile.started_at
+
+    def scheduled_restart_delay(self, tile_id: int) -> Optional[float]:
+        """Return the restart delay decided when the tile last exited, None if it was not to be restarted"""
+        tile = self._tiles.get(tile_id)
+        return tile.restart_delay if tile else None
+
+    def tile_ids(self) -> List[int]:
+        """Return the ids of every tile the supervisor knows about"""
+        return sorted(self._tiles)
+
+    def call_later(self, delay: float, func: Callable, *args):
+        """Run ``func(*args)`` on the notification pool after ``delay`` seconds"""
+        self._call(self._add_timer, delay, self._notify, func, *args)
+
+    # ------------------------------------------------------------------
+    # Loop internals (only ever run on the loop thread)
+    # ------------------------------------------------------------------
+    def _call(self, func, *args) -> concurrent.futures.Future:
+        future = concurrent.futures.Future()
+        if threading.current_thread() is self._thread:
+            self._run_command(future, func, args)
+        else:
+            self._commands.put((future, func, args))
+            self._wake()
+        return future
+
+    def _run_command(self, future, func, args):
+        try:
+            future.set_result(func(*args))
+        except Exception as e:
+            future.set_exception(e)
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b'\0')
+        except (BlockingIOError, OSError):
+            pass  # Wake-up already pending
+
+    def _notify(self, func, *args):
+        def run():
+            try:
+                func(*args)
+            except Exception as e:
+                logger.error(f"Error in supervisor callback {getattr(func, '__name__', func)}: {e}")
+        try:
+            self._notify_pool.submit(run)
+        except RuntimeError:
+            pass  # Pool already shut down
+
+    def _add_timer(self, delay, func, *args):
+        entry = [time.monotonic() + delay, next(self._timer_seq), func, args, True]
+        heapq.heappush(self._timers, entry)
+        return entry
+
+    def _loop(self):
+        while self._running:
+            timeout = None
+            if self._timers:
+                timeout = max(0.0, self._timers[0][0] - time.monotonic())
+            if self.backend == 'poll' and self._tiles:
+                timeout = self.poll_interval if timeout is None else min(timeout, self.poll_interval)
+
+            for key, _ in self._selector.select(timeout):
+                if key.data is None:
+                    try:
+                        while self._wake_r.recv(4096):
+                            pass
+                    except (BlockingIOError, OSError):
+                        pass
+                else:
+                    self._handle_exit(*key.data)
+
+            while True:
+                try:
+                    future, func, args = self._commands.get_nowait()
+                except queue.Empty:
+                    break
+                self._run_command(future, func, args)
+
+            now = time.monotonic()
+            while self._timers and self._timers[0][0] <= now:
+                _, _, func, args, active = heapq.heappop(self._timers)
+                if active:
+                    try:
+                        func(*args)
+                    except Exception as e:
+                        logger.error(f"Error in supervisor timer: {e}")
+
+            if self.backend == 'poll':
+                for tile in list(self._tiles.values()):
+                    if tile.process is not None and tile.process.poll() is not None:
+                        self._handle_exit(tile.tile_id, tile.generation)
+
+    def _launch(self, tile_id, command):
+        tile = self._tiles.get(tile_id)
+        if tile is None:
+            tile = _Tile(tile_id, command)
+            self._tiles[tile_id] = tile
+        if tile.process is not None:
+            raise RuntimeError(f"Tile {tile_id} is already running")
+        if tile.restart_timer is not None:
+            tile.restart_timer[4] = False
+            tile.restart_timer = None
+
+        tile.command = command
+        tile.stop_requested_at = None
+        tile.forced = False
+        tile.stopping = False
+        tile.auto_restart = True
+        tile.generation += 1
+        logger.info(f"Starting {command}")
+        tile.process = subprocess.Popen(command, **self.popen_kwargs)
+        tile.started_at = time.monotonic()
+        self._watch(tile)
+        if self.on_launch:
+            self._notify(self.on_launch, tile_id, tile.process.pid, time.time())
+        return tile.process.pid
+
+    def _adopt(self, tile_id, pid, command):
+        tile = self._tiles.get(tile_id)
+        if tile is None:
+            tile = _Tile(tile_id, command)
+            self._tiles[tile_id] = tile
+        if tile.process is not None:
+            raise RuntimeError(f"Tile {tile_id} is already running")
+
+        process = AdoptedProcess(pid)
+        tile.command = command
+        tile.stop_requested_at = None
+        tile.forced = False
+        tile.stopping = False
+        tile.auto_restart = True
+        tile.generation += 1
+        tile.process = process
+        # Uptime counts from when the process really started
+        tile.started_at = time.monotonic() - max(0.0, time.time() - process.create_time)
+        logger.info(f"Adopted running tile {tile_id} (pid {pid})")
+        self._watch(tile)
+        return pid
+
+    def _watch(self, tile):
+        token = (tile.tile_id, tile.generation)
+        if self.backend == 'pidfd':
+            try:
+                fd = os.pidfd_open(tile.process.pid)
+            except OSError:
+                # Already gone - report it on the next loop pass
+                self._add_timer(0, self._handle_exit, *token)
+                return
+            tile.watch_handle = fd
+            self._selector.register(fd, selectors.EVENT_READ, token)
+        elif self.backend == 'win32-wait':
+            def on_signalled(_context, _timed_out):
+                self._commands.put((concurrent.futures.Future(), self._handle_exit, token))
+                self._wake()
+            callback = _WAITORTIMERCALLBACK(on_signalled)
+            wait_handle = wintypes.HANDLE()
+            ok = _kernel32.RegisterWaitForSingleObject(
+                ctypes.byref(wait_handle), int(tile.process._handle), callback,
+                None, _INFINITE, _WT_EXECUTEONLYONCE)
+            if not ok:
+                raise ctypes.WinError(ctypes.get_last_error())
+            tile.watch_handle = wait_handle
+            self._win_callbacks[token] = callback
+
+    def _unwatch(self, tile):
+        if tile.watch_handle is None:
+            return
+        if self.backend == 'pidfd':
+            self._selector.unregister(tile.watch_handle)
+            os.close(tile.watch_handle)
+        elif self.backend == 'win32-wait':
+            _kernel32.UnregisterWait(tile.watch_handle)
+            self._win_callbacks.pop((tile.tile_id, tile.generation), None)
+        tile.watch_handle = None
+
+    def _handle_exit(self, tile_id, generation):
+        tile = self._tiles.get(tile_id)
+        if tile is None or tile.generation != generation or tile.process is None:
+            return  # Stale notification from an earlier launch
+        self._unwatch(tile)
+        returncode = tile.process.wait()
+        uptime = time.monotonic() - tile.started_at
+        tile.process = None
+        stopped = tile.stopping
+        if stopped and tile.stop_requested_at is not None:
+            self._stop_reports[tile_id] = {"time": time.time(), "exit_code": returncode, "forced": tile.forced,
+                                           "seconds": round(time.monotonic() - tile.stop_requested_at, 2)}
+
+        logger.info(f"Tile {tile_id} exited with code {returncode} after {uptime:.1f}s "
+                    f"({'stopped' if stopped else 'crashed'})")
+
+        waiters, tile.stop_waiters = tile.stop_waiters, []
+        for waiter in waiters:
+            waiter.set_result(returncode)
+
+        # Decide on the restart first so on_exit already sees the crash in the policy's history
+        delay = None
+        if not stopped and tile.auto_restart and self._running:
+            delay = self.restart_delay
+            if self.restart_policy is not None:
+                delay = self.restart_policy.record_crash(tile_id, returncode, uptime)
+            if delay is None:
+                tile.auto_restart = False
+                logger.warning(f"Tile {tile_id} quarantined after repeated boot failures")
+        tile.restart_delay = delay
+
+        if self.on_exit:
+            self._notify(self.on_exit, tile_id, returncode, uptime, stopped)
+
+        if delay is not None:
+            tile.restart_timer = self._add_timer(delay, self._relaunch, tile_id, generation)
+        elif not stopped and self.restart_policy is not None and self.restart_policy.is_quarantined(tile_id):
+            if self.on_quarantine:
+                self._notify(self.on_quarantine, tile_id, self.restart_policy.history(tile_id))
+
+    def _relaunch(self, tile_id, generation):
+        tile = self._tiles.get(tile_id)
+        if tile is None or tile.generation != generation or tile.process is not None or tile.stopping:
+            return
+        tile.restart_timer = None
+        try:
+            self._launch(tile_id, tile.command)
+        except Exception as e:
+            logger.error(f"Failed to relaunch tile {tile_id}: {e}")
+            tile.restart_timer = self._add_timer(self.restart_delay, self._relaunch, tile_id, tile.generation)
+
+    def _set_command(self, tile_id, command):
+        tile = self._tiles.get(tile_id)
+        if tile is not None:
+            tile.command = command
+
+    def _stop(self, tile_id, grace=None):
+        tile = self._tiles.get(tile_id)
+        if tile is None:
+            return None
+        tile.stopping = True
+        tile.auto_restart = False
+        if tile.restart_timer is not None:
+            tile.restart_timer[4] = False
+            tile.restart_timer = None
+        if tile.process is None:
+            return None
+        waiter = concurrent.futures.Future()
+        tile.stop_waiters.append(waiter)
+        if tile.stop_requested_at is not None:
+            return waiter  # Already stopping; the pending escalation still applies
+
+        grace = self.stop_grace if grace is None else grace
+        tile.stop_requested_at = time.monotonic()
+        tile.forced = False
+        logger.info(f"Stopping {tile.command}")
+        try:
+            root = psutil.Process(tile.process.pid)
+            tree = [root] + root.children(recursive=True)
+        except psutil.NoSuchProcess:
+            tree = []
+        if grace > 0 and request_graceful_stop(tile.process.pid):
+            # Escalate on the tree as it is now, in case the wrapper exits before the server does
+            self._add_timer(grace, self._force_stop, tile_id, tile.generation, tree)
+        else:
+            tile.forced = True
+            kill_process_tree(tile.process.pid)
+        return waiter
+
+    def _force_stop(self, tile_id, generation, tree):
+        alive = [proc for proc in tree if proc.is_running()]
+        if not alive:
+            return
+        logger.warning(f"Tile {tile_id} did not exit within its grace period, killing it")
+        tile = self._tiles.get(tile_id)
+        if tile is not None and tile.generation == generation and tile.process is not None:
+            tile.forced = True
+        for proc in alive:
+            try:
+                proc.kill()
+            except psutil.NoSuchProcess:
+                pass
+
+    def _kill(self, tile_id):
+        tile = self._tiles.get(tile_id)
+        if tile is None or tile.process is None or tile.stopping:
+            return
+        logger.info(f"Killing tile {tile_id} (pid {tile.process.pid})")
+        kill_process_tree(tile.process.pid)
+
+    def _stop_all(self, grace=None):
+        waiters = []
+        for tile_id in list(self._tiles):
+            waiter = self._stop(tile_id, grace)
+            if waiter is not None:
+                waiters.append(waiter)
+        return waiters
@@ -0,0 +1,188 @@
+"""
+VDF Module
+
+Streaming parser for Valve's KeyValues text format (VDF), used by SteamCMD's
+``app_info_print`` output and by the ``.acf`` manifests in ``steamapps``.
+
+The tokenizer reads its input piece by piece (a file, a process pipe or any
+iterable of strings), so a block can be parsed straight off a running
+SteamCMD and parsing stops at the block's closing brace instead of waiting
+for the process to finish.
+
+Supported: quoted and unquoted keys and values, ``\\"``, ``\\\\``, ``\\n``
+and ``\\t`` escapes, ``//`` comments and ``[$CONDITION]`` tags (skipped).
+Later duplicate keys replace earlier ones. Key lookups through get() are
+case-insensitive, like Steam's own.
+"""
+
+from typing import Iterable, Iterator, Optional, Tuple, Union
+
+# Constants
+STRING = "string"
+OPEN = "{"
+CLOSE = "}"
+_ESCAPES = {'n': '\n', 't': '\t', '\\': '\\', '"': '"'}
+_DELIMITERS = ' \t\r\n{}"'
+
+
+class VDFError(ValueError):
+    """Malformed VDF input"""
+
+
+def _chunks(source) -> Iterable[str]:
+    if isinstance(source, str):
+        return (source,)
+    if isinstance(source, bytes):
+        return (source.decode('utf-8', errors='replace'),)
+    return source
+
+
+def tokenize(source: Union[str, Iterable[str]]) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (kind, value) tokens from ``source``, a string or an iterable of
+    strings (e.g. an open file or a pipe). ``kind`` is STRING, OPEN or CLOSE.
+    """
+    state = None  # None between tokens, '"' in a quoted string, 'u' in an unquoted one, '/' in a comment
+    escape = False
+    value = []
+    for chunk in _chunks(source):
+        if isinstance(chunk, bytes):
+            chunk = chunk.decode('utf-8', errors='replace')
+        i, length = 0, len(chunk)
+        while i < length:
+            char = chunk[i]
+            if state == '"':
+                if escape:
+                    value.append(_ESCAPES.get(char, '\\' + char))
+                    escape = False
+                elif char == '\\':
+                    escape = True
+                elif char == '"':
+                    yield STRING, ''.join(value)
+                    value = []
+                    state = None
+                else:
+                    # Copy up to the next quote or backslash in one go
+                    end = i + 1
+                    while end < length and chunk[end] not in '"\\':
+                        end += 1
+                    value.append(chunk[i:end])
+                    i = end
+                    continue
+            elif state == '/':
+                if char == '\n':
+                    state = None
+            elif state == '[':
+                if char == ']':
+                    state = None
+            elif state == 'u':
+                if char in _DELIMITERS:
+                    yield STRING, ''.join(value)
+                    value = []
+                    state = None
+                    continue  # the delimiter is handled as a new token
+                value.append(char)
+            elif char == '"':
+                state = '"'
+            elif char == OPEN or char == CLOSE:
+                yield char, char
+            elif char == '/' and chunk.startswith('//', i):
+                state = '/'
+            elif char == '[':
+                state = '['
+            elif not char.isspace():
+                state = 'u'
+                value.append(char)
+            i += 1
+    if state == '"':
+        raise VDFError("unterminated quoted string")
+    if state == 'u':
+        yield STRING, ''.join(value)
+
+
+def parse_tokens(tokens: Iterator[Tuple[str, str]], nested: bool = False) -> dict:
+    """
+    Build a dict from ``tokens``. With ``nested`` the opening brace has
+    already been read and parsing stops at its closing brace, leaving the
+    rest of the stream unread.
+    """
+    result = {}
+    stack = []
+    current = result
+    key = None
+    for kind, value in tokens:
+        if kind == STRING:
+            if key is None:
+                key = value
+            else:
+                current[key] = value
+                key = None
+        elif kind == OPEN:
+            if key is None:
+                raise VDFError("block without a key")
+            child = {}
+            current[key] = child
+            stack.append(current)
+            current = child
+            key = None
+        else:
+            if key is not None:
+                raise VDFError(f"key {key!r} without a value")
+            if not stack:
+                if nested:
+                    return result
+                raise VDFError("unbalanced closing brace")
+            current = stack.pop()
+    if stack or nested:
+        raise VDFError("unexpected end of input inside a block")
+    if key is not None:
+        raise VDFError(f"key {key!r} without a value")
+    return result
+
+
+def parse(source: Union[str, Iterable[str]]) -> dict:
+    """Parse a whole VDF document"""
+    return parse_tokens(tokenize(source))
+
+
+def load(path: str) -> dict:
+    """Parse a VDF file such as an ``.acf`` manifest"""
+    with open(path, 'r', encoding='utf-8', errors='replace') as file:
+        return parse(file)
+
+
+def find_block(lines: Iterable[str], key: str) -> Optional[dict]:
+    """
+    Skip lines until one holding just ``"key"`` (or ``key``) and parse the
+    block that follows it. Meant for SteamCMD output, where the VDF block
+    comes after unrelated console messages. Stops reading at the block's
+    closing brace; returns None when the key never appears.
+    """
+    wanted = (f'"{key}"', key)
+    lines = iter(lines)
+    for line in lines:
+        if line.strip() in wanted:
+            tokens = tokenize(lines)
+            kind, _ = next(tokens, (None, None))
+            if kind != OPEN:
+                raise VDFError(f"no block after {key!r}")
+            return parse_tokens(tokens, nested=True)
+    return None
+
+
+def get(data: dict, *keys: str, default=None):
+    """Look up a nested value, ignoring key case; ``default`` when any key is missing"""
+    for key in keys:
+        if not isinstance(data, dict):
+            return default
+        if key in data:
+            data = data[key]
+            continue
+        lowered = key.lower()
+        for candidate, value in data.items():
+            if candidate.lower() == lowered:
+                data = value
+                break
+        else:
+            return default
+    return data